@@ -13,6 +13,7 @@ from weakref import finalize
 from threading import Condition, Thread, Lock
 import PySimpleGUI as sg
 from typing import List
+from collections import namedtuple
 from queue import Queue 
 import random
 import os
@@ -31,12 +32,13 @@ from bs2_config import  CDev, gif103, read_params, get_dev, DevType, systemDevic
 # from bs1_config import port_scan, CDev, gif103, read_params, get_dev, load_dev_config
 from bs1_faulhaber import FH_Motor
 from bs1_zaber import Zaber_Motor
-from bs1_script import Tbl, Log_tbl, groups, GetSubScript, LoadScriptFile, ClearLog, SaveLog, GetSubScriptDict
+from bs1_script import Tbl, Log_tbl, groups, GetSubScript, LoadScriptFile, ClearLog, SaveLog, GetSubScriptDict, GetScriptPlan, \
+    stepDependencies, ReloadScriptPlan
 from bs1_ni6002 import NI6002
 from bs1_cam_modbus import Cam_modbus, camRes
 from bs1_FHv3 import FH_Motor_v3
 from bs1_maxon import MAXON_Motor
-from bs1_anim_0MQ import anim_0MQ
+from bs1_anim_0MQ import anim_0MQ, STATUS_SNAPSHOT_PERIOD
 from bs1_phidget import PhidgetRELAY
 from bs1_marco_modbus import Marco_modbus, pulseData
 
@@ -46,7 +48,7 @@ import math
 
 from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, real_num_validator, \
     int_num_validator, real_validator, int_validator, file_name_validator, void_f, clearQ, removeElementQ, event2GUI, \
-    non_empty_string_validator
+    non_empty_string_validator, assign_parm
 
 # print_DEBUG = void_f
 
@@ -815,6 +817,57 @@ def LocateDevice (ev_name, devs_list) -> int:
     # print_log(f'BUGBUG - Found device located at index {d_index}: ev_name = {ev_name},  dev = {devs_list[d_index]}')
     return (dev_ind)
 
+# eventRegistry -- GUI event dispatch table. Device control event keys -{i}-OP- / -{ii}-OP- / -OP- are parsed once
+# to (device gui index, OP) and dispatched by OP to the registered handler, device of the event is located once
+# (LocateDevice) and cached by the event key.
+# handler(window, values, event, m_dev) -> WorkingTask to run / None (no task)
+evKey = namedtuple('evKey', ['index', 'op'])
+
+class eventRegistry:
+    __handlers:dict = dict()                        # OP -> handler
+    __keys:dict = dict()                            # event -> evKey
+    __devs:dict = dict()                            # event -> device index in devs_list (None - no device)
+
+    @classmethod
+    def register(cls, *ops:str):
+        def _register(handler):
+            for _op in ops:
+                assert _op not in cls.__handlers, f'GUI event {_op} handler is already registered'
+                cls.__handlers[_op] = handler
+            return handler
+        return _register
+
+    @classmethod
+    def parse(cls, event) -> evKey:
+        _key = cls.__keys.get(event)
+        if _key is None:
+            _m = re.fullmatch(r'-(\d+)-(.+)-', event) if isinstance(event, str) else None
+            if _m is not None:
+                _key = evKey(index=int(_m.group(1)), op=_m.group(2))
+            elif isinstance(event, str) and len(event) > 2 and event[0] == '-' and event[-1] == '-':
+                _key = evKey(index=None, op=event[1:-1])
+            else:
+                _key = evKey(index=None, op=event)
+            cls.__keys[event] = _key
+        return _key
+
+    @classmethod
+    def handler(cls, event):
+        return cls.__handlers.get(cls.parse(event).op)
+
+    # locate -- LocateDevice of the event, cached (reset() when device list is changed)
+    @classmethod
+    def locate(cls, event, devs_list) -> int | None:
+        if event not in cls.__devs:
+            cls.__devs[event] = LocateDevice(event, devs_list)
+        return cls.__devs[event]
+
+    @classmethod
+    def reset(cls):
+        cls.__devs.clear()
+
+
+
 def Correct_ZB_possition_after_unpark(window, devs_list):
     for m_dev in devs_list:
         if m_dev.C_type == DevType.ZABER:
@@ -853,9 +906,47 @@ def preTaskProceedure(window:sg.Window, wTask:pm.WorkingTask):
         else:
             print_log(f'Non controlled device associated cmd. dev =  {dev}')
 
+# pipelined steps of single cycle (starting from group first): each step is started as soon as all previous steps 
+# operating the same devices are done (see stepDependencies). scriptQ messages: -STEP_DONE- (event2GUI, value = step rows) / -STOP-
+# returns False if stopped
+def PipelinedSteps(first:int, deps:list[set[int]], scriptQ:Queue, eventQ:Queue) -> bool:
+    pending:list[int] = list(range(first, len(groups)))
+    running:dict[tuple, int] = dict()                   # step rows -> group index
+    done:set[int] = set(range(first))                   # steps before the first one are not run
+
+    while len(pending) > 0 or len(running) > 0:
+        for gr_index in list(pending):
+            if deps[gr_index] <= done:
+                pending.remove(gr_index)
+                running[tuple(groups[gr_index])] = gr_index
+                print_log(f'Starting step # {gr_index} (pipelined), running steps = {list(running.values())}')
+                eventQ.put(event2GUI(event='-SCRIPT_STEP-', value = groups[gr_index]))
+
+        msg = scriptQ.get()
+        _msg, _rows = (msg.event, msg.value) if isinstance(msg, event2GUI) else (msg, None)
+        if _msg == '-STOP-':
+            removeElementQ(eventQ, '-SCRIPT_STEP-')         # remove -SCRIPT_STEP- if still not proceeded 
+            print_log(f'Stop button pressed. Running steps = {list(running.values())}')
+            return False
+        elif _msg == '-STEP_DONE-':
+            gr_index = running.pop(tuple(_rows), None) if _rows is not None else None
+            if gr_index is None:
+                print_err(f'-ERROR- Unknown step done (rows = {_rows}). Running steps = {list(running.values())}')
+                if _rows is None and len(running) == 1:     # the only one
+                    gr_index = running.popitem()[1]
+                else:
+                    continue
+            print_log(f'Step # {gr_index} done (pipelined)')
+            done.add(gr_index)
+        else:
+            print_err(f'Unexpected msg = {msg}')
+
+    return True
+
 # 
 ScrRunLock = Lock()
-def ScriptRunner(window:sg.Window, devs_list:list[CDev], selected_group:list[str], scriptQ:Queue, retEvent:str, eventQ:Queue, cyclic:int = 1):
+def ScriptRunner(window:sg.Window, devs_list:list[CDev], selected_group:list[str], scriptQ:Queue, retEvent:str, eventQ:Queue, cyclic:int = 1, \
+                 pipelined:bool = False):
 
     if ScrRunLock.locked():
         print_err(f'-WARNING another script is still in progress. Trying to kill it')
@@ -890,32 +981,43 @@ def ScriptRunner(window:sg.Window, devs_list:list[CDev], selected_group:list[str
     print_log (f'Starting script at group # {gr_index} of {len (groups)} groups')   
 
     clearQ(scriptQ)
+    deps:list[set[int]] = stepDependencies() if pipelined else list()
     while gr_index < len (groups):
-        print_log(f'Running step # {gr_index} ')
-        print_log(f'Group -> {groups[gr_index]}')
+        if pipelined:
+            if not PipelinedSteps(gr_index, deps, scriptQ, eventQ):
+                break
+            gr_index = len (groups)
+        else:
+            print_log(f'Running step # {gr_index} ')
+            print_log(f'Group -> {groups[gr_index]}')
 
-        eventQ.put(event2GUI(event='-SCRIPT_STEP-', value = groups[gr_index]))
+            eventQ.put(event2GUI(event='-SCRIPT_STEP-', value = groups[gr_index]))
+            
+            print_log(f'Step # {gr_index} is waiting for completion')
+            msg:str = scriptQ.get()
+            msg = msg.event if isinstance(msg, event2GUI) else msg
+            # scriptQ.task_done()
+            print_log(f'Script runner get msg = {msg}, Step # {gr_index}')
+
+            if msg == '-STOP-':
+                removeElementQ(eventQ, '-SCRIPT_STEP-')         # remove -SCRIPT_STEP- if still not proceeded 
+                print_log(f'Stop button pressed. Group = {gr_index}')
+                break
+            elif msg == '-STEP_DONE-':
+                print_log(f'Step # {gr_index} done')
+                gr_index += 1
+            else:
+                print_err(f'Unexpected msg = {msg}')
         
-        print_log(f'Step # {gr_index} is waiting for completion')
-        msg:str = scriptQ.get()
-        # scriptQ.task_done()
-        print_log(f'Script runner get msg = {msg}, Step # {gr_index}')
+        if gr_index >= len (groups):
+            pm.scriptProfiler.newCycle()                  # cycle profile report (if profiler enabled)
 
-        if msg == '-STOP-':
-            removeElementQ(eventQ, '-SCRIPT_STEP-')         # remove -SCRIPT_STEP- if still not proceeded 
-            print_log(f'Stop button pressed. Group = {gr_index}')
-            break
-        elif msg == '-STEP_DONE-':
-            print_log(f'Step # {gr_index} done')
-            gr_index += 1
-        else:
-            print_err(f'Unexpected msg = {msg}')
-        
         if cyclic > 1 and gr_index >= len (groups):
             cyclic -= 1
             eventQ.put(event2GUI(event='-DECREMENT_CYCLIC-', value = cyclic))
             gr_index = 0
 
+    pm.scriptProfiler.newCycle()                          # stopped script - partial cycle
     window.write_event_value(retEvent, None)
     print_log(f'Script done')
     ScrRunLock.release()
@@ -1775,8 +1877,304 @@ def _stopProc(scriptQ:Queue, eventQ:Queue, gui_task_list:list):
     scriptQ.put('-STOP-')
     removeElementQ(eventQ, '-SCRIPT_STEP-')
     
-    for tsk in gui_task_list.getAllTasks():
-        tsk.EmergencyStop()
+    pm.EmergencyStopAll(gui_task_list.getAllTasks())         # all devices at once
+
+# stepsRunning -- script step tasks in progress (several steps may run at once in pipelined script)
+def stepsRunning(gui_task_list:pm.WorkingTasksList) -> bool:
+    return any(_tsk.isStep() for _tsk in gui_task_list.getAllTasks())
+
+
+# GUI device control event handlers, dispatched by event OP (eventRegistry)
+# ZABER
+@eventRegistry.register('ZABER-DST')
+def _zaberDst(window, values, event, m_dev):
+    formFillProc(event, values, window, realNum = True, positiveNum = True, defaultValue = m_dev.dev_zaber.GetPos())
+
+@eventRegistry.register('ZABER-VELOCITY')
+def _zaberVelocity(window, values, event, m_dev):
+    new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = m_dev.dev_zaber.DEFAULT_VELOCITY_PERCENTAGE)
+    m_dev.dev_zaber.velocity_in_percents = new_val
+
+@eventRegistry.register('ZABER-GTD')
+def _zaberGoToDest(window, values, event, m_dev):
+    i = (int)(event[1:3])
+    if not real_num_validator(values[f'-{i:02d}-ZABER-DST-'], positive=True):
+                                                            # the value is invalid
+        window[f'-{i:02d}-ZABER-DST-'].update(str(m_dev.dev_zaber.GetPos()))
+        return None
+    DeActivateMotorControl(window, DevType.ZABER, m_dev.c_gui)
+    return pm.WorkingTask(pm.CmdObj(device=m_dev,cmd=pm.OpType.go_to_dest, args=pm.argsType(position=values[f'-{i:02d}-ZABER-DST-'])), sType = pm.RunType.single)
+
+@eventRegistry.register('ZABER-GH')
+def _zaberHome(window, values, event, m_dev):
+    DeActivateMotorControl(window, DevType.ZABER, m_dev.c_gui)
+    return pm.WorkingTask(pm.CmdObj(device=m_dev,cmd=pm.OpType.home), sType = pm.RunType.single)
+
+
+# DH Gripper
+@eventRegistry.register('DH-GRIPPER-RPM')
+def _dhGripperRpm(window, values, event, m_dev):
+    update_val = str(m_dev.dev_mDC.DevOpSPEED)
+    new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = update_val)
+    m_dev.dev_mDC.DevOpSPEED = new_val
+
+@eventRegistry.register('DH-GRIPPER-ON')
+def _dhGripperOn(window, values, event, m_dev):
+    window[f'-{m_dev.c_gui}-DH-GRIPPER-ON-'].update(button_color='dark green on green')
+    window[f'-{m_dev.c_gui}-DH-GRIPPER-OFF-'].update(button_color='white on red')
+
+    DeActivateMotorControl(window, DevType.DH, m_dev.c_gui)
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev,cmd=pm.OpType.go_fwrd_on), sType = pm.RunType.single)
+    m_dev.dev_mDC._mDev_pressed = True
+    return wTask
+
+@eventRegistry.register('DH-GRIPPER-OFF')
+def _dhGripperOff(window, values, event, m_dev):
+    window[f'-{m_dev.c_gui}-DH-GRIPPER-OFF-'].update(button_color='tomato on red')
+    window[f'-{m_dev.c_gui}-DH-GRIPPER-ON-'].update(button_color='white on green')
+
+    DeActivateMotorControl(window, DevType.DH, m_dev.c_gui)
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev, cmd=pm.OpType.go_bcwrd_off), sType = pm.RunType.single)
+    m_dev.dev_mDC._mDev_pressed = True
+    return wTask
+
+@eventRegistry.register('DH_GRIPPER_TARGET')
+def _dhGripperTarget(window, values, event, m_dev):
+    formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = str(m_dev.dev_mDC.mDev_get_cur_pos()))
+
+@eventRegistry.register('DH_GRIPPER_POS_SET')
+def _dhGripperPosSet(window, values, event, m_dev):
+    i = event[1]
+    go_pos = values[f'-{i}-DH_GRIPPER_TARGET-']
+
+    print_log(f'Move DH GRIPPER {m_dev.c_gui}/{i} to {go_pos} position')
+
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev, cmd=pm.OpType.go_to_dest, args=pm.argsType(position=go_pos)), sType = pm.RunType.single)
+    m_dev.dev_mDC._mDev_pressed = True
+    DeActivateMotorControl(window, DevType.DH, m_dev.c_gui)
+    return wTask
+
+@eventRegistry.register('DH_GRIPPER_STOP')
+def _dhGripperStop(window, values, event, m_dev):
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev, cmd=pm.OpType.stop), sType = pm.RunType.single)
+    ActivateMotorControl(window, m_dev.dev_mDC._mDev_type, m_dev.c_gui)
+    return wTask
+
+@eventRegistry.register('DH_GRIPPER_TARGET_RESET')
+def _dhGripperTargetReset(window, values, event, m_dev):
+    i = event[1]
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev,cmd=pm.OpType.home), sType = pm.RunType.single)
+
+    window[f'-{i}-DH_GRIPPER_POSSITION-'].update(value = 0)
+    window[f'-{i}-DH_GRIPPER_TARGET-'].update(value = 0)
+    return wTask
+
+
+# Dispenser
+@eventRegistry.register('MARCO_UPDATE_TEMP')
+def _marcoUpdateTemp(window, values, event, m_dev):
+    formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = m_dev.dev_marco.set_temp_)
+
+@eventRegistry.register('MARCO_SET_TERM')
+def _marcoSetTemp(window, values, event, m_dev):
+    m_dev.dev_marco.set_temp(values['-MARCO_UPDATE_TEMP-'])
+
+@eventRegistry.register('MARCO_PROGRAM')
+def _marcoProgram(window, values, event, m_dev):
+    m_dev.dev_marco.program_control(values['-MARCO_PROGRAM-'][-1])
+
+@eventRegistry.register('MARCO_PULSE_ON')
+def _marcoPulseOn(window, values, event, m_dev):
+    formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = m_dev.dev_marco.pulse_on_)
+
+@eventRegistry.register('MARCO_PULSE_COUNT')
+def _marcoPulseCount(window, values, event, m_dev):
+    formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = m_dev.dev_marco.pulse_count_)
+
+@eventRegistry.register('MARCO_PULSE_CYCLE')
+def _marcoPulseCycle(window, values, event, m_dev):
+    formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = m_dev.dev_marco.cycle_rate_)
+
+@eventRegistry.register('MARCO_SET_PULSE_DATA')
+def _marcoSetPulseData(window, values, event, m_dev):
+    m_dev.dev_marco.set_pulse_data(_on_time = values['-MARCO_PULSE_ON-'], _cycl_rate=  values['-MARCO_PULSE_CYCLE-'], _pulse_count =  values['-MARCO_PULSE_COUNT-'])
+
+@eventRegistry.register('MARCO_PURGE_TIME')
+def _marcoPurgeTime(window, values, event, m_dev):
+    formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = m_dev.dev_marco.get_purge_time_)
+
+@eventRegistry.register('MARCO_SET_PURGE_TIME')
+def _marcoSetPurgeTime(window, values, event, m_dev):
+    m_dev.dev_marco.set_purge_time(values['-MARCO_PURGE_TIME-'])
+
+@eventRegistry.register('MARCO_RESET_PULSE_COUNT')
+def _marcoResetPulseCount(window, values, event, m_dev):
+    m_dev.dev_marco.reset_pulse_count()
+
+@eventRegistry.register('MARCO_PURGE_ON')
+def _marcoPurgeOn(window, values, event, m_dev):
+    window[f'-MARCO_PURGE_ON-'].update(button_color='dark green on green')
+    window[f'-MARCO_PURGE_OFF-'].update(button_color='white on red')
+    m_dev.dev_marco.set_purge(1)
+
+@eventRegistry.register('MARCO_PURGE_OFF')
+def _marcoPurgeOff(window, values, event, m_dev):
+    window[f'-MARCO_PURGE_OFF-'].update(button_color='tomato on red')
+    window[f'-MARCO_PURGE_ON-'].update(button_color='white on green')
+    m_dev.dev_marco.set_purge(0)
+
+@eventRegistry.register('MARCO_SINGLE_SHOT_ON')
+def _marcoSingleShotOn(window, values, event, m_dev):
+    window[f'-MARCO_SINGLE_SHOT_ON-'].update(button_color='dark green on green')
+    window[f'-MARCO_SINGLE_SHOT_OFF-'].update(button_color='white on red')
+    m_dev.dev_marco.single_shot(1)
+
+@eventRegistry.register('MARCO_SINGLE_SHOT_OFF')
+def _marcoSingleShotOff(window, values, event, m_dev):
+    window[f'-MARCO_SINGLE_SHOT_OFF-'].update(button_color='tomato on red')
+    window[f'-MARCO_SINGLE_SHOT_ON-'].update(button_color='white on green')
+    m_dev.dev_marco.single_shot(0)
+
+
+# GRIPPER
+@eventRegistry.register('GRIPPER-RPM')
+def _gripperRpm(window, values, event, m_dev):
+    if m_dev.dev_mDC.mDev_type == DevType.GRIPPERv3:
+        if isinstance(m_dev.dev_mDC, MAXON_Motor):
+            update_val = str(m_dev.dev_mDC.DEAFULT_VELOCITY_EV_VOLTAGE)
+        else:
+            update_val = str(m_dev.dev_mDC.DevOpSPEED)
+    elif m_dev.dev_mDC.mDev_type == DevType.GRIPPER:
+        update_val = str(m_dev.dev_mDC.DEAFULT_VELOCITY_EV_VOLTAGE)
+    else:
+        update_val = None
+
+    new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = update_val)
+
+    if m_dev.dev_mDC.mDev_type == DevType.GRIPPERv3:
+        if isinstance(m_dev.dev_mDC, MAXON_Motor):
+            m_dev.dev_mDC.el_voltage = new_val
+        else:
+            m_dev.dev_mDC.rpm = new_val
+    elif m_dev.dev_mDC.mDev_type == DevType.GRIPPER:
+        m_dev.dev_mDC.el_voltage = new_val
+    else:
+        print_err(f'-ERROR-: Wrong device type {m_dev.dev_mDC.mDev_type} at event {event}')
+
+@eventRegistry.register('GRIPPER-ON')
+def _gripperOn(window, values, event, m_dev):
+    window[f'-{m_dev.c_gui}-GRIPPER-ON-'].update(button_color='dark green on green')
+    window[f'-{m_dev.c_gui}-GRIPPER-OFF-'].update(button_color='white on red')
+
+    DeActivateMotorControl(window, DevType.GRIPPERv3, m_dev.c_gui)
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev,cmd=pm.OpType.go_fwrd_on), sType = pm.RunType.single)
+    m_dev.dev_mDC.mDev_pressed = True
+    return wTask
+
+@eventRegistry.register('GRIPPER-OFF')
+def _gripperOff(window, values, event, m_dev):
+    window[f'-{m_dev.c_gui}-GRIPPER-OFF-'].update(button_color='tomato on red')
+    window[f'-{m_dev.c_gui}-GRIPPER-ON-'].update(button_color='white on green')
+
+    DeActivateMotorControl(window, DevType.GRIPPERv3, m_dev.c_gui)
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev, cmd=pm.OpType.go_bcwrd_off), sType = pm.RunType.single)
+    m_dev.dev_mDC.mDev_pressed = True
+    return wTask
+
+@eventRegistry.register('GRIPPER_POS_SET')
+def _gripperPosSet(window, values, event, m_dev):
+    i = event[1]
+    go_pos = values[f'-{i}-GRIPPER_TARGET-']
+
+    print_log(f'Move GRIPPER {m_dev.c_gui}/{i} to {go_pos} position')
+
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev, cmd=pm.OpType.go_to_dest, args=pm.argsType(position=go_pos)), sType = pm.RunType.single)
+    m_dev.dev_mDC.mDev_pressed = True
+    DeActivateMotorControl(window, DevType.GRIPPERv3, m_dev.c_gui)
+    return wTask
+
+@eventRegistry.register('GRIPPER_STOP')
+def _gripperStop(window, values, event, m_dev):
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev, cmd=pm.OpType.stop), sType = pm.RunType.single)
+    ActivateMotorControl(window, m_dev.dev_mDC.mDev_type, m_dev.c_gui)
+    return wTask
+
+
+# GRIPPER / TROLLEY / DIST_ROTATOR
+@eventRegistry.register('GRIPPER_TARGET', 'TROLLEY_TARGET', 'DIST_ROTATOR_TARGET')
+def _motorTarget(window, values, event, m_dev):
+    new_val = formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = str(m_dev.dev_mDC.mDev_get_cur_pos()))
+    m_dev.dev_mDC.mDev_pos = new_val
+
+@eventRegistry.register('GRIPPER_TARGET_RESET', 'TROLLEY_TARGET_RESET', 'DIST_ROTATOR_TARGET_RESET')
+def _motorTargetReset(window, values, event, m_dev):
+    i = event[1]
+    _op = eventRegistry.parse(event).op.replace('_TARGET_RESET', '')       # GRIPPER / TROLLEY / DIST_ROTATOR
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev,cmd=pm.OpType.home), sType = pm.RunType.single)
+
+    window[f'-{i}-{_op}_POSSITION-'].update(value = 0)
+    window[f'-{i}-{_op}_TARGET-'].update(value = 0)
+    return wTask
+
+@eventRegistry.register('GRIPPER-CURR', 'TROLLEY-CURR', 'DIST_ROTATOR-CURR', 'TIME_ROTATOR-CURR')
+def _motorCurrent(window, values, event, m_dev):
+    new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = str(m_dev.dev_mDC.DEFAULT_CURRENT_LIMIT))
+    m_dev.dev_mDC.el_current_limit = new_val
+
+@eventRegistry.register('TROLLEY_VELOCITY', 'DIST_ROTATOR_VELOCITY')
+def _motorVelocity(window, values, event, m_dev):
+    new_val = formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = str(m_dev.dev_mDC.DevOpSPEED))
+    m_dev.dev_mDC.rpm = new_val
+
+@eventRegistry.register('TROLLEY_POS_SET', 'DIST_ROTATOR_POS_SET')
+def _motorPosSet(window, values, event, m_dev):
+    i = event[1]
+    _op = eventRegistry.parse(event).op.replace('_POS_SET', '')            # TROLLEY / DIST_ROTATOR
+
+    t_target = values[f'-{i}-{_op}_TARGET-']
+    if not int_num_validator(t_target):
+        print_err (f'ERROR - Wrong target value:->{t_target}<-')
+        return None
+    go_pos = int(t_target)
+
+    print_log(f'Move {_op.replace("_", " ")} {m_dev.c_gui}/{i} to {go_pos} position')
+
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev, cmd=pm.OpType.go_to_dest, args=pm.argsType(position=go_pos)), sType = pm.RunType.single)
+    m_dev.dev_mDC.mDev_pressed = True
+    DeActivateMotorControl(window, m_dev.C_type, m_dev.c_gui)
+    return wTask
+
+@eventRegistry.register('TROLLEY_RIGHT', 'TROLLEY_LEFT', 'DIST_ROTATOR_RIGHT', 'DIST_ROTATOR_LEFT', 'TIME_ROTATOR_RIGHT', 'TIME_ROTATOR_LEFT')
+def _motorRightLeft(window, values, event, m_dev):
+    DeActivateMotorControl(window, m_dev.C_type, m_dev.c_gui)
+
+    _cmd = pm.OpType.go_fwrd_on if eventRegistry.parse(event).op.endswith('_RIGHT') else pm.OpType.go_bcwrd_off
+    if m_dev.C_type == DevType.TIME_ROTATOR:
+        wTask = pm.WorkingTask(pm.CmdObj(device=m_dev, cmd=_cmd, args=pm.argsType(time=int(values[f'-TIME_ROTATOR_TARGET-']))), sType = pm.RunType.single)
+    else:
+        wTask = pm.WorkingTask(pm.CmdObj(device=m_dev, cmd=_cmd), sType = pm.RunType.single)
+
+    m_dev.dev_mDC.mDev_pressed = True
+    return wTask
+
+@eventRegistry.register('TROLLEY_STOP', 'DIST_ROTATOR_STOP', 'TIME_ROTATOR_STOP')
+def _motorStop(window, values, event, m_dev):
+    wTask = pm.WorkingTask(pm.CmdObj(device=m_dev, cmd=pm.OpType.stop), sType = pm.RunType.single)
+    ActivateMotorControl(window, m_dev.C_type, m_dev.c_gui)
+    return wTask
+
+
+# TIME_ROTATOR
+@eventRegistry.register('TIME_ROTATOR_TARGET')
+def _timeRotatorTarget(window, values, event, m_dev):
+    new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = str(m_dev.dev_mDC.DEFAULT_ROTATION_TIME))
+    m_dev.dev_mDC.rotationTime = int(new_val)
+
+@eventRegistry.register('TIME_ROTATOR_VELOCITY')
+def _timeRotatorVelocity(window, values, event, m_dev):
+    new_val = formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = m_dev.dev_mDC.DEAFULT_VELOCITY_EV_VOLTAGE)
+    m_dev.dev_mDC.el_voltage = new_val
+
 
 
 def workingCycle (window, sysDevs:systemDevices):
@@ -1791,10 +2189,16 @@ def workingCycle (window, sysDevs:systemDevices):
     initGUIDevs(window, devs_list)
 
     scriptRunning:bool = False
+    pipelined:bool = False                          # running script steps are pipelined (several steps at once)
+    stepRows:dict[int, list] = dict()               # script step rows by step task id (-STEP_DONE- report)
+    abortedSteps:set[int] = set()                   # step tasks stopped by failure of another step (pipelined)
     # _emergency_status:bool = False
 
     statusPub = anim_0MQ()
     statusPub._publisher(ZMQ_PORT)
+    statusPub.configure(delta = assign_parm('STATUS_PUBLISHER', parms_table, 'DELTA', False), \
+                        snapshot_period = assign_parm('STATUS_PUBLISHER', parms_table, 'SNAPSHOT_PERIOD', STATUS_SNAPSHOT_PERIOD), \
+                        encoding = assign_parm('STATUS_PUBLISHER', parms_table, 'ENCODING', 'JSON'))
     # ni_dev = None
     # calibration_cam = None
 
@@ -1819,9 +2223,9 @@ def workingCycle (window, sysDevs:systemDevices):
     # else:
     #     print_log(f'No EMO (LCK2) was defined')
 
-    control_monitor = sm.StatusMonitor(window = window, devs_list = devs_list, statusPub = statusPub, timeout = 1)
+    control_monitor = sm.StatusMonitor(window = window, devs_list = devs_list, statusPub = statusPub, timeout = 1, params = parms_table)
     # control_monitor = sm.StatusMonitor(window = window, devs_list = devs_list, statusPub = statusPub, timeout = 60)  #BUGBUGBUG
-    process_manager = pm.ProcManager(window=window)
+    process_manager = pm.ProcManager(window=window, params=parms_table)
     gui_task_list = pm.WorkingTasksList()
 
     eventQ:Queue = Queue()
@@ -1852,9 +2256,12 @@ def workingCycle (window, sysDevs:systemDevices):
                     print_log(f'-TASK_DONE- event received (task id = {taskID}). Task = {completedTask} ')
                     if completedTask:
                         TaskCloseProceedure(window, completedTask)
-                        if completedTask.isStep():
+                        if taskID in abortedSteps:                      # the script is stopped already
+                            abortedSteps.discard(taskID)
+                            stepRows.pop(taskID, None)
+                        elif completedTask.isStep():
                             print_log(f'STEP task DONE')
-                            scriptQ.put('-STEP_DONE-')
+                            scriptQ.put(event2GUI(event='-STEP_DONE-', value=stepRows.pop(taskID, None)))
                         else:
                             print_log(f'Single task DONE')
                         res = gui_task_list.delTask(taskID)
@@ -1862,7 +2269,8 @@ def workingCycle (window, sysDevs:systemDevices):
                         print_err(f'-ERROR- No task # {taskID} found in the tasks list')
                         continue
 
-                    activateScriptControl(window)
+                    if not stepsRunning(gui_task_list):                 # other pipelined steps are still running
+                        activateScriptControl(window)
                     
                     continue
                 
@@ -1870,12 +2278,27 @@ def workingCycle (window, sysDevs:systemDevices):
                     taskID = recvEvent.value
                     completedTask = gui_task_list.getTask(taskID)
                     print_log(f'-TASK_ERROR- event received (task id = {taskID}). Device = {recvEvent.device}. Task = {completedTask}. ')
+                    stepRows.pop(taskID, None)
+                    if taskID in abortedSteps:                          # stopped on failure of another step, reported already
+                        abortedSteps.discard(taskID)
+                        if completedTask:
+                            TaskCloseProceedure(window, completedTask)
+                            res = gui_task_list.delTask(taskID)
+                        if not stepsRunning(gui_task_list):
+                            activateScriptControl(window)
+                        continue
+
                     if completedTask:
-                        completedTask.EmergencyStop()
+                        if pipelined and scriptRunning and completedTask.isStep():   # stop all running steps at once
+                            abortedSteps.update(_tsk.id() for _tsk in gui_task_list.getAllTasks() if _tsk.isStep() and _tsk.id() != taskID)
+                            pm.EmergencyStopAll(gui_task_list.getAllTasks())
+                        else:
+                            completedTask.EmergencyStop()
                         TaskCloseProceedure(window, completedTask)
                         res = gui_task_list.delTask(taskID)
                         # if completedTask.isStep():
-                        activateScriptControl(window)
+                        if not stepsRunning(gui_task_list):
+                            activateScriptControl(window)
                     else:
                         print_err(f'-ERROR- No task # {taskID} found in the tasks list')
                         
@@ -1911,7 +2334,7 @@ def workingCycle (window, sysDevs:systemDevices):
                         key = list(scriptStep.keys())[0]
                         script = scriptStep[key]
                         # wTask = pm.BuildComplexWorkingClass(script, devs_list, key, steptask) 
-                        wTask = pm.BuildComplexWorkingClass(script, _sysDev, key, steptask) 
+                        wTask = pm.BuildPlannedWorkingClass(GetScriptPlan(), script, _sysDev, key, steptask) 
                         print_DEBUG(f'wTask = {wTask}')
                         if wTask == None:
                             if not _DEBUG:
@@ -1922,9 +2345,11 @@ def workingCycle (window, sysDevs:systemDevices):
                             sg.popup_error(f'Cant perform STEP, since one of \nlisted commands operate device that is not active.\n End Script', background_color = 'orange')
                             activateScriptControl(window)
                             if steptask:                                            # if it's part of script 
-                                scriptQ.put('-STEP_DONE-')       
+                                scriptQ.put(event2GUI(event='-STEP_DONE-', value=recvEvent.value))       
 
                             continue
+                        elif steptask:
+                            stepRows[wTask.id()] = recvEvent.value
                     else:
                         print_err(f'Script validation failed for script: {scriptStep} ')
 
@@ -1944,8 +2369,10 @@ def workingCycle (window, sysDevs:systemDevices):
         elif event == sg.WIN_CLOSED or event == 'Exit':
 
             print_log(f'Exit received. Stop all activity')
-            for tsk in gui_task_list.getAllTasks():
-                tsk.EmergencyStop()
+            _stop_report = pm.EmergencyStopAll(gui_task_list.getAllTasks())
+            if len(_stop_report.unconfirmed) > 0:       # devices are not released until the stop is completed
+                print_inf(f'Exit: waiting for {_stop_report.unconfirmed} devices to stop')
+                pm.emergencyStop.join()
 
             if control_monitor:
                 control_monitor.StopMonitor()
@@ -2054,7 +2481,10 @@ def workingCycle (window, sysDevs:systemDevices):
             parms_table = read_params()
             for m_dev in devs_list:
                 m_dev.get_device().set_parms(parms_table)
+            _sysDev.setParams(parms_table)
+            ReloadScriptPlan(_sysDev)                   # the plan embeds TASK_POLICY of the parameters
             initGUIDevs(window, devs_list)
+            eventRegistry.reset()
             continue
 
         elif event == 'Version':
@@ -2120,10 +2550,11 @@ def workingCycle (window, sysDevs:systemDevices):
             # window.perform_long_operation(lambda :
             #     run_script_cont(window, devs_list, values['-TABLE-']), '-SCRIPT-RUN-DONE-')
             cyclic = int(values['-CYCLIC_RUN-'])
-            print_log(f'Running new script thread!')
+            pipelined = bool(assign_parm('SCRIPT', parms_table, 'PIPELINED', False))
+            print_log(f'Running new script thread! {"(pipelined steps)" if pipelined else ""}')
 
             script_thread = Thread(target=ScriptRunner, args=(window, devs_list, values['-TABLE-'], \
-                                                                        scriptQ, '-SCRIPT_DONE-', eventQ, cyclic,  ))
+                                                                        scriptQ, '-SCRIPT_DONE-', eventQ, cyclic, pipelined, ))
             script_thread.start()
             print_log(f'Running new script thread = {script_thread}/{script_thread.ident}')
 
@@ -2138,7 +2569,8 @@ def workingCycle (window, sysDevs:systemDevices):
             #     _emergency_status = False
 
             print_log(f'Script completed. Activating controls')
-            activateScriptControl(window)
+            if not stepsRunning(gui_task_list):                     # stopped pipelined steps activate it on completion
+                activateScriptControl(window)
             # sg.popup_auto_close('Scritp done')
             scriptRunning = False
             continue
@@ -2171,7 +2603,7 @@ def workingCycle (window, sysDevs:systemDevices):
                 key = list(scriptStep.keys())[0]
                 script = scriptStep[key]
                 # wTask = pm.BuildComplexWorkingClass(script, devs_list, key, steptask) 
-                wTask = pm.BuildComplexWorkingClass(script, _sysDev, key, steptask) 
+                wTask = pm.BuildPlannedWorkingClass(GetScriptPlan(), script, _sysDev, key, steptask) 
                 # wTask = pm.BuildComplexWorkingClass(scriptStep, devs_list, steptask)
                 print_DEBUG(f'wTask = {wTask}')
                 if wTask == None :
@@ -2224,7 +2656,7 @@ def workingCycle (window, sysDevs:systemDevices):
         
 
 
-        d_index = LocateDevice(event, devs_list)
+        d_index = eventRegistry.locate(event, devs_list)
 
 
         if (not ((event == 'Step') or (event == '-SCRIPT_STEP-') or (event == '-TABLE-') or (event == '-INTER_LOCK_ENABLE-'))) and d_index is None:
@@ -2812,446 +3244,15 @@ def workingCycle (window, sysDevs:systemDevices):
 
 
 
-# Motor Devices section 
+# Motor Devices section (registered handlers, see eventRegistry)
 #        
+        _handler = eventRegistry.handler(event)
+        if _handler is not None:
+            wTask = _handler(window, values, event, devs_list[d_index])
 
-    # ZABER
-        if '-ZABER-DST-' in event  :
-            formFillProc(event, values, window, realNum = True, positiveNum = True, defaultValue = devs_list[d_index].dev_zaber.GetPos())
-            continue
-
-        elif '-ZABER-VELOCITY-' in event:
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = devs_list[d_index].dev_zaber.DEFAULT_VELOCITY_PERCENTAGE)
-            devs_list[d_index].dev_zaber.velocity_in_percents = new_val
+        if wTask is None:
             continue
 
-
-        elif '-ZABER-GTD-' in event:
-            i = (int)(event[1:3])
-            if not real_num_validator(values[f'-{i:02d}-ZABER-DST-'], positive=True):
-                                                                    # the value is invalid
-                window[f'-{i:02d}-ZABER-DST-'].update(str(devs_list[d_index].dev_zaber.GetPos())) 
-            else:
-                DeActivateMotorControl(window, DevType.ZABER, devs_list[d_index].c_gui)
-                wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index],cmd=pm.OpType.go_to_dest, args=pm.argsType(position=values[f'-{i:02d}-ZABER-DST-'])), sType = pm.RunType.single)
-                # devs_list[d_index].dev_zaber.move_abs(values[f'-{i:02d}-ZABER-DST-'])
-
-        elif 'ZABER-GH-' in event:
-            DeActivateMotorControl(window, DevType.ZABER, devs_list[d_index].c_gui)
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index],cmd=pm.OpType.home), sType = pm.RunType.single)
-            # devs_list[d_index].dev_zaber.move_home()
-            pass
-
-
-    # DH Gripper
-        elif '-DH-GRIPPER-RPM-' in event:
-            
-            update_val = str(devs_list[d_index].dev_mDC.DevOpSPEED)
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = update_val)
-            devs_list[d_index].dev_mDC.DevOpSPEED = new_val
-            continue
-
-        elif f'-DH-GRIPPER-ON-' in event:
-            window[f'-{devs_list[d_index].c_gui}-DH-GRIPPER-ON-'].update(button_color='dark green on green')
-            window[f'-{devs_list[d_index].c_gui}-DH-GRIPPER-OFF-'].update(button_color='white on red')
-
-            DeActivateMotorControl(window, DevType.DH, devs_list[d_index].c_gui)
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index],cmd=pm.OpType.go_fwrd_on), sType = pm.RunType.single)
-            devs_list[d_index].dev_mDC._mDev_pressed = True
-
-
-        elif f'-DH-GRIPPER-OFF-' in event:
-            window[f'-{devs_list[d_index].c_gui}-DH-GRIPPER-OFF-'].update(button_color='tomato on red')
-            window[f'-{devs_list[d_index].c_gui}-DH-GRIPPER-ON-'].update(button_color='white on green')
-
-            DeActivateMotorControl(window, DevType.DH, devs_list[d_index].c_gui)
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_bcwrd_off), sType = pm.RunType.single)
-            devs_list[d_index].dev_mDC._mDev_pressed = True
-
-
-
-        elif  f'-DH_GRIPPER_TARGET-' in event:
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = str(devs_list[d_index].dev_mDC.mDev_get_cur_pos()))
-            # devs_list[d_index].dev_mDC._mDev_pos = new_val
-            continue
-
-
-        elif '-DH_GRIPPER_POS_SET-' in event:
-            i = event[1]
-            go_pos = values[f'-{i}-DH_GRIPPER_TARGET-']
-
-            print_log(f'Move DH GRIPPER {devs_list[d_index].c_gui}/{i} to {go_pos} position')
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_to_dest, args=pm.argsType(position=go_pos)), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.go2pos(go_pos)
-
-            devs_list[d_index].dev_mDC._mDev_pressed = True
-            DeActivateMotorControl(window, DevType.DH, devs_list[d_index].c_gui)
-        
-
-        
-        elif '-DH_GRIPPER_STOP-' in event:
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.stop), sType = pm.RunType.single)
-            
-            ActivateMotorControl(window, devs_list[d_index].dev_mDC._mDev_type, devs_list[d_index].c_gui)
-            
-        elif '-DH_GRIPPER_TARGET_RESET-' in event:
-            i = event[1]
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index],cmd=pm.OpType.home), sType = pm.RunType.single)
-
-            window[f'-{i}-DH_GRIPPER_POSSITION-'].update(value = 0)
-            window[f'-{i}-DH_GRIPPER_TARGET-'].update(value = 0) 
-        
-
-    # Dispenser
-
-        elif '-MARCO_UPDATE_TEMP-' in event:
-            _def = devs_list[d_index].dev_marco.set_temp_
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = _def)
-            continue
-
-        elif '-MARCO_SET_TERM-' in event:
-            devs_list[d_index].dev_marco.set_temp(values['-MARCO_UPDATE_TEMP-'])
-            continue
-
-        elif '-MARCO_PROGRAM-' in event:
-            devs_list[d_index].dev_marco.program_control(values['-MARCO_PROGRAM-'][-1])
-            # MarcoGUIUpdate(window, devs_list[d_index])
-            continue
-        
-        
-        elif '-MARCO_PULSE_ON-' in event:
-            _def = devs_list[d_index].dev_marco.pulse_on_
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = _def)
-            continue
-
-        # elif '-MARCO_SET_PULSE_ON-' in event:
-        #     # devs_list[d_index].dev_marco.set_pulse_on(values['-MARCO_PULSE_ON-'])
-        #     devs_list[d_index].dev_marco.set_pulse_data(_on_time = values['-MARCO_PULSE_ON-'], _cycl_rate= , _pulse_count = )
-        #     continue
-
-        elif '-MARCO_PULSE_COUNT-' in event:
-            _def = devs_list[d_index].dev_marco.pulse_count_
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = _def)
-            continue
-
-        # elif '-MARCO_SET_PULSE_COUNT-' in event:
-        #     devs_list[d_index].dev_marco.set_pulse_count(values['-MARCO_PULSE_COUNT-'])
-        #     continue
-
-        elif '-MARCO_PULSE_CYCLE-' in event:
-            _def = devs_list[d_index].dev_marco.cycle_rate_
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = _def)
-            continue
-
-        elif '-MARCO_SET_PULSE_DATA-' in event:
-            devs_list[d_index].dev_marco.set_pulse_data(_on_time = values['-MARCO_PULSE_ON-'], _cycl_rate=  values['-MARCO_PULSE_CYCLE-'], _pulse_count =  values['-MARCO_PULSE_COUNT-'])
-            continue
-
-
-
-        elif '-MARCO_PURGE_TIME-' in event:
-            _def = devs_list[d_index].dev_marco.get_purge_time_
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = _def)
-            continue
-
-        elif '-MARCO_SET_PURGE_TIME-' in event:
-            devs_list[d_index].dev_marco.set_purge_time(values['-MARCO_PURGE_TIME-'])
-            continue
-
-
-        elif '-MARCO_RESET_PULSE_COUNT-' in event:
-            devs_list[d_index].dev_marco.reset_pulse_count()
-            continue
-
-
-
-        elif f'-MARCO_PURGE_ON-' in event:
-            window[f'-MARCO_PURGE_ON-'].update(button_color='dark green on green')
-            window[f'-MARCO_PURGE_OFF-'].update(button_color='white on red')
-            devs_list[d_index].dev_marco.set_purge(1)
-            continue
-        
-        elif f'-MARCO_PURGE_OFF-' in event:
-            window[f'-MARCO_PURGE_OFF-'].update(button_color='tomato on red')
-            window[f'-MARCO_PURGE_ON-'].update(button_color='white on green')
-            devs_list[d_index].dev_marco.set_purge(0)
-            continue
-
-        
-        elif f'-MARCO_SINGLE_SHOT_ON-' in event:
-            window[f'-MARCO_SINGLE_SHOT_ON-'].update(button_color='dark green on green')
-            window[f'-MARCO_SINGLE_SHOT_OFF-'].update(button_color='white on red')
-            devs_list[d_index].dev_marco.single_shot(1)
-            continue
-        
-        elif f'-MARCO_SINGLE_SHOT_OFF-' in event:
-            window[f'-MARCO_SINGLE_SHOT_OFF-'].update(button_color='tomato on red')
-            window[f'-MARCO_SINGLE_SHOT_ON-'].update(button_color='white on green')
-            devs_list[d_index].dev_marco.single_shot(0)
-            
-            continue
-
-
-
-
-
-    # GRIPPER
-        elif '-GRIPPER-RPM-' in event:
-            
-            if devs_list[d_index].dev_mDC.mDev_type == DevType.GRIPPERv3:
-                if isinstance(devs_list[d_index].dev_mDC, MAXON_Motor):
-                    update_val = str(devs_list[d_index].dev_mDC.DEAFULT_VELOCITY_EV_VOLTAGE)
-                else:
-                    update_val = str(devs_list[d_index].dev_mDC.DevOpSPEED)
-            elif devs_list[d_index].dev_mDC.mDev_type == DevType.GRIPPER: 
-                update_val = str(devs_list[d_index].dev_mDC.DEAFULT_VELOCITY_EV_VOLTAGE)
-            else:
-                update_val = None
-
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = update_val)
-
-            
-            if devs_list[d_index].dev_mDC.mDev_type == DevType.GRIPPERv3:
-                if isinstance(devs_list[d_index].dev_mDC, MAXON_Motor):
-                    devs_list[d_index].dev_mDC.el_voltage = new_val
-                else:
-                    devs_list[d_index].dev_mDC.rpm = new_val
-            elif devs_list[d_index].dev_mDC.mDev_type == DevType.GRIPPER:
-                devs_list[d_index].dev_mDC.el_voltage = new_val
-            else:
-                print_err(f'-ERROR-: Wrong device type {devs_list[d_index].dev_mDC.mDev_type} at event {event}')            
-
-        elif '-GRIPPER-CURR-' in event:
-            
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = devs_list[d_index].dev_mDC.DEFAULT_CURRENT_LIMIT)
-            devs_list[d_index].dev_mDC.el_current_limit = new_val
-
-
-        elif f'-GRIPPER-ON-' in event:
-            window[f'-{devs_list[d_index].c_gui}-GRIPPER-ON-'].update(button_color='dark green on green')
-            window[f'-{devs_list[d_index].c_gui}-GRIPPER-OFF-'].update(button_color='white on red')
-
-            DeActivateMotorControl(window, DevType.GRIPPERv3, devs_list[d_index].c_gui)
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index],cmd=pm.OpType.go_fwrd_on), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.gripper_on()
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-
-
-        elif f'-GRIPPER-OFF-' in event:
-            window[f'-{devs_list[d_index].c_gui}-GRIPPER-OFF-'].update(button_color='tomato on red')
-            window[f'-{devs_list[d_index].c_gui}-GRIPPER-ON-'].update(button_color='white on green')
-
-            DeActivateMotorControl(window, DevType.GRIPPERv3, devs_list[d_index].c_gui)
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_bcwrd_off), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.gripper_off()
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-
-
-
-
-        elif  f'-GRIPPER_TARGET-' in event:
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = str(devs_list[d_index].dev_mDC.mDev_get_cur_pos()))
-            devs_list[d_index].dev_mDC.mDev_pos = new_val
-
-
-        elif '-GRIPPER_POS_SET-' in event:
-            i = event[1]
-            go_pos = values[f'-{i}-GRIPPER_TARGET-']
-
-            print_log(f'Move GRIPPER {devs_list[d_index].c_gui}/{i} to {go_pos} position')
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_to_dest, args=pm.argsType(position=go_pos)), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.go2pos(go_pos)
-
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-            DeActivateMotorControl(window, DevType.GRIPPERv3, devs_list[d_index].c_gui)
-        
-
-        
-        elif '-GRIPPER_STOP-' in event:
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.stop), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_stop()
-            
-            ActivateMotorControl(window, devs_list[d_index].dev_mDC.mDev_type, devs_list[d_index].c_gui)
-            
-        elif '-GRIPPER_TARGET_RESET-' in event:
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index],cmd=pm.OpType.home), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_reset_pos()
-
-            window[f'-{i}-GRIPPER_POSSITION-'].update(value = 0)
-            window[f'-{i}-GRIPPER_TARGET-'].update(value = 0) 
-        
-
-    # TROLLEY    
-    #     
-
-        elif  f'-TROLLEY_TARGET-' in event:
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = str(devs_list[d_index].dev_mDC.mDev_get_cur_pos()))
-            devs_list[d_index].dev_mDC.mDev_pos = new_val
-
-                #
-        elif '-TROLLEY_VELOCITY-' in event:
-            new_val  = formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = devs_list[d_index].dev_mDC.DevOpSPEED)
-            devs_list[d_index].dev_mDC.rpm = new_val
-
-
-        elif '-TROLLEY_POS_SET-' in event:
-            i = event[1]
-
-            t_target = values[f'-{i}-TROLLEY_TARGET-']
-            if not int_num_validator(t_target):
-                print_err (f'ERROR - Wrong target value:->{t_target}<-')
-                continue
-            go_pos = int(t_target)
-
-            print_log(f'Move TROLLEY {devs_list[d_index].c_gui}/{i} to {go_pos} position')
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_to_dest, args=pm.argsType(position=go_pos)), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.go2pos(go_pos)
-
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-
-            DeActivateMotorControl(window, DevType.TROLLEY, devs_list[d_index].c_gui)
-        
-        elif '-TROLLEY_RIGHT-' in event:
-            DeActivateMotorControl(window, DevType.TROLLEY, devs_list[d_index].c_gui)
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_fwrd_on), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_forward()
-
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-
-        elif '-TROLLEY_LEFT-' in event:
-            DeActivateMotorControl(window, DevType.TROLLEY, devs_list[d_index].c_gui)
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_bcwrd_off), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_backwrd()
-
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-        
-        elif '-TROLLEY_STOP-' in event:
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.stop), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_stop()
-
-            ActivateMotorControl(window, DevType.TROLLEY, devs_list[d_index].c_gui)
-            
-        elif '-TROLLEY_TARGET_RESET-' in event:
-            i = event[1]
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index],cmd=pm.OpType.home), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_reset_pos()
-
-            window[f'-{i}-TROLLEY_POSSITION-'].update(value = 0)
-            window[f'-{i}-TROLLEY_TARGET-'].update(value = 0) 
-        
-        elif '-TROLLEY-CURR-' in event:
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = str(devs_list[d_index].dev_mDC.DEFAULT_CURRENT_LIMIT))
-            devs_list[d_index].dev_mDC.el_current_limit = new_val
-
-# DIST_ROTATOR
-        elif  f'-DIST_ROTATOR_TARGET-' in event:
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = str(devs_list[d_index].dev_mDC.mDev_get_cur_pos()))
-            devs_list[d_index].dev_mDC.mDev_pos = new_val
-
-                #
-        elif '-DIST_ROTATOR_VELOCITY-' in event:
-            new_val =  formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = str(devs_list[d_index].dev_mDC.DevOpSPEED))
-            devs_list[d_index].dev_mDC.rpm = new_val
-
-        elif '-DIST_ROTATOR_POS_SET-' in event:
-            i = event[1]
-
-            t_target = values[f'-{i}-DIST_ROTATOR_TARGET-']
-            if not int_num_validator(t_target):
-                print_err (f'Wrong target value:->{t_target}<-')
-                continue
-
-            go_pos = int(t_target)
-
-            print_log(f'Move DIST ROTATOR {devs_list[d_index].c_gui}/{i} to {go_pos} position')
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_to_dest, args=pm.argsType(position=go_pos)), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.go2pos(go_pos)
-
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-            DeActivateMotorControl(window, DevType.DIST_ROTATOR, devs_list[d_index].c_gui)
-        
-        elif '-DIST_ROTATOR_RIGHT-' in event:
-            
-            DeActivateMotorControl(window, DevType.DIST_ROTATOR, devs_list[d_index].c_gui)
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_fwrd_on), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_forward()
-
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-
-        elif '-DIST_ROTATOR_LEFT-' in event:
-            DeActivateMotorControl(window, DevType.DIST_ROTATOR, devs_list[d_index].c_gui)
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_bcwrd_off), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_backwrd()
-
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-        
-        elif '-DIST_ROTATOR_STOP-' in event:
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.stop), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_stop()
-
-            ActivateMotorControl(window, DevType.DIST_ROTATOR, devs_list[d_index].c_gui)
-            
-        elif '-DIST_ROTATOR_TARGET_RESET-' in event:
-            i = event[1]
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index],cmd=pm.OpType.home), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_reset_pos()
-
-            window[f'-{i}-DIST_ROTATOR_POSSITION-'].update(value = 0)
-            window[f'-{i}-DIST_ROTATOR_TARGET-'].update(value = 0) 
-        
-        elif '-DIST_ROTATOR-CURR-' in event:
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = str(devs_list[d_index].dev_mDC.DEFAULT_CURRENT_LIMIT))
-            devs_list[d_index].dev_mDC.el_current_limit = new_val
-
-     
-# TIME_ROTATOR_
-
-        elif  f'-TIME_ROTATOR_TARGET-' in event:
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = str(devs_list[d_index].dev_mDC.DEFAULT_ROTATION_TIME))
-            devs_list[d_index].dev_mDC.rotationTime = int(new_val)
-                #
-        elif '-TIME_ROTATOR_VELOCITY-' in event:
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = False, defaultValue = devs_list[d_index].dev_mDC.DEAFULT_VELOCITY_EV_VOLTAGE)
-            devs_list[d_index].dev_mDC.el_voltage = new_val
-
-        elif '-TIME_ROTATOR_RIGHT-' in event:
-            DeActivateMotorControl(window, DevType.TIME_ROTATOR, devs_list[d_index].c_gui)
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_fwrd_on, args=pm.argsType(time=int(values[f'-TIME_ROTATOR_TARGET-']))), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.timeRotaterFw(int(values[f'-TIME_ROTATOR_TARGET-']))
-
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-
-        elif '-TIME_ROTATOR_LEFT-' in event:
-            DeActivateMotorControl(window, DevType.TIME_ROTATOR, devs_list[d_index].c_gui)
-
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.go_bcwrd_off, args=pm.argsType(time=int(values[f'-TIME_ROTATOR_TARGET-']))), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.timeRotaterBw(int(values[f'-TIME_ROTATOR_TARGET-']))
-
-            devs_list[d_index].dev_mDC.mDev_pressed = True
-        
-        elif '-TIME_ROTATOR_STOP-' in event:
-            wTask = pm.WorkingTask(pm.CmdObj(device=devs_list[d_index], cmd=pm.OpType.stop), sType = pm.RunType.single)
-            # devs_list[d_index].dev_mDC.mDev_stop()
-
-            ActivateMotorControl(window, DevType.TIME_ROTATOR, devs_list[d_index].c_gui)
-            
-        elif '-TIME_ROTATOR-CURR-' in event:
-            new_val = formFillProc(event, values, window, realNum = False, positiveNum = True, defaultValue = devs_list[d_index].dev_mDC.DEFAULT_CURRENT_LIMIT)
-            devs_list[d_index].dev_mDC.el_current_limit = new_val
-
         if wTask and wTask.is_single():
             log_str = wTask.singleTaskRepr()
             # window['-OUTLOG-'].print(f'[{cmd[0]}] {cmd[1]}->{cmd[2:]}')
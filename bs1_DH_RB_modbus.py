@@ -21,11 +21,11 @@ from queue import Queue
 from collections import namedtuple
 from isHex import isHex, isHexUpper, isHexLower
 from bs1_base_motor import BaseMotor
-from bs2_DSL_cmd import Command, devCmdCnfg, vType, pType
+from bs2_DSL_cmd import devCmdCnfg, vType, pType
 
 from enum import Enum
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, unsigned_16 
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, unsigned_16, notifyQueue 
 
 
 MAX_DH_ANGLE = 65536
@@ -150,7 +150,7 @@ class DH_ROB_RGI_modbus (BaseMotor):
         self.__target_position = 0            
         self.__target_velocity = None
 
-        self.devNotificationQ:Queue = Queue()
+        self.devNotificationQ:Queue = notifyQueue()
         self._title = None
         try:
             self.DevOpSPEED = self.ROTATION_SPEED
@@ -218,7 +218,7 @@ class DH_ROB_RGI_modbus (BaseMotor):
         
     def operateDevice(self, command, **kwards) -> tuple[bool, bool]:
         try:
-            _cmd = Command(command)
+            _cmd = self.parseCommand(command, kwards.get('parsed'))
 
             if _cmd.device != self._devName:        # device name mismatch
                 raise Exception(f'({self._devName}) operateDevice: command device {_cmd.device} mismatch with actual device name {self._devName}.')
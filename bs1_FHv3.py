@@ -28,7 +28,7 @@ from bs2_DSL_cmd import DevType
 
 
     
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, num2binstr, set_parm, get_parm, globalEventQ, smartLocker
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, num2binstr, set_parm, get_parm, globalEventQ, smartLocker, notifyQueue
 import momanlibpy
 
 #=========================== block  __name__ == "__main__" ================
@@ -273,7 +273,7 @@ class FH_Motor_v3:
         self.new_pos = 0
         self.devName = devName
         self.dev_lock =  Lock()                 # device lock to avoid multiply access
-        self.devNotificationQ = Queue()
+        self.devNotificationQ:Queue = notifyQueue()
         
         try:
 
@@ -19,7 +19,7 @@ import easy_scpi as scpi
 from typing import List
 
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, notifyQueue
 
 
 # pip install ->
@@ -54,7 +54,7 @@ OUTP_OFF_CMD = 'OUTP OFF'
 class HMP_PS:
     def __init__ (self, sn, port, parms):
         self.__port = port
-        self.devNotificationQ = Queue()
+        self.devNotificationQ:Queue = notifyQueue()
         self.DELAY:float =  0
         self.times = 1
         
@@ -12,10 +12,13 @@ __status__ = "Tool"
 
 import ctypes
 import sys, time
+import threading
+import heapq
 from enum import Enum
 import json
 
 from collections import namedtuple
+from queue import Queue
 
 from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, real_num_validator, \
     int_num_validator, real_validator, int_validator, globalEventQ, smartLocker, clearQ, globalEventQ, event2GUI
@@ -38,6 +41,16 @@ PLC_TYPE_MAP = {
 
 }
 
+ADS_MAX_SUB_COMMANDS = 500          # max number of sub commands in one ADS sum request (TwinCAT limit)
+ADSIGRP_SYM_VERSION = 0xF008        # symbol table version (changed by PLC download / online change)
+ADS_HANDLE_ERRORS = (0x710, 0x711)  # ADSERR_DEVICE_SYMBOLNOTFOUND, ADSERR_DEVICE_SYMBOLVERSIONINVALID
+DEV_BYTE_STR_THRESHOLD = 1024       # BYTE arrays longer than this are returned as strings by readVars
+ADS_POOL_SIZE = 3                   # default number of pooled PLC connections
+ADS_RECONNECT_ATTEMPTS = 5          # reconnect attempts before the request fails
+ADS_RECONNECT_DELAY = 0.2           # first reconnect backoff delay (sec), doubled on each attempt
+ADS_RECONNECT_MAX_DELAY = 5.0       # max reconnect backoff delay (sec)
+ADS_CONNECTION_ERRORS = (0x6, 0x7, 0x745, 0x746, 0x748, 0x749, 0x755, 0x274C, 0x274D)  # port/target not found, timeout, no route, socket errors
+
 @dataclass
 class symbolsADS:           # ADS symbols used in PLC configuration w/default values
     _max_num_of_devs:str = 'G_Constant.MaxNumOfDrivers'
@@ -51,26 +64,29 @@ class symbolsADS:           # ADS symbols used in PLC configuration w/default va
 
 pick_method = Enum("pick_method", ["random", "up_end", "low_end"])
 
+# Pool - thread safe IDs pool. Free IDs are kept in a heap (O(log n) alloc/release for low_end/up_end) 
+# and in a set (O(1) random pick and double release check)
 class Pool:
     def __init__(self, size:int=1024, method:pick_method = pick_method.low_end):
         self._size: int = size                                          # maximum number of IDs in the pool
         self._pool: set[int] = set(range(1, self._size + 1))            # available IDs in the pool
         self._method: pick_method = method                             # method to pick IDs from the pool
+        self._sign: int = -1 if method == pick_method.up_end else 1     # max heap is kept as heap of negated IDs
+        self._heap: list[int] = [self._sign * id for id in range(1, self._size + 1)] if method != pick_method.random else list()
+        heapq.heapify(self._heap)
+        self._lock = threading.Lock()
 
     # Allocate an ID from the pool
     def alloc(self) -> int :
         try:
-            ret_val = None
-            if len(self._pool) == 0:                                # no IDs available
-                raise MemoryError(f'ADS POOL ERROR: The pool is empty. Cannot allocate new ID')
-            if self._method == pick_method.random:              # pick a random ID
-                ret_val = self._pool.pop() 
-            elif self._method == pick_method.low_end:            # pick the lowest ID
-                ret_val = min(self._pool)
-                self._pool.remove(ret_val)
-            elif self._method == pick_method.up_end:            # pick the highest ID
-                ret_val = max(self._pool)
-                self._pool.remove(ret_val)
+            with self._lock:
+                if len(self._pool) == 0:                                # no IDs available
+                    raise MemoryError(f'ADS POOL ERROR: The pool is empty. Cannot allocate new ID')
+                if self._method == pick_method.random:              # pick a random ID
+                    ret_val = self._pool.pop() 
+                else:                                               # pick the lowest / highest ID
+                    ret_val = self._sign * heapq.heappop(self._heap)
+                    self._pool.remove(ret_val)
             return ret_val
         except Exception as ex:
             exptTrace(ex)
@@ -81,13 +97,20 @@ class Pool:
         try:
             if id < 1 or id > self._size:
                 raise ValueError(f'ADS POOL ERROR: ID {id} is out of range [1..{self._size}]')
-            if id in self._pool:
-                raise ValueError(f'ADS POOL ERROR: ID {id} is already released')
-            self._pool.add(id)
+            with self._lock:
+                if id in self._pool:
+                    raise ValueError(f'ADS POOL ERROR: ID {id} is already released')
+                self._pool.add(id)
+                if self._method != pick_method.random:
+                    heapq.heappush(self._heap, self._sign * id)
         except Exception as ex:
             exptTrace(ex)
             raise ex
 
+    @property
+    def available(self) -> int:
+        return len(self._pool)
+
 class EN_DeviceCoreState(Enum):
     START = 0
     IDLE = 1
@@ -107,24 +130,202 @@ class apiPLC:
     def __init__(self, adsCom:commADS):
         pass
 
+@dataclass
+class pollerStats:                      # shared poller per-cycle statistics (seconds)
+    cycles:int = 0
+    overruns:int = 0                    # cycles longer than poller period
+    last_latency:float = 0              # last batched read duration
+    min_latency:float | None = None
+    max_latency:float = 0
+    total_latency:float = 0
+    last_cycle:float = 0                # last cycle duration (read + dispatch)
+    symbols:int = 0                     # symbols read in the last cycle
+    subscribers:int = 0                 # subscribers served in the last cycle
+
+    @property
+    def ave_latency(self) -> float:
+        return self.total_latency / self.cycles if self.cycles > 0 else 0
+
+    def update(self, latency:float, cycle:float, symbols:int, subscribers:int, period:float):
+        self.cycles += 1
+        self.last_latency = latency
+        self.min_latency = latency if self.min_latency is None else min(self.min_latency, latency)
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+        self.last_cycle = cycle
+        self.symbols = symbols
+        self.subscribers = subscribers
+        if cycle > period:
+            self.overruns += 1
+
+    def __str__(self) -> str:
+        return f'cycles={self.cycles}, overruns={self.overruns}, latency(ms) last/min/ave/max = {self.last_latency*1000:.2f}/' \
+               f'{(self.min_latency or 0)*1000:.2f}/{self.ave_latency*1000:.2f}/{self.max_latency*1000:.2f}, ' \
+               f'symbols={self.symbols}, subscribers={self.subscribers}'
+
+# adsPoller - single thread poller shared by all subscribers of the commADS connection.
+# Every cycle the symbols of all subscribers are read in one batched (sum) request and
+# the values are dispatched to subscriber callbacks: callback(values:dict | None) -> bool (True - unsubscribe)
+# values is None if the batched read failed. The thread runs only while there are subscribers
+class adsPoller:
+    def __init__(self, adsCom:commADS, period:float = 0.1):
+        self.__ads:commADS = adsCom
+        self.__period:float = period
+        self.__subscribers:dict = dict()            # {key: (symbols, callback)}
+        self.__lock = threading.Lock()
+        self.__thread:threading.Thread | None = None
+        self.__stats:pollerStats = pollerStats()
+
+    def subscribe(self, key, symbols:list[str], callback) -> None:
+        with self.__lock:
+            self.__subscribers[key] = (list(symbols), callback)
+            if self.__thread is None:
+                self.__thread = threading.Thread(target = self.__poller_thread, daemon = True)
+                self.__thread.start()
+                print_log(f'ADS INFO: Shared poller started, period = {self.__period} sec')
+
+    def unsubscribe(self, key) -> None:
+        with self.__lock:
+            self.__subscribers.pop(key, None)
+
+    def isSubscribed(self, key) -> bool:
+        with self.__lock:
+            return key in self.__subscribers
+
+    @property
+    def period(self) -> float:
+        return self.__period
+
+    @period.setter
+    def period(self, value:float):
+        self.__period = float(value)
+
+    @property
+    def stats(self) -> pollerStats:
+        return self.__stats
+
+    def __poller_thread(self):
+        while True:
+            _start = time.perf_counter()
+            with self.__lock:
+                if len(self.__subscribers) == 0:        # no subscribers, the thread is terminated
+                    self.__thread = None
+                    break
+                _subscribers = dict(self.__subscribers)
+
+            _symbols = list(dict.fromkeys(_sym for _syms, _ in _subscribers.values() for _sym in _syms))
+                                                    # unique symbols, the order is kept
+            try:
+                _vals:dict | None = self.__ads.readVars(_symbols)
+            except Exception as ex:
+                exptTrace(ex)
+                _vals = None
+            _latency = time.perf_counter() - _start
+
+            for _key, (_syms, _callback) in _subscribers.items():
+                try:
+                    _done = _callback(None if _vals is None else {_sym: _vals[_sym] for _sym in _syms})
+                except Exception as ex:
+                    exptTrace(ex)
+                    _done = True
+                if _done:
+                    self.unsubscribe(_key)
+
+            _cycle = time.perf_counter() - _start
+            self.__stats.update(latency=_latency, cycle=_cycle, symbols=len(_symbols), subscribers=len(_subscribers), period=self.__period)
+            print_DEBUG(f'ADS INFO: Shared poller cycle: {self.__stats}')
+
+            time.sleep(max(0, self.__period - _cycle))
+
+        print_log(f'ADS INFO: Shared poller is idle. Statistics: {self.__stats}')
+
+
+@dataclass
+class adsPoolStats:                     # ADS connections pool health / usage metrics
+    size:int = 0                        # number of connections in the pool
+    connected:int = 0                   # currently connected
+    in_use:int = 0                      # currently acquired
+    requests:int = 0                    # total acquisitions
+    wait_total:float = 0                # total time waiting for free connection (sec)
+    wait_max:float = 0
+    errors:int = 0                      # connection errors detected
+    reconnects:int = 0                  # successful reconnects
+    reconnect_failures:int = 0
+
+    @property
+    def wait_ave(self) -> float:
+        return self.wait_total / self.requests if self.requests > 0 else 0
+
+    def __str__(self) -> str:
+        return f'size={self.size}, connected={self.connected}, in_use={self.in_use}, requests={self.requests}, ' \
+               f'wait(ms) ave/max = {self.wait_ave*1000:.2f}/{self.wait_max*1000:.2f}, errors={self.errors}, ' \
+               f'reconnects={self.reconnects}, reconnect_failures={self.reconnect_failures}'
+
+# _adsLink - single pooled connection to PLC with its own symbol handles cache (handles are per connection)
+class _adsLink:
+    def __init__(self, index:int):
+        self.index:int = index
+        self.plc:pyads.Connection | None = None
+        self.connected:bool = False
+        self.handles:dict = dict()              # symbol handles cache {(symbol_name, plc_type): handle}
+        self.handles_stale:bool = False         # set on PLC state / symbol version change
+        self.symbol_cache:bool = False          # pyads symbol info cache can be dropped on invalidate()
+        self.buffer:bytearray = bytearray(DEV_BYTE_STR_THRESHOLD)   # reusable buffer for BYTE array reads
+
+    def __repr__(self) -> str:
+        return f'[ADS link {self.index}: {"connected" if self.connected else "disconnected"}, handles = {len(self.handles)}]'
+
+    # invalidate -- marks the handles as stale and drops pyads symbol info (index group / offset) cache 
+    # used by read_list_by_name / write_list_by_name. No ADS requests (safe in notification callback)
+    def invalidate(self) -> None:
+        self.handles_stale = True               # released by the link user on next access
+        if self.symbol_cache:
+            self.plc._symbol_info_cache.clear()
+
+    # checkSymbolCache -- pyads (checked with 3.4.2) keeps the symbol info cache in the private 
+    # Connection._symbol_info_cache dict and has no public API to drop it. If a pyads release renames it, 
+    # the cache can't be invalidated, so the sum read / write don't use it on this link (cache_symbol_info=False)
+    def checkSymbolCache(self) -> None:
+        self.symbol_cache = isinstance(getattr(self.plc, '_symbol_info_cache', None), dict)
+        if not self.symbol_cache:
+            print_inf(f'ADS WARNING: pyads {getattr(pyads, "__version__", "?")} has no symbol info cache to invalidate. Symbol info cache of link {self.index} is disabled')
+
+# commADS - ADS communication with PLC 
+# keeps a small pool of connections, so the watch dog polling, commands loading and GUI queries 
+# are not serialized on single connection. A broken connection is reopened with exponential backoff
+# and the failed request is retried once. Notifications are kept on the first (control) connection
+# and registered again after its reconnect
 class commADS:
-    def __init__(self, ams_net_id:str, remote_ip_address:str, ams_net_port:int=pyads.PORT_TC3PLC1):
+    def __init__(self, ams_net_id:str, remote_ip_address:str, ams_net_port:int=pyads.PORT_TC3PLC1, pool_size:int = ADS_POOL_SIZE):
         self.__ams_net_id = ams_net_id
         self.__remote_ip_address = remote_ip_address
         self.__ams_net_port = ams_net_port
-        self.__plc = None
         self.__plc_name = None
         self.__plc_version = None
+        self.__links:list[_adsLink] = [ _adsLink(i) for i in range(max(1, int(pool_size))) ]
+        self.__free:Queue = Queue()               # free connections
+        self.__stats:adsPoolStats = adsPoolStats(size = len(self.__links))
+        self.__stats_lock = threading.Lock()
+        self.__reconnect_lock = threading.Lock()  # control connection reconnect (notifications re-registration)
+        self.__notifications:dict = dict()        # active device notifications {key: [symbol_name, attr, callback, handles]}
+        self.__ntf_key:int = 0                    # notification key generator
+        self.__poller:adsPoller | None = None     # shared poller (created on demand)
+        self.__state_ntf:list = list()            # PLC state / symbol version notification handles
+        self.__cache_handles:bool = True          # handles cache is disabled if PLC state can't be watched
         try:
-            print_log(f'ADS INFO: Connecting to PLC with AMS NET ID={self.__ams_net_id} at IP={self.__remote_ip_address} on port={self.__ams_net_port}...')
-            self.__plc = pyads.Connection(ams_net_id=self.__ams_net_id, \
-                                         ams_net_port=self.__ams_net_port, ip_address = self.__remote_ip_address)
-            if self.__plc is None:
-                raise Exception(f'ADS ERROR: Cannot create PLC connection object')
-            
-            self.__plc.open()
-            self.__plc_name, self.__plc_version = self.__plc.read_device_info()
-            print_log(f'ADS INFO: Connected to PLC NAME = {str(self.__plc_name)} VER= {str(self.__plc_version)}, State={self.__plc.read_state()}')
+            print_log(f'ADS INFO: Connecting to PLC with AMS NET ID={self.__ams_net_id} at IP={self.__remote_ip_address} on port={self.__ams_net_port}, pool size = {len(self.__links)}...')
+            self.__open(self.__links[0])              # control connection must be established
+            self.__plc_name, self.__plc_version = self.__links[0].plc.read_device_info()
+            print_log(f'ADS INFO: Connected to PLC NAME = {str(self.__plc_name)} VER= {str(self.__plc_version)}, State={self.__links[0].plc.read_state()}')
+            self.__watchPlcState()
+
+            for _link in self.__links[1:]:            # other connections are reopened on demand if failed
+                try:
+                    self.__open(_link)
+                except Exception as ex:
+                    print_err(f'ADS ERROR: Pool connection {_link.index} failed to open ({ex}). Will retry on demand')
+            for _link in self.__links:
+                self.__free.put(_link)
 
         except Exception as ex: 
             exptTrace(ex)
@@ -133,32 +334,141 @@ class commADS:
 
     def __del__(self):
         try:
-            if self.__plc is not None:
-                self.__plc.close()
-                print_log(f'ADS INFO: Disconnected from PLC NAME = {str(self.__plc_name)} VER= {str(self.__plc_version)}')
+            for _key in list(self.__notifications.keys()):
+                self.delNotification(_key)
+            for _link in self.__links:
+                if not _link.connected:
+                    continue
+                if _link.index == 0:
+                    for _handles in self.__state_ntf:
+                        _link.plc.del_device_notification(*_handles)
+                self.__releaseHandles(_link)
+                _link.plc.close()
+                _link.connected = False
+            print_log(f'ADS INFO: Disconnected from PLC NAME = {str(self.__plc_name)} VER= {str(self.__plc_version)}. Pool statistics: {self.poolStats}')
         except Exception as ex:
             exptTrace(ex)
 
+    def __open(self, link:_adsLink) -> None:
+        link.plc = pyads.Connection(ams_net_id=self.__ams_net_id, \
+                                     ams_net_port=self.__ams_net_port, ip_address = self.__remote_ip_address)
+        if link.plc is None:
+            raise Exception(f'ADS ERROR: Cannot create PLC connection object')
+        link.plc.open()
+        link.plc.read_state()                     # verify the connection
+        link.handles = dict()
+        link.handles_stale = False
+        link.checkSymbolCache()
+        link.connected = True
+
+    # __closePort -- closes the link connection, but keeps the AMS route. On Linux pyads Connection.close() 
+    # deletes the route of the PLC net id (adsDelRoute), which is shared by all pooled links to the PLC.
+    # The route is added again (the same net id / IP) by open() of the reconnected link
+    # NOTE: pyads (checked with 3.4.2) has no public API to close the port only, so the private Connection._port / 
+    # _open are used. If a pyads release renames them, close() is used: the reconnect still works, but the other 
+    # links lose the route until the reconnected link adds it again
+    @staticmethod
+    def __closePort(link:_adsLink) -> None:
+        _portClose = getattr(getattr(pyads, 'pyads_ex', None), 'adsPortCloseEx', None)
+        if not getattr(getattr(pyads, 'ads', None), 'linux', False) or _portClose is None \
+                or not hasattr(link.plc, '_port') or not hasattr(link.plc, '_open'):
+            link.plc.close()
+            return
+        if link.plc._port is not None:
+            _portClose(link.plc._port)
+            link.plc._port = None
+        link.plc._open = False
+
+    # __reconnect -- reopens broken connection with exponential backoff
+    def __reconnect(self, link:_adsLink) -> None:
+        try:
+            if link.plc is not None:
+                commADS.__closePort(link)
+        except Exception as ex:
+            print_DEBUG(f'ADS INFO: Closing broken connection {link.index} failed: {ex}')
+        link.connected = False
+
+        _delay = ADS_RECONNECT_DELAY
+        for _attempt in range(1, ADS_RECONNECT_ATTEMPTS + 1):
+            try:
+                print_inf(f'ADS WARNING: Reconnecting connection {link.index} to PLC at {self.__remote_ip_address}, attempt {_attempt}/{ADS_RECONNECT_ATTEMPTS}')
+                self.__open(link)
+                if link.index == 0:               # control connection: restore notifications
+                    with self.__reconnect_lock:
+                        self.__state_ntf = list()
+                        self.__watchPlcState()
+                        for _key, _ntf in self.__notifications.items():
+                            _ntf[3] = link.plc.add_device_notification(_ntf[0], _ntf[1], _ntf[2])
+                self.invalidateHandles()          # PLC state changes may be missed while disconnected
+                with self.__stats_lock:
+                    self.__stats.reconnects += 1
+                print_log(f'ADS INFO: Connection {link.index} to PLC at {self.__remote_ip_address} is restored')
+                return
+            except Exception as ex:
+                print_err(f'ADS ERROR: Reconnect attempt {_attempt} of connection {link.index} failed: {ex}')
+                link.connected = False
+                time.sleep(_delay)
+                _delay = min(_delay * 2, ADS_RECONNECT_MAX_DELAY)
+
+        with self.__stats_lock:
+            self.__stats.reconnect_failures += 1
+        raise Exception(f'ADS ERROR: Connection {link.index} to PLC at {self.__remote_ip_address} can not be restored')
+
+    @staticmethod
+    def __isConnectionError(ex:Exception) -> bool:
+        if isinstance(ex, pyads.ADSError):
+            return ex.err_code in ADS_CONNECTION_ERRORS
+        return isinstance(ex, (OSError, ConnectionError, TimeoutError))
+
+    # __execute -- runs op(link) on a free pooled connection, reconnects and retries once on connection error
+    def __execute(self, op):
+        _start = time.perf_counter()
+        link:_adsLink = self.__free.get()
+        _wait = time.perf_counter() - _start
+        with self.__stats_lock:
+            self.__stats.requests += 1
+            self.__stats.in_use += 1
+            self.__stats.wait_total += _wait
+            self.__stats.wait_max = max(self.__stats.wait_max, _wait)
+        try:
+            if not link.connected:
+                self.__reconnect(link)
+            try:
+                return op(link)
+            except Exception as ex:
+                if not commADS.__isConnectionError(ex):
+                    raise ex
+                print_err(f'ADS ERROR: Connection {link.index} error: {ex}')
+                with self.__stats_lock:
+                    self.__stats.errors += 1
+                self.__reconnect(link)
+                return op(link)
+        finally:
+            with self.__stats_lock:
+                self.__stats.in_use -= 1
+            self.__free.put(link)
+
+    @property
+    def poolStats(self) -> adsPoolStats:
+        with self.__stats_lock:
+            self.__stats.connected = len([_link for _link in self.__links if _link.connected])
+            return adsPoolStats(**self.__stats.__dict__)
+
     # def readVar(self, symbol_name:str, variable:object = None, size:int = None) -> str | int | bool | float | list | tuple | None:
     def readVar(self, symbol_name:str, var_type:type | None = None, size:int | None  = None) -> str | int | bool | float | list | dict | None:
         ret_val = None
         try:
-            if self.__plc is None:
-                raise Exception(f'ADS ERROR: PLC connection is not established')
-            
             if size is None:
                 # if variable is None:
                 if var_type is None:
-                    ret_val = self.__plc.read_by_name(symbol_name, pyads.PLCTYPE_INT)
+                    ret_val = self.__execute(lambda link: self.__readByHandle(link, symbol_name, pyads.PLCTYPE_INT))
                 else:
                     # ret_val = self.__plc.read_by_name(symbol_name, plc_datatype=PLC_TYPE_MAP[type(variable)])
-                    ret_val = self.__plc.read_by_name(symbol_name, plc_datatype=PLC_TYPE_MAP[var_type])
+                    ret_val = self.__execute(lambda link: self.__readByHandle(link, symbol_name, PLC_TYPE_MAP[var_type]))
             elif size <= 1024:
-                ret_val = self.__plc.read_by_name(symbol_name, pyads.PLCTYPE_STRING)
+                ret_val = self.__execute(lambda link: self.__readByHandle(link, symbol_name, pyads.PLCTYPE_STRING))
             else:
-                _data = self.__plc.read_by_name(symbol_name, pyads.PLCTYPE_BYTE * size)
-                _cut_data = _data[:_data.index(0)]               # cut zero bytes
-                ret_val =   "".join(map(chr, _cut_data)) 
+                ret_val = self.__execute(lambda link: self.__readBytes(link, symbol_name, size))
 
             return ret_val
         
@@ -175,16 +485,13 @@ class commADS:
             else:
                 size = None 
 
-            if self.__plc is None:
-                raise Exception(f'ADS ERROR: PLC connection is not established')
-            
             if size is None:
                 if var_type is None:
                     raise Exception(f'ADS ERROR: Cannot write variable without type info')
                 else:
-                    self.__plc.write_by_name(symbol_name, dataToSend, plc_datatype=PLC_TYPE_MAP[var_type])
+                    self.__execute(lambda link: self.__writeByHandle(link, symbol_name, dataToSend, PLC_TYPE_MAP[var_type]))
             elif size <= 1024:
-                self.__plc.write_by_name(symbol_name, dataToSend, pyads.PLCTYPE_STRING)
+                self.__execute(lambda link: self.__writeByHandle(link, symbol_name, dataToSend, pyads.PLCTYPE_STRING))
             else:
                 raise Exception(f'ADS ERROR: Writing large data blocks is not supported yet')
 
@@ -195,6 +502,197 @@ class commADS:
             exptTrace(ex)
             raise ex
 
+    # symbol handles cache. The handle of the symbol is resolved once (name to handle lookup is a separate
+    # ADS request), the cache is invalidated on PLC state / symbol version change and on reconnect.
+    # The link is used exclusively by the caller, no lock is required
+    def __getHandle(self, link:_adsLink, symbol_name:str, plc_type) -> int | None:
+        if not self.__cache_handles:
+            return None                         # pyads resolves the name on each request
+        if link.handles_stale:
+            self.__releaseHandles(link)
+        _handle = link.handles.get((symbol_name, plc_type), None)
+        if _handle is None:
+            _handle = link.plc.get_handle(symbol_name)
+            link.handles[(symbol_name, plc_type)] = _handle
+        return _handle
+
+    def __dropHandle(self, link:_adsLink, symbol_name:str, plc_type) -> None:
+        _handle = link.handles.pop((symbol_name, plc_type), None)
+        if _handle is not None:
+            try:
+                link.plc.release_handle(_handle)
+            except Exception as ex:             # the handle may be already invalid
+                print_DEBUG(f'ADS INFO: Release handle of {symbol_name} failed: {ex}')
+
+    def __releaseHandles(self, link:_adsLink) -> None:
+        if len(link.handles) > 0:
+            print_log(f'ADS INFO: Releasing {len(link.handles)} cached symbol handles of connection {link.index}')
+        for _handle in link.handles.values():
+            try:
+                link.plc.release_handle(_handle)
+            except Exception as ex:             # the handle may be already invalid
+                print_DEBUG(f'ADS INFO: Release handle {_handle} failed: {ex}')
+        link.handles = dict()
+        link.handles_stale = False
+
+    def invalidateHandles(self) -> None:
+        for _link in self.__links:
+            _link.invalidate()
+
+    def __readByHandle(self, link:_adsLink, symbol_name:str, plc_type, return_ctypes:bool = False):
+        try:
+            return link.plc.read_by_name(symbol_name, plc_type, return_ctypes=return_ctypes, handle=self.__getHandle(link, symbol_name, plc_type))
+        except pyads.ADSError as ex:
+            if ex.err_code not in ADS_HANDLE_ERRORS:
+                raise ex
+            print_inf(f'ADS WARNING: Cached handle of {symbol_name} is invalid ({ex}). Resolving again')
+            self.__dropHandle(link, symbol_name, plc_type)
+            return link.plc.read_by_name(symbol_name, plc_type, return_ctypes=return_ctypes, handle=self.__getHandle(link, symbol_name, plc_type))
+
+    # __readBytes -- reads BYTE array as zero terminated string. The data is taken as ctypes array (no per byte
+    # list conversion), copied once into the link reusable buffer and decoded from the buffer view
+    def __readBytes(self, link:_adsLink, symbol_name:str, size:int) -> str:
+        _data = self.__readByHandle(link, symbol_name, pyads.PLCTYPE_BYTE * size, return_ctypes=True)
+        if len(link.buffer) < size:
+            link.buffer = bytearray(size)
+        with memoryview(link.buffer) as _view:
+            _view[:size] = memoryview(_data).cast('B')
+            _end = link.buffer.find(0, 0, size)              # cut zero bytes
+            return str(_view[:size if _end < 0 else _end], 'latin-1')
+
+    def __writeByHandle(self, link:_adsLink, symbol_name:str, value, plc_type) -> None:
+        try:
+            link.plc.write_by_name(symbol_name, value, plc_type, handle=self.__getHandle(link, symbol_name, plc_type))
+        except pyads.ADSError as ex:
+            if ex.err_code not in ADS_HANDLE_ERRORS:
+                raise ex
+            print_inf(f'ADS WARNING: Cached handle of {symbol_name} is invalid ({ex}). Resolving again')
+            self.__dropHandle(link, symbol_name, plc_type)
+            link.plc.write_by_name(symbol_name, value, plc_type, handle=self.__getHandle(link, symbol_name, plc_type))
+
+    # __watchPlcState -- registers notifications on PLC ADS state and symbol table version (control connection).
+    # The callbacks only mark the handles / symbol info caches as stale (no ADS requests in the router thread)
+    def __watchPlcState(self) -> None:
+        def _on_state_change(notification, data_name):
+            print_inf(f'ADS WARNING: PLC state / symbol version changed ({data_name}). Symbol handles / info cache is invalidated')
+            self.invalidateHandles()
+
+        try:
+            for _index, _length in (((pyads.constants.ADSIGRP_DEVICE_DATA, pyads.constants.ADSIOFFS_DEVDATA_ADSSTATE), 2), \
+                                    ((ADSIGRP_SYM_VERSION, 0), 1)):
+                _attr = pyads.NotificationAttrib(_length, trans_mode=pyads.ADSTRANS_SERVERONCHA)
+                self.__state_ntf.append(self.__links[0].plc.add_device_notification(_index, _attr, _on_state_change))
+        except Exception as ex:
+            exptTrace(ex)
+            print_err(f'ADS ERROR: PLC state notifications are not available ({ex}). Symbol handles / info cache is disabled')
+            self.__cache_handles = False
+
+    # readVars symbol_names:list[str] -> dict[symbol_name, value]
+    # reads a list of symbols in one ADS round trip (ADS sum command). Data types are
+    # resolved from the PLC symbol table, BYTE arrays are converted to zero-terminated strings
+    # NOTE: the symbol info is resolved once per symbol (one request each) and cached by pyads per connection,
+    # so the first read of new symbols takes a round trip per symbol in addition
+    def readVars(self, symbol_names:list[str]) -> dict:
+        ret_val:dict = dict()
+        try:
+            if len(symbol_names) == 0:
+                return ret_val
+
+            _data:dict = self.__execute(lambda link: link.plc.read_list_by_name(list(symbol_names), ads_sub_commands=ADS_MAX_SUB_COMMANDS, \
+                                                                                        cache_symbol_info=self.__cache_handles and link.symbol_cache))
+            for _name, _val in _data.items():
+                if isinstance(_val, (list, tuple, bytes, bytearray)) and len(_val) > DEV_BYTE_STR_THRESHOLD:
+                    _val = bytes(_val)
+                    _zero = _val.find(0)
+                    _val = (_val[:_zero] if _zero >= 0 else _val).decode('latin-1')    # cut zero bytes
+                ret_val[_name] = _val
+
+            return ret_val
+
+        except Exception as ex:
+            print_err(f'ADS ERROR: Exception occurred while reading variables {symbol_names}. Exception: {ex}')
+            exptTrace(ex)
+            raise ex
+
+    # writeVars data:dict[symbol_name, value] -> bool
+    # writes all symbols in one ADS round trip (ADS sum command), plus the symbol info of new symbols (see readVars)
+    def writeVars(self, data:dict) -> bool:
+        try:
+            if len(data) == 0:
+                return True
+
+            _res:dict = self.__execute(lambda link: link.plc.write_list_by_name(dict(data), ads_sub_commands=ADS_MAX_SUB_COMMANDS, \
+                                                                                        cache_symbol_info=self.__cache_handles and link.symbol_cache))
+            _failed = {_name: _err for _name, _err in _res.items() if _err != 'no error'}
+            if len(_failed) > 0:
+                raise Exception(f'ADS ERROR: Sum write failed for {_failed}')
+
+            return True
+
+        except Exception as ex:
+            print_err(f'ADS ERROR: Exception occurred while writing variables {list(data.keys())}. Exception: {ex}')
+            exptTrace(ex)
+            raise ex
+
+    # getPoller -- returns the shared poller of the connection, creates it on first call
+    def getPoller(self, period:float | None = None) -> adsPoller:
+        if self.__poller is None:
+            self.__poller = adsPoller(self) if period is None else adsPoller(self, period=period)
+        elif period is not None:
+            self.__poller.period = period
+        return self.__poller
+
+    # addNotification symbol_name, callback(symbol_name, value) -> notification key
+    # registers ADS device notification (on change) for the symbol on the control connection. 
+    # The callback is called from the ADS router thread, therefore it should not issue ADS requests itself
+    def addNotification(self, symbol_name:str, callback, var_type:type | None = None, size:int | None = None) -> int:
+        try:
+            if not self.__links[0].connected:
+                raise Exception(f'ADS ERROR: PLC connection is not established')
+
+            if size is None:
+                _plc_type = pyads.PLCTYPE_INT if var_type is None else PLC_TYPE_MAP[var_type]
+                _length = ctypes.sizeof(_plc_type)
+            else:
+                _plc_type = pyads.PLCTYPE_STRING
+                _length = size
+
+            def _on_change(notification, data_name):
+                try:
+                    _handle, _timestamp, _value = self.__links[0].plc.parse_notification(notification, _plc_type)
+                    callback(symbol_name, _value)
+                except Exception as ex:
+                    exptTrace(ex)
+
+            _attr = pyads.NotificationAttrib(_length, trans_mode=pyads.ADSTRANS_SERVERONCHA)
+            with self.__reconnect_lock:
+                _handles = self.__links[0].plc.add_device_notification(symbol_name, _attr, _on_change)
+                self.__ntf_key += 1
+                self.__notifications[self.__ntf_key] = [symbol_name, _attr, _on_change, _handles]
+                _key = self.__ntf_key
+            print_DEBUG(f'ADS INFO: Notification {_key} added for {symbol_name}, handles = {_handles}')
+            return _key
+
+        except Exception as ex:
+            print_err(f'ADS ERROR: Exception occurred while adding notification for {symbol_name}. Exception: {ex}')
+            exptTrace(ex)
+            raise ex
+
+    def delNotification(self, key:int) -> bool:
+        try:
+            with self.__reconnect_lock:
+                _ntf = self.__notifications.pop(key, None)
+            if _ntf is None:
+                raise Exception(f'ADS ERROR: Unknown notification {key}')
+            if self.__links[0].connected:
+                self.__links[0].plc.del_device_notification(*_ntf[3])
+            print_DEBUG(f'ADS INFO: Notification {key} deleted for {_ntf[0]}')
+            return True
+
+        except Exception as ex:
+            print_err(f'ADS ERROR: Exception occurred while deleting notification {key}. Exception: {ex}')
+            exptTrace(ex)
+            return False
 
 ############################################ UNITEST SECTION #######################################
 
@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+__author__ = "Leonid Voldman"
+__copyright__ = "Copyright 2024"
+__credits__ = ["VoldmanTech"]
+__license__ = "SLA"
+__version__ = "1.0.0"
+__maintainer__ = "Leonid Voldman"
+__email__ = "vleonid@voldman.com"
+__status__ = "Tool"
+
+
+'''
+simADS - in-process simulated ADS backend (no TwinCAT PLC required)
+implements commADS interface (readVar/writeVar/readVars/writeVars/notifications/poller) over
+a symbol table modelling fbExternalAPI: DriverPool devices, fbExternalRunner runners and
+eState / eExecutionStatus transitions with configurable ADS request latency and task durations
+
+serials.yml (PLC section):
+PLC:
+    PLC_NAME:
+        SIMULATION:                         # use simulated ADS backend instead of REMOTE_IP/ADS_NETID
+            RUNNERS: 10                     # number of runners (const_MaxNumOfExecutor)
+            LATENCY: 0.002                  # ADS request round trip (sec)
+            TASK_TIME: 0.2                  # default device task duration (sec)
+            TASK_JITTER: 0.05               # random task duration deviation (sec)
+            ERROR_RATE: 0.0                 # probability of device task failure (0..1)
+            DEVICES:                        # simulated devices: name: task duration (sec) or empty for default
+                Coining Axis: 0.5
+                Dremel:
+'''
+
+import sys, time
+import threading
+import json, random, heapq
+from dataclasses import dataclass
+
+from bs1_utils import print_log, print_err, print_DEBUG, exptTrace
+from bs1_ads import symbolsADS, STATUS, EN_DeviceCoreState, adsPoller, adsPoolStats
+
+
+SIM_MAX_NUM_OF_DEVS = 64            # G_Constant.MaxNumOfDrivers
+SIM_DEFAULT_RUNNERS = 10
+SIM_DEFAULT_LATENCY = 0.002         # sec
+SIM_DEFAULT_TASK_TIME = 0.2         # sec
+SIM_DEFAULT_DEVICES = {'Sim Axis 1': None, 'Sim Axis 2': None}
+
+
+@dataclass
+class simStats:                         # simulated PLC counters
+    requests:int = 0                    # ADS requests served (sum request counted once)
+    symbols_read:int = 0
+    symbols_written:int = 0
+    runs:int = 0                        # runner _DoRun commands
+    tasks_done:int = 0
+    tasks_failed:int = 0
+    tasks_stopped:int = 0
+
+    def __str__(self) -> str:
+        return f'requests={self.requests}, symbols read/written = {self.symbols_read}/{self.symbols_written}, ' \
+               f'runs={self.runs}, tasks done/failed/stopped = {self.tasks_done}/{self.tasks_failed}/{self.tasks_stopped}'
+
+
+class simADS:
+    def __init__(self, devices:dict | list | None = None, runners:int = SIM_DEFAULT_RUNNERS, latency:float = SIM_DEFAULT_LATENCY, \
+                 task_time:float = SIM_DEFAULT_TASK_TIME, task_jitter:float = 0, error_rate:float = 0):
+        try:
+            if devices is None:
+                devices = SIM_DEFAULT_DEVICES
+            if isinstance(devices, (list, tuple)):
+                devices = {_name: None for _name in devices}
+            if len(devices) > SIM_MAX_NUM_OF_DEVS:
+                raise Exception(f'ADS SIM ERROR: Too many simulated devices ({len(devices)}), max = {SIM_MAX_NUM_OF_DEVS}')
+
+            self.__latency:float = float(latency)
+            self.__task_time:float = float(task_time)
+            self.__task_jitter:float = float(task_jitter)
+            self.__error_rate:float = float(error_rate)
+            self.__runners:int = int(runners)
+            self.__devices:list[str] = list(devices.keys())
+            self.__dev_time:dict = {_name: (float(_time) if _time is not None else None) for _name, _time in devices.items()}
+            self.__lock = threading.RLock()
+            self.__symbols:dict = dict()              # simulated PLC symbol table {symbol_name: value}
+            self.__notifications:dict = dict()        # {key: (symbol_name, callback)}
+            self.__watched:dict = dict()              # {symbol_name: set(keys)}
+            self.__pending:list = list()              # notifications to be fired out of the lock [(callback, symbol_name, value)]
+            self.__ntf_key:int = 0
+            self.__running:dict = dict()              # {runner: set(device index)} devices running on the runner
+            self.__stats:simStats = simStats()
+            self.__poller:adsPoller | None = None
+            self.__events:list = list()               # scheduled transitions heap [(due, seq, action)]
+            self.__event_seq:int = 0
+            self.__event_cond = threading.Condition(self.__lock)
+            self.__buildSymbols()
+
+            self.__sim_thread = threading.Thread(target=self.__simThread, daemon=True)
+            self.__sim_thread.start()
+            print_log(f'ADS SIM INFO: Simulated PLC is running with {len(self.__devices)} devices {self.__devices}, {self.__runners} runners, latency = {self.__latency*1000:.1f} ms, task time = {self.__task_time} sec')
+
+        except Exception as ex:
+            exptTrace(ex)
+            raise ex
+
+    # fromConfig -- creates simulated backend from serials.yml PLC SIMULATION section
+    @classmethod
+    def fromConfig(cls, conf:dict | None) -> simADS:
+        conf = conf if isinstance(conf, dict) else dict()
+        return cls(devices = conf.get('DEVICES', None), runners = conf.get('RUNNERS', SIM_DEFAULT_RUNNERS), \
+                   latency = conf.get('LATENCY', SIM_DEFAULT_LATENCY), task_time = conf.get('TASK_TIME', SIM_DEFAULT_TASK_TIME), \
+                   task_jitter = conf.get('TASK_JITTER', 0), error_rate = conf.get('ERROR_RATE', 0))
+
+    def __buildSymbols(self):
+        self.__symbols[symbolsADS._max_num_of_devs] = SIM_MAX_NUM_OF_DEVS
+        self.__symbols[symbolsADS._num_of_devices] = len(self.__devices)
+        self.__symbols[symbolsADS._max_number_of_runners] = self.__runners
+        for _indx, _name in enumerate(self.__devices, start=1):
+            _dev = f'{symbolsADS._device_access}[{_indx}]'
+            self.__symbols[f'{_dev}._instanceName'] = _name
+            self.__symbols[f'{_dev}._API'] = json.dumps({"DeviceType": "Simulated", "InstanceName": _name, "Tasks": []})
+            self.__symbols[f'{_dev}._instanceInfo'] = json.dumps({"Pos": 0.0, "Status": EN_DeviceCoreState.READY.name})
+            self.__symbols[f'{_dev}.eState'] = EN_DeviceCoreState.READY.value
+            self.__symbols[f'{_dev}._errorMessage'] = ''
+            for _cmd in ('_DoAck', '_DoStop'):
+                self.__symbols[f'{_dev}.{_cmd}'] = False
+        for _runner in range(1, self.__runners + 1):
+            _run = f'{symbolsADS._runner_array_str}[{_runner}]'
+            self.__symbols[f'{_run}.eExecutionStatus'] = STATUS.READY.value
+            self.__symbols[f'{_run}._errorMessage'] = ''
+            self.__symbols[f'{_run}.ExecutionInfo'] = ''
+            for _cmd in ('_DoLoadInfo', '_DoRun', '_DoAck'):
+                self.__symbols[f'{_run}.{_cmd}'] = False
+            self.__running[_runner] = set()
+
+    @property
+    def stats(self) -> simStats:
+        with self.__lock:
+            return simStats(**self.__stats.__dict__)
+
+    @property
+    def poolStats(self) -> adsPoolStats:
+        with self.__lock:
+            return adsPoolStats(size = 1, connected = 1, requests = self.__stats.requests)
+
+    ########################## commADS interface ##########################
+
+    def readVar(self, symbol_name:str, var_type:type | None = None, size:int | None  = None) -> str | int | bool | float | list | dict | None:
+        self.__request()
+        with self.__lock:
+            _val = self.__get(symbol_name)
+            self.__stats.symbols_read += 1
+        if size is not None:
+            return str(_val)
+        return var_type(_val) if var_type is not None else int(_val)
+
+    def writeVar(self, symbol_name:str, dataToSend:object | None = None) -> bool:
+        self.__request()
+        with self.__lock:
+            self.__write(symbol_name, dataToSend)
+            self.__stats.symbols_written += 1
+        self.__fire()
+        return True
+
+    def readVars(self, symbol_names:list[str]) -> dict:
+        if len(symbol_names) == 0:
+            return dict()
+        self.__request()
+        with self.__lock:
+            self.__stats.symbols_read += len(symbol_names)
+            return {_name: self.__get(_name) for _name in symbol_names}
+
+    def writeVars(self, data:dict) -> bool:
+        if len(data) == 0:
+            return True
+        self.__request()
+        with self.__lock:
+            for _name, _val in data.items():
+                self.__write(_name, _val)
+            self.__stats.symbols_written += len(data)
+        self.__fire()
+        return True
+
+    def invalidateHandles(self) -> None:
+        pass                                    # no symbol handles in simulation
+
+    def getPoller(self, period:float | None = None) -> adsPoller:
+        if self.__poller is None:
+            self.__poller = adsPoller(self) if period is None else adsPoller(self, period=period)
+        elif period is not None:
+            self.__poller.period = period
+        return self.__poller
+
+    # addNotification -- as in ADS, the current value is notified right after registration
+    def addNotification(self, symbol_name:str, callback, var_type:type | None = None, size:int | None = None) -> int:
+        with self.__lock:
+            _val = self.__get(symbol_name)
+            self.__ntf_key += 1
+            self.__notifications[self.__ntf_key] = (symbol_name, callback)
+            self.__watched.setdefault(symbol_name, set()).add(self.__ntf_key)
+            _key = self.__ntf_key
+        callback(symbol_name, _val)
+        return _key
+
+    def delNotification(self, key:int) -> bool:
+        with self.__lock:
+            _ntf = self.__notifications.pop(key, None)
+            if _ntf is None:
+                print_err(f'ADS SIM ERROR: Unknown notification {key}')
+                return False
+            self.__watched[_ntf[0]].discard(key)
+        return True
+
+    ########################## PLC model ##########################
+
+    def __request(self):
+        with self.__lock:
+            self.__stats.requests += 1
+        if self.__latency > 0:
+            time.sleep(self.__latency)          # ADS round trip (outside the lock, requests overlap)
+
+    def __get(self, symbol_name:str):
+        if symbol_name not in self.__symbols:
+            raise Exception(f'ADS SIM ERROR: Symbol {symbol_name} not found')
+        return self.__symbols[symbol_name]
+
+    # __set -- sets symbol value and queues change notifications (called with the lock acquired)
+    def __set(self, symbol_name:str, value):
+        if self.__symbols.get(symbol_name) == value:
+            return
+        self.__symbols[symbol_name] = value
+        for _key in self.__watched.get(symbol_name, ()):
+            self.__pending.append((self.__notifications[_key][1], symbol_name, value))
+
+    # __fire -- calls pending notification callbacks (ADS router thread in real PLC)
+    def __fire(self):
+        with self.__lock:
+            _pending, self.__pending = self.__pending, list()
+        for _callback, _name, _value in _pending:
+            try:
+                _callback(_name, _value)
+            except Exception as ex:
+                exptTrace(ex)
+
+    @staticmethod
+    def __parseIndex(symbol_name:str, prefix:str) -> tuple[int, str] | None:
+        if not symbol_name.startswith(prefix + '['):
+            return None
+        _indx, _, _member = symbol_name[len(prefix) + 1:].partition('].')
+        return int(_indx), _member
+
+    # __write -- writes symbol, runs fbExternalAPI commands (called with the lock acquired)
+    def __write(self, symbol_name:str, value):
+        self.__get(symbol_name)                 # symbol must exist
+        _runner = simADS.__parseIndex(symbol_name, symbolsADS._runner_array_str)
+        _device = simADS.__parseIndex(symbol_name, symbolsADS._device_access)
+        if value is True and _runner is not None and _runner[1].startswith('_Do'):
+            self.__runnerCmd(_runner[0], _runner[1])
+        elif value is True and _device is not None and _device[1].startswith('_Do'):
+            self.__deviceCmd(_device[0], _device[1])
+        else:
+            self.__set(symbol_name, value)
+
+    def __runnerCmd(self, runner:int, cmd:str):
+        _run = f'{symbolsADS._runner_array_str}[{runner}]'
+        if cmd == '_DoLoadInfo':
+            self.__set(f'{_run}._errorMessage', '')
+            try:
+                _devs = json.loads(self.__symbols[f'{_run}.ExecutionInfo'])['Devices']
+                for _dev in _devs:
+                    if _dev.get('InstanceName') not in self.__devices:
+                        raise Exception(f'unknown device {_dev.get("InstanceName")}')
+            except Exception as ex:
+                self.__set(f'{_run}._errorMessage', f'ExecutionInfo load failed: {ex}')
+
+        elif cmd == '_DoRun':
+            if self.__symbols[f'{_run}._errorMessage'] != '':
+                return
+            if self.__symbols[f'{_run}.eExecutionStatus'] == STATUS.BUSY.value:
+                self.__set(f'{_run}._errorMessage', f'Runner {runner} is busy')
+                return
+            self.__stats.runs += 1
+            _devs = json.loads(self.__symbols[f'{_run}.ExecutionInfo'])['Devices']
+            self.__set(f'{_run}.eExecutionStatus', STATUS.BUSY.value)
+            for _dev in _devs:
+                _indx = self.__devices.index(_dev['InstanceName']) + 1
+                self.__running[runner].add(_indx)
+                self.__setDevState(_indx, EN_DeviceCoreState.RUN)
+                self.__set(f'{symbolsADS._device_access}[{_indx}]._errorMessage', '')
+                _time = self.__dev_time[_dev['InstanceName']]
+                _time = (self.__task_time if _time is None else _time) + random.uniform(-self.__task_jitter, self.__task_jitter)
+                _failed = random.random() < self.__error_rate
+                self.__schedule(max(0, _time), lambda r=runner, d=_indx, f=_failed, t=_dev: self.__taskEnd(r, d, f, t))
+
+        elif cmd == '_DoAck':
+            self.__set(f'{_run}.eExecutionStatus', STATUS.READY.value)
+            self.__set(f'{_run}._errorMessage', '')
+
+    def __deviceCmd(self, indx:int, cmd:str):
+        if cmd == '_DoAck':
+            if self.__symbols[f'{symbolsADS._device_access}[{indx}].eState'] in (EN_DeviceCoreState.DONE.value, EN_DeviceCoreState.ERROR.value):
+                self.__setDevState(indx, EN_DeviceCoreState.READY)
+        elif cmd == '_DoStop':
+            for _runner, _devs in self.__running.items():
+                if indx in _devs:
+                    _devs.discard(indx)
+                    self.__stats.tasks_stopped += 1
+                    self.__setDevState(indx, EN_DeviceCoreState.READY)
+                    if len(_devs) == 0:             # stopped by external request
+                        self.__set(f'{symbolsADS._runner_array_str}[{_runner}].eExecutionStatus', STATUS.READY.value)
+
+    def __setDevState(self, indx:int, state:EN_DeviceCoreState, task:dict | None = None):
+        _dev = f'{symbolsADS._device_access}[{indx}]'
+        _info:dict = json.loads(self.__symbols[f'{_dev}._instanceInfo'])
+        _info['Status'] = state.name
+        if task is not None:
+            try:
+                _params = json.loads(task.get('TaskParams', '{}'))
+                if 'Pos' in _params:
+                    _info['Pos'] = float(_params['Pos'])
+                elif 'Dis' in _params:
+                    _info['Pos'] = float(_info.get('Pos', 0)) + float(_params['Dis'])
+            except Exception as ex:
+                print_DEBUG(f'ADS SIM INFO: TaskParams are not parsed ({ex})')
+        self.__set(f'{_dev}._instanceInfo', json.dumps(_info))
+        self.__set(f'{_dev}.eState', state.value)
+
+    def __taskEnd(self, runner:int, indx:int, failed:bool, task:dict):
+        if indx not in self.__running[runner]:  # stopped
+            return
+        self.__running[runner].discard(indx)
+        _run = f'{symbolsADS._runner_array_str}[{runner}]'
+        if failed:
+            self.__stats.tasks_failed += 1
+            self.__set(f'{symbolsADS._device_access}[{indx}]._errorMessage', f'Simulated failure of task {task.get("TaskName")}')
+            self.__setDevState(indx, EN_DeviceCoreState.ERROR)
+            self.__set(f'{_run}.eExecutionStatus', STATUS.ERROR.value)
+        else:
+            self.__stats.tasks_done += 1
+            self.__setDevState(indx, EN_DeviceCoreState.DONE, task)
+            if len(self.__running[runner]) == 0 and self.__symbols[f'{_run}.eExecutionStatus'] == STATUS.BUSY.value:
+                self.__set(f'{_run}.eExecutionStatus', STATUS.DONE.value)
+
+    def __schedule(self, delay:float, action):
+        self.__event_seq += 1
+        heapq.heappush(self.__events, (time.perf_counter() + delay, self.__event_seq, action))
+        self.__event_cond.notify()
+
+    # __simThread -- PLC cycle: runs scheduled state transitions when due
+    def __simThread(self):
+        while True:
+            with self.__event_cond:
+                while len(self.__events) == 0 or self.__events[0][0] > time.perf_counter():
+                    self.__event_cond.wait(None if len(self.__events) == 0 else self.__events[0][0] - time.perf_counter())
+                _due, _seq, _action = heapq.heappop(self.__events)
+                try:
+                    _action()
+                except Exception as ex:
+                    exptTrace(ex)
+            self.__fire()
+
+
+############################################ UNITEST SECTION #######################################
+# load test: python bs1_ads_sim.py [cycles] [devices] [POLL|NOTIFY|SHARED]
+# runs simulated script cycles (all devices in parallel on separate runners) and reports the overhead
+if __name__ == "__main__":
+    from bs1_plc_dev import PLCNode
+
+    _cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    _num_devs = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    _mode = sys.argv[3] if len(sys.argv) > 3 else 'SHARED'
+
+    _sim = simADS(devices = [f'Sim Axis {i+1}' for i in range(_num_devs)], runners = max(_num_devs, SIM_DEFAULT_RUNNERS), \
+                  latency = 0.001, task_time = 0)
+    PLCNode.setWatchMode(_mode, 0.01)
+    PLCNode.load_nodes(_sim)
+    _devs:list[PLCNode] = [PLCNode(dev_name=f'DEV_{i}', plc_dev_name=_name, _comADS=_sim) for i, _name in enumerate(PLCNode.nodesList)]
+
+    _start = time.perf_counter()
+    _failed = 0
+    for _cycle in range(_cycles):
+        _blocked:list[PLCNode] = list()
+        for _dev in _devs:
+            _res, _toBlock = _dev.operateDevice(json.dumps({"InstanceName": _dev._plcNodeName, "TaskName": "Move Relative", "TaskParams": "{\"Dis\":1}", "IsBreak": False}))
+            if _toBlock:
+                _blocked.append(_dev)
+            elif not _res:
+                _failed += 1
+        for _dev in _blocked:
+            if not _dev.devNotificationQ.get():
+                _failed += 1
+    _elapsed = time.perf_counter() - _start
+
+    print(f'[UNITEST] {_mode}: {_cycles} cycles x {_num_devs} devices in {_elapsed:.2f} sec, {_elapsed/_cycles*1000:.2f} ms per cycle, failed = {_failed}')
+    print(f'[UNITEST] PLC: {_sim.stats}')
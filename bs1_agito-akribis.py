@@ -20,7 +20,7 @@ from enum import Enum
 import socket
 import struct
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, unsigned_16, str2ip
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, unsigned_16, str2ip, notifyQueue
 
 
 class AACommRaw:
@@ -163,7 +163,7 @@ class Agito_Akribis (BaseMotor):
         self.el_current_on_the_fly:int = 0                  # On-the-fly current  -- for compatability only      
         self.__target_position = 0            
         self.__DevOpSPEED = DEFAULT_SPEED
-        self.devNotificationQ:Queue = Queue()
+        self.devNotificationQ:Queue = notifyQueue()
         self._title = None
         self.__timeout = DEFAULT_TIMEOUT
         try:
@@ -12,7 +12,153 @@ from zmq.devices import monitored_queue
 import time, sys
 
 from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32 
-import json
+import json, struct
+from threading import Lock
+
+# Status publishing (publishStatus):
+#   full mode  - full status {dev: {field: value}} every call (publishJsonMsg)
+#   delta mode - {"seq": N, "type": "snapshot" | "delta", "data": {dev: {field: value}}, "removed": [dev, ...]}
+#                delta contains changed fields only, nothing is sent when nothing changed,
+#                full snapshot is sent every SNAPSHOT_PERIOD sec. seq is incremented by every sent message,
+#                subscriber detects lost messages by seq gap and resyncs at the next snapshot (statusMirror)
+#
+# Status encoding:
+#   JSON - single frame str(json bytes) (publishJsonMsg), compatible with existing subscribers
+#   BIN  - multipart [topic, header, payload] (encodeStatus / decodeStatus):
+#          topic   b'STATUS' (subscribe by topic prefix)
+#          header  <BBBI: schema version, encoding (1 - BIN), message type (0 - full, 1 - snapshot, 2 - delta), seq
+#          payload <H record groups count, per group (devices with the same fields) fixed records:
+#                  <HBcH devices count, fields count, value type (q - int64, d - double), names length,
+#                  schema field ids (<B each), device names ('\0' separated utf-8), values (device major, single struct);
+#                  removed devices: <H names length, names ('\0' separated utf-8)
+#          The values of a group are int64 if all of them are int (bool as int), double otherwise (None as NaN)
+# params.yml:
+# STATUS_PUBLISHER:
+#     DELTA: False
+#     SNAPSHOT_PERIOD: 5
+#     ENCODING: JSON
+STATUS_SNAPSHOT_PERIOD = 5                  # full snapshot period in delta mode (sec)
+STATUS_ENCODINGS = ('JSON', 'BIN')
+STATUS_TOPIC = b'STATUS'
+STATUS_SCHEMA_VERSION = 2
+STATUS_FIELDS = ('encoder', )               # schema field ids (1, 2, ...), append only - the order is a part of the schema
+STATUS_MSG_TYPES = ('full', 'snapshot', 'delta')
+
+_STATUS_HEADER = struct.Struct('<BBBI')
+_STATUS_GROUP = struct.Struct('<HBcH')      # record group header: devices, fields, value type, names length
+_STATUS_COUNT = struct.Struct('<H')
+_STATUS_FIELD_IDS = {_name: _id + 1 for _id, _name in enumerate(STATUS_FIELDS)}
+_STATUS_NAN = float('nan')
+_STATUS_VALUE_FMT = {b'q': 'q', b'd': 'd'}  # value type -> struct format (int64 / double)
+_STATUS_VALUE_SIZE = 8
+_STATUS_FIELDS_LIMIT = 256                  # cached field sets (group fields <-> schema field ids bytes)
+_enc_fields:dict[tuple, bytes] = dict()
+_dec_fields:dict[bytes, tuple] = dict()
+
+def _packNames(names) -> bytes:
+    _b = '\0'.join(names).encode('utf-8')
+    if _b.count(0) != max(len(names) - 1, 0):
+        raise ValueError(f'Zero character in status device name: {list(names)}')
+    return _b
+
+def _unpackNames(buf:bytes, pos:int, length:int) -> list[str]:
+    return buf[pos:pos + length].decode('utf-8').split('\0') if length > 0 else list()
+
+# _packGroup -- fixed records of the devices with the same fields. The values (device major) are packed
+# by single struct call, int64 if all are int, double otherwise
+def _packGroup(devs, fields:tuple, values:list) -> bytes:
+    _ids = _enc_fields.get(fields)
+    if _ids is None:
+        try:
+            _ids = bytes([_STATUS_FIELD_IDS[_f] for _f in fields])
+        except KeyError as ex:
+            raise ValueError(f'Unknown status field {ex}. Schema fields: {STATUS_FIELDS}') from ex
+        if len(_enc_fields) < _STATUS_FIELDS_LIMIT:
+            _enc_fields[fields] = _ids
+    _names = _packNames(devs)
+    try:
+        _type, _values = b'q', struct.pack(f'<{len(values)}q', *values)
+    except struct.error:
+        try:
+            _type, _values = b'd', struct.pack(f'<{len(values)}d', *[_STATUS_NAN if _val is None else _val for _val in values])
+        except struct.error as ex:
+            raise ValueError(f'Unsupported status values of {list(devs)}: {ex}') from ex
+    return _STATUS_GROUP.pack(len(devs), len(_ids), _type, len(_names)) + _ids + _names + _values
+
+# _groupValues -- (fields, values) of the devices, the devices status {field: value} have the same fields
+def _groupValues(statuses) -> tuple[tuple, list]:
+    fields = tuple(next(iter(statuses)))
+    if len(fields) == 1:
+        _f = fields[0]
+        return fields, [_fields[_f] for _fields in statuses]
+    return fields, [_fields[_f] for _fields in statuses for _f in fields]
+
+# encodeStatus -- status message (full status dict / delta mode message) -> BIN frames
+def encodeStatus(msg:dict) -> list[bytes]:
+    if 'seq' in msg:
+        _type, _seq, _data, _removed = STATUS_MSG_TYPES.index(msg['type']), msg['seq'], msg['data'], msg.get('removed', list())
+    else:
+        _type, _seq, _data, _removed = 0, 0, msg, list()
+    _parts:list[bytes] = list()
+    if len(_data) > 0:
+        _statuses = _data.values()
+        _first = next(iter(_statuses)).keys()
+        if len(_data) == 1 or all(_fields.keys() == _first for _fields in _statuses):     # single group (the same fields)
+            _parts.append(_packGroup(_data, *_groupValues(_statuses)))
+        else:
+            _groups:dict[tuple, dict] = dict()
+            for _dev, _fields in _data.items():
+                _groups.setdefault(tuple(sorted(_fields)), dict())[_dev] = _fields
+            _parts.extend(_packGroup(_group, *_groupValues(_group.values())) for _group in _groups.values())
+    _removed_b = _packNames(_removed)
+    return [STATUS_TOPIC, _STATUS_HEADER.pack(STATUS_SCHEMA_VERSION, 1, _type, _seq), \
+            _STATUS_COUNT.pack(len(_parts)) + b''.join(_parts) + _STATUS_COUNT.pack(len(_removed_b)) + _removed_b]
+
+# decodeStatus -- received frames (BIN or JSON) -> status message, raises ValueError on unknown schema / format
+def decodeStatus(frames:list[bytes]) -> dict:
+    if len(frames) == 1:                                                # JSON
+        _txt = frames[0].decode('utf-8') if isinstance(frames[0], bytes) else frames[0]
+        return json.loads(_txt[2:-1] if _txt.startswith("b'") else _txt)      # publishJsonMsg str(bytes) wrapper
+    if len(frames) != 3 or not frames[0].startswith(STATUS_TOPIC):
+        raise ValueError(f'Wrong status message: {len(frames)} frames, topic {frames[0][:16]}')
+    _version, _encoding, _type, _seq = _STATUS_HEADER.unpack(frames[1])
+    if _version != STATUS_SCHEMA_VERSION or _encoding != 1:
+        raise ValueError(f'Unsupported status schema version {_version} / encoding {_encoding}')
+
+    buf = frames[2]
+    data:dict = dict()
+    (_count,), pos = _STATUS_COUNT.unpack_from(buf, 0), _STATUS_COUNT.size
+    for _ in range(_count):
+        _devs, _fcount, _vtype, _len = _STATUS_GROUP.unpack_from(buf, pos)
+        pos += _STATUS_GROUP.size
+        _ids = buf[pos:pos + _fcount]
+        _fields = _dec_fields.get(_ids)
+        if _fields is None:
+            if not all(0 < _id <= len(STATUS_FIELDS) for _id in _ids):
+                raise ValueError(f'Unknown status field id in {list(_ids)}')
+            _fields = tuple(STATUS_FIELDS[_id - 1] for _id in _ids)
+            if len(_dec_fields) < _STATUS_FIELDS_LIMIT:
+                _dec_fields[_ids] = _fields
+        _vfmt = _STATUS_VALUE_FMT.get(_vtype)
+        if _vfmt is None:
+            raise ValueError(f'Unknown status value type {_vtype}')
+        _names = _unpackNames(buf, pos + _fcount, _len)
+        pos += _fcount + _len
+        _values = struct.unpack_from(f'<{_devs * _fcount}{_vfmt}', buf, pos)
+        pos += _devs * _fcount * _STATUS_VALUE_SIZE
+        if _vtype == b'd':
+            _values = [_val if _val == _val else None for _val in _values]     # NaN -> None
+        if _fcount == 1:
+            _f = _fields[0]
+            data.update({_dev: {_f: _val} for _dev, _val in zip(_names, _values)})
+        else:
+            data.update({_dev: dict(zip(_fields, _values[_n * _fcount:(_n + 1) * _fcount])) for _n, _dev in enumerate(_names)})
+    (_len,), pos = _STATUS_COUNT.unpack_from(buf, pos), pos + _STATUS_COUNT.size
+    removed:list[str] = _unpackNames(buf, pos, _len)
+
+    if _type == 0:
+        return data
+    return {'seq': _seq, 'type': STATUS_MSG_TYPES[_type], 'data': data, 'removed': removed}
 
 class anim_0MQ:
     def __init__(self):
@@ -21,8 +167,31 @@ class anim_0MQ:
         self.ctx = zmq.Context.instance()
         self.url = None
         self.port = None
+        self.__delta:bool = False                       # delta status publishing
+        self.__snapshot_period:float = STATUS_SNAPSHOT_PERIOD
+        self.__seq:int = 0                              # last sent status message sequence number
+        self.__last_status:dict = dict()                # status state known to subscribers
+        self.__last_snapshot:float | None = None        # None - next status is a snapshot
+        self.__status_lock:Lock = Lock()
+        self.__encoding:str = 'JSON'
         
         pass
+
+    def configure(self, delta:bool = False, snapshot_period:float = STATUS_SNAPSHOT_PERIOD, encoding:str = 'JSON'):
+        if str(encoding).upper() not in STATUS_ENCODINGS:
+            print_err(f'-WARNING- Unknown status encoding {encoding}. Valid: {STATUS_ENCODINGS}. JSON is used')
+            encoding = 'JSON'
+        with self.__status_lock:
+            self.__delta = bool(delta)
+            self.__snapshot_period = snapshot_period if snapshot_period and snapshot_period > 0 else STATUS_SNAPSHOT_PERIOD
+            self.__last_snapshot = None                 # next status is a snapshot
+            self.__encoding = str(encoding).upper()
+        print_log(f'ZMQ status publishing: {f"delta, snapshot every {self.__snapshot_period} sec" if self.__delta else "full"}, ' \
+                  f'{self.__encoding} encoding')
+
+    @property
+    def seq(self) -> int:
+        return self.__seq
     
     def __del__ (self):
         pass
@@ -80,6 +249,24 @@ class anim_0MQ:
         
         print_log(f'Received msg from {self.url} - {msg}')
         return msg
+
+    # getStatusMsg -- received status message (JSON / BIN, see decodeStatus), None if no message
+    def getStatusMsg(self) -> dict | None:
+        if not self.subscriber:
+            print_log(f'Subscriber is not initiated')
+            return None
+        try:
+            return decodeStatus(self.subscriber.recv_multipart(flags = zmq.NOBLOCK))
+        except zmq.Again:
+            pass
+        except zmq.ZMQError as ex:
+            if ex.errno == zmq.ETERM:
+                print_log(f'Connection is terminated. URL = {self.url}. Exception = {ex}')
+            else:
+                exptTrace(ex)
+        except Exception as ex:
+            exptTrace(ex)
+        return None
     
     def publishMsg(self, data):
         try:
@@ -101,6 +288,103 @@ class anim_0MQ:
         except Exception as ex:
             exptTrace(ex)
 
+    # publishStatus -- device status {dev: {field: value}}, full or delta (see configure), returns sent message / None
+    def publishStatus(self, data:dict) -> dict | None:
+        if not self.__delta:
+            msg = data
+        else:
+            with self.__status_lock:
+                msg = self.statusDelta(data, time.perf_counter())
+        if msg is None:
+            return None
+
+        if self.__encoding == 'BIN':
+            try:
+                self.publisher.send_multipart(encodeStatus(msg), flags = zmq.NOBLOCK)
+            except Exception as ex:
+                exptTrace(ex)
+        else:
+            self.publishJsonMsg(msg)
+        return msg
+
+    # statusDelta -- next status message in delta mode, None if nothing changed
+    def statusDelta(self, data:dict, now:float) -> dict | None:
+        if self.__last_snapshot is None or now - self.__last_snapshot >= self.__snapshot_period:
+            self.__last_snapshot = now
+            _type, _changes, _removed = 'snapshot', {_dev: dict(_fields) for _dev, _fields in data.items()}, list()
+        else:
+            _type, _changes = 'delta', dict()
+            for _dev, _fields in data.items():
+                _last = self.__last_status.get(_dev, dict())
+                _diff = {_f: _val for _f, _val in _fields.items() if _f not in _last or _last[_f] != _val}
+                if len(_diff) > 0:
+                    _changes[_dev] = _diff
+            _removed = [_dev for _dev in self.__last_status if _dev not in data]
+            if len(_changes) == 0 and len(_removed) == 0:
+                return None
+
+        self.__last_status = {_dev: dict(_fields) for _dev, _fields in data.items()}
+        self.__seq += 1
+        return {'seq': self.__seq, 'type': _type, 'data': _changes, 'removed': _removed}
+
+
+# statusMirror -- subscriber side status state of delta publishing. Deltas after lost message (seq gap)
+# are dropped until the next snapshot
+class statusMirror:
+    def __init__(self):
+        self.status:dict = dict()
+        self.seq:int = 0                            # last applied message
+        self.synced:bool = False                    # False - waiting for snapshot
+        self.gaps:int = 0                           # lost messages detected
+
+    # apply -- applies status message (dict or JSON text), returns True if the status is in sync
+    def apply(self, msg:dict | str) -> bool:
+        if isinstance(msg, str):
+            msg = decodeStatus([msg])
+        if 'seq' not in msg:                                                    # full mode message
+            self.status = msg
+            self.synced = True
+            return True
+
+        if self.synced and msg['seq'] != self.seq + 1:
+            self.gaps += 1
+            self.synced = False
+            print_err(f'-WARNING- Status messages {self.seq + 1} - {msg["seq"] - 1} lost. Waiting for snapshot')
+        self.seq = msg['seq']
+
+        if msg['type'] == 'snapshot':
+            self.status = {_dev: dict(_fields) for _dev, _fields in msg['data'].items()}
+            self.synced = True
+        elif self.synced:
+            for _dev, _fields in msg['data'].items():
+                self.status.setdefault(_dev, dict()).update(_fields)
+            for _dev in msg.get('removed', list()):
+                self.status.pop(_dev, None)
+        return self.synced
+
+
+
+# statusBenchmark -- JSON vs BIN status encoding: bytes per message, encoded / decoded messages per second
+def statusBenchmark(devices:int, count:int = 5000) -> dict:
+    _status = {f'Z{_n}': {'encoder': 1000 * _n + 17} for _n in range(devices)}             # StatusMonitor payload
+    _delta = {'seq': 1, 'type': 'delta', 'data': {'Z1': {'encoder': 1017}}, 'removed': list()}
+    _codecs = {'JSON': (lambda _m: [str(json.dumps(_m).encode('utf-8')).encode('utf-8')], decodeStatus), \
+               'BIN': (encodeStatus, decodeStatus)}
+    res:dict = dict()
+    for _name, (_enc, _dec) in _codecs.items():
+        for _kind, _msg in (('full', _status), ('delta', _delta)):
+            _frames = _enc(_msg)
+            assert _dec(_frames) == _msg, f'{_name} round trip failed'
+            _t = time.perf_counter()
+            for _ in range(count):
+                _enc(_msg)
+            _enc_rate = count / (time.perf_counter() - _t)
+            _t = time.perf_counter()
+            for _ in range(count):
+                _dec(_frames)
+            _dec_rate = count / (time.perf_counter() - _t)
+            res[f'{_name} {_kind}'] = {'bytes': sum(len(_f) for _f in _frames), 'encode_msg_s': round(_enc_rate), 'decode_msg_s': round(_dec_rate)}
+    return res
 
 
 if __name__ == "__main__":
@@ -108,14 +392,20 @@ if __name__ == "__main__":
 
     if (len(sys.argv) != 3) or \
         (len(sys.argv[1]) != 1) or \
-        ((sys.argv[1][0].upper() != "S" ) and ((sys.argv[1][0].upper() != "P" ))) or \
+        ((sys.argv[1][0].upper() not in ("S", "P", "B"))) or \
         (not sys.argv[2].isdecimal()):
 
         print (f'Usage: python {sys.argv[0]} role port (where role is S for subscriber or P for publisher )')
+        print (f'       python {sys.argv[0]} B devices (status encoding benchmark)')
         sys.exit()
         
     port = sys.argv[2]
 
+    if sys.argv[1][0].upper() == "B":
+        for _case, _res in statusBenchmark(int(sys.argv[2])).items():
+            print(f'{_case:>12}: {_res["bytes"]:7} bytes/msg, encode {_res["encode_msg_s"]:8} msg/s, decode {_res["decode_msg_s"]:8} msg/s')
+        sys.exit()
+
     try:
         _Q = anim_0MQ()
         if sys.argv[1][0].upper() == "S":
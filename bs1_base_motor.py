@@ -34,7 +34,7 @@ import ast
 from bs2_DSL_cmd import DevType
 
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, num2binstr, set_parm, get_parm, void_f
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, num2binstr, set_parm, get_parm, void_f, notifyQueue
 from bs2_DSL_cmd import Command
 
 print_DEBUG = void_f
@@ -53,7 +53,7 @@ class BaseDev(ABC):
         self._devName:str = devName          # device name
         self._dev_lock:Lock = Lock()        # device lock for mutual exclusive access
         self._wd:threading.Thread | None = None        # watch dog thread identificator
-        self.devNotificationQ:Queue = Queue()   # notification queue for device events (uses for notification 
+        self.devNotificationQ:Queue = notifyQueue()   # notification queue for device events (uses for notification 
                                                 # the caller about operation completion in async mode)
 
     def __del__(self):
@@ -76,8 +76,14 @@ class BaseDev(ABC):
     # parsing the command into command name and parameters dictionary
     # all command in format DEV.OP, where DEV is device name, OP is operation
     # like 'PHG.UV param1:val1 param2=val2'
-    def parseCommand(self, command:str)-> Command:
-        _command =  Command.parse_cmd(command)
+    # parsed - command pre-parsed by the script plan compiler (CmdObj.parsed), no parsing at run time
+    def parseCommand(self, command:str | list, parsed:Command | None = None)-> Command:
+        if parsed is not None:
+            _command = parsed
+        else:
+            if isinstance(command, (list, tuple)):          # script command tokens (CmdObj.operation)
+                command = ' '.join(map(str, command))
+            _command =  Command.parse_cmd(command)
         if _command.device != self.devName:
             raise ValueError(f'Command device name { _command.device } does not match the device instance name { self.devName }')   
         return _command
@@ -32,7 +32,7 @@ DEFAULT_TIMEOUT_ERROR = 10
 from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, \
     assign_parm , assign_type_parm
 from bs1_base_motor import BaseDev
-from bs2_DSL_cmd import Command, devCmdCnfg, vType, pType
+from bs2_DSL_cmd import devCmdCnfg, vType, pType
 
 
 # camRes = namedtuple("camRes",  ["res", "dist", "repQ"])
@@ -566,7 +566,7 @@ class Cam_modbus(BaseDev):
                                                 # using: _command = kwards['window']
         try:               
             print_log(f'CAM ModBus operateDevice: command = {command}, kwards = {kwards}')
-            _cmd = Command(command)
+            _cmd = self.parseCommand(command, kwards.get('parsed'))
             if _cmd.device != self._devName:
                 raise Exception (f'({self._devName})CAM ModBus operateDevice: Wrong device name {_cmd.device} in command {command}')
             if _cmd.op =='TERM':
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+__author__ = "Leonid Voldman"
+__copyright__ = "Copyright 2024"
+__credits__ = ["VoldmanTech"]
+__license__ = "SLA"
+__version__ = "1.0.0"
+__maintainer__ = "Leonid Voldman"
+__email__ = "vleonid@voldman.com"
+__status__ = "Tool"
+
+
+'''
+dry run - script cycle time prediction with no hardware.
+The script tree is run in virtual time: each command takes its estimated duration, serial group - sum of its
+commands, parallel / simultaneous group - the longest one, steps one after another (or by device dependencies,
+pipelined run). The report (scriptProfiler report format) contains predicted cycle time, critical path of each step,
+device utilization and worst case cycle time (each command with timeout / retry policy fails by timeout on all
+attempts, see TASK_POLICY)
+
+Command duration estimate (the first found):
+    1. history - median of recorded runs of the same command (scriptProfiler traces: <PROFILER DIR>/*.trace.json)
+    2. SYS DELAY <sec> / SYS DELAY duration:<sec>
+    3. history - median of recorded commands of the device
+    4. params.yml DRY_RUN section: per device estimate (i.e. Z1: 0.8) / DEFAULT_DURATION
+
+params.yml:
+DRY_RUN:
+    DEFAULT_DURATION: 1.0           # command duration with no history (sec)
+    HISTORY: profile                # recorded traces directory (default PROFILER/DIR)
+
+usage: python bs1_dry_run.py <script.yml> [--params params.yml] [--history DIR] [--pipelined] [--json report.json] [--trace out.trace.json]
+'''
+
+import os, sys, re, json, glob, argparse, statistics
+import yaml
+
+from bs1_utils import print_log, print_inf, print_err, exptTrace
+from bs1_profiler import scriptProfiler, profSpan, PROFILER_DIR
+from bs1_proc_manager import POLICY_KEY, parsePolicy, commandPolicy, basePolicy, taskPolicy, POLICY_CMD_WORDS
+
+DRY_RUN_DEFAULT_DURATION = 1.0              # (sec)
+DRY_RUN_NO_OP_DEVS = ('NOP', 'CMNT')        # zero duration
+GROUP_KINDS = {'P': 'parallel', 'S': 'serial', 'M': 'simultaneous'}
+
+class durationModel:
+    def __init__(self, params:dict | None = None, history_dir:str | None = None):
+        self.__params:dict = params if isinstance(params, dict) else dict()
+        _section = self.__params.get('DRY_RUN')
+        self.__section:dict = _section if isinstance(_section, dict) else dict()
+        self.__default:float = float(self.__section.get('DEFAULT_DURATION', DRY_RUN_DEFAULT_DURATION))
+        self.__cmds:dict[str, list[float]] = dict()         # recorded durations by command text
+        self.__devs:dict[str, list[float]] = dict()         # recorded durations by device
+        self.sources:dict[str, int] = dict()                # estimates made by source
+
+        if history_dir is None:
+            _profiler = self.__params.get('PROFILER')
+            history_dir = self.__section.get('HISTORY', _profiler.get('DIR', PROFILER_DIR) if isinstance(_profiler, dict) else PROFILER_DIR)
+        self.loadHistory(history_dir)
+
+    @property
+    def params(self) -> dict:
+        return self.__params
+
+    # loadHistory -- recorded single command spans of scriptProfiler traces, returns number of spans
+    def loadHistory(self, history_dir:str) -> int:
+        _count = 0
+        for _file in sorted(glob.glob(os.path.join(history_dir, '*.trace.json'))):
+            try:
+                with open(_file) as _trace:
+                    _events = json.load(_trace).get('traceEvents', list())
+                for _event in _events:
+                    _args = _event.get('args', dict())
+                    if _event.get('cat') != 'single' or not _args.get('result', True):
+                        continue                        # failed commands are not counted
+                    _dur = float(_event.get('dur', 0)) / 1e6
+                    if _args.get('cmd'):
+                        self.__cmds.setdefault(_args['cmd'], list()).append(_dur)
+                    if _args.get('device'):
+                        self.__devs.setdefault(_args['device'], list()).append(_dur)
+                    _count += 1
+            except Exception as ex:
+                print_err(f'-WARNING- Wrong profiler trace {_file}: {ex}')
+        print_log(f'Dry run history: {_count} commands recorded ({len(self.__cmds)} distinct) at {history_dir}')
+        return _count
+
+    # estimate -- (duration, source) of script command DEV[.OP] args
+    def estimate(self, key:str, cmd:str) -> tuple[float, str]:
+        _dev = str(key).split('.')[0]
+        _delay = durationModel.delay(cmd) if _dev == 'SYS' else None
+        if _dev in DRY_RUN_NO_OP_DEVS:
+            _est = 0.0, 'no op'
+        elif cmd in self.__cmds:
+            _est = statistics.median(self.__cmds[cmd]), 'history'
+        elif _delay is not None:
+            _est = _delay, 'delay'
+        elif _dev in self.__devs:
+            _est = statistics.median(self.__devs[_dev]), 'device history'
+        elif _dev in self.__section:
+            _est = float(self.__section[_dev]), 'params'
+        else:
+            _est = self.__default, 'default'
+        self.sources[_est[1]] = self.sources.get(_est[1], 0) + 1
+        return _est
+
+    # delay -- (sec) of SYS[.]DELAY <sec> / SYS[.]DELAY duration:<sec> command, None if not a delay or not parsed
+    @staticmethod
+    def delay(cmd:str) -> float | None:
+        _words = re.sub(r'\s*:\s*', ':', cmd).split()
+        _words = [*_words[0].split('.', 1), *_words[1:]] if len(_words) > 0 else _words     # DEV.OP form
+        if len(_words) < 3 or _words[1] != 'DELAY':
+            return None
+        _name, _, _val = _words[2].rpartition(':')
+        if _name not in ('', 'duration'):
+            return None
+        try:
+            return float(_val)
+        except ValueError:
+            print_err(f'-WARNING- Wrong delay in command "{cmd}". The default estimate is used')
+            return None
+
+
+# dryRun - the script in virtual time. The spans are profSpan objects, so the report / trace are scriptProfiler ones
+class dryRun:
+    def __init__(self, model:durationModel):
+        self.__model:durationModel = model
+        self.__spans:list[profSpan] = list()
+        self.__worst:bool = False
+
+    def simulate(self, script:dict, pipelined:bool = False) -> dict:
+        from bs1_script import stepDependencies
+
+        deps = stepDependencies(script) if pipelined else [set(range(_step)) for _step in range(len(script))]
+        self.__model.sources.clear()
+        report = self.__cycle(script, deps)
+        _spans = self.__spans
+        _sources = dict(self.__model.sources)
+
+        self.__worst = True                         # the same with policy timeouts / retries
+        _worst = self.__cycle(script, deps)
+        self.__worst = False
+        self.__spans = _spans
+
+        _duration = report['duration_ms']
+        report['pipelined'] = pipelined
+        report['predicted_cycle_s'] = round(_duration / 1000, 3)
+        report['worst_cycle_s'] = round(_worst['duration_ms'] / 1000, 3)
+        report['utilization'] = {_dev: round(_stat['total_ms'] / _duration, 3) if _duration > 0 else 0 \
+                                 for _dev, _stat in report['devices'].items()}
+        report['critical_steps'] = self.__criticalSteps(report, deps)
+        report['sources'] = _sources
+        return report
+
+    @property
+    def spans(self) -> list[profSpan]:
+        return self.__spans
+
+    def __cycle(self, script:dict, deps:list[set[int]]) -> dict:
+        self.__spans = list()
+        _ends:list[float] = list()
+        for _step, (_key, _group) in enumerate(script.items()):
+            _start = max([_ends[_dep] for _dep in deps[_step]], default=0)
+            _ends.append(self.__node(_key, _group, _start, dict()).end)
+        if len(self.__spans) == 0:
+            return {'cycle': 0, 'duration_ms': 0, 'steps': list(), 'devices': dict(), 'groups': dict()}
+        return scriptProfiler.report(self.__spans, 0)
+
+    def __node(self, key:str, body, start:float, cmdWords:dict) -> profSpan:
+        _span = profSpan(id=len(self.__spans), name=str(key), kind='single', start=start, end=start)
+        self.__spans.append(_span)
+
+        if isinstance(body, dict):                  # group
+            _words = parsePolicy(body[POLICY_KEY]) if POLICY_KEY in body else dict()
+            cmdWords = {**cmdWords, **{_w: _val for _w, _val in _words.items() if _w in POLICY_CMD_WORDS or _w == 'BACKOFF'}}
+            _span.kind = GROUP_KINDS.get(str(key)[-1], 'parallel')
+            _end = start
+            _children:list[profSpan] = list()
+            for _key, _val in body.items():
+                if _key == POLICY_KEY:
+                    continue
+                _sub = self.__node(_key, _val, _end if _span.kind == 'serial' else start, cmdWords)
+                _children.append(_sub)
+                _end = _sub.end if _span.kind == 'serial' else max(_end, _sub.end)
+            _span.children = tuple(_sub.id for _sub in _children)
+            _policy = basePolicy(self.__model.params).update(_words) if len(_words) > 0 else taskPolicy()
+            _span.end = start + self.__worstCase(_end - start, _policy)
+        else:                                       # single command
+            _cmd = ' '.join([str(key), *str(body).split()])
+            _dev = str(key).split('.')[0]
+            _dur, _source = self.__model.estimate(key, _cmd)
+            _span.name, _span.device, _span.cmd = _dev, _dev, _cmd
+            _span.end = start + self.__worstCase(_dur, commandPolicy(self.__model.params, _dev, cmdWords))
+        return _span
+
+    def __worstCase(self, duration:float, policy:taskPolicy) -> float:
+        if not self.__worst or not policy.active:
+            return duration
+        _attempt = policy.timeout if policy.timeout > 0 else duration
+        return _attempt * (policy.retry + 1) + sum(policy.delay(_retry) for _retry in range(policy.retry))
+
+    @staticmethod
+    def __criticalSteps(report:dict, deps:list[set[int]]) -> list[str]:    # chain of steps that defines the cycle time
+        _steps = report['steps']
+        if len(_steps) != len(deps):
+            return list()
+        _end = lambda _s: _steps[_s]['step']['start_ms'] + _steps[_s]['step']['duration_ms']
+        chain:list[str] = list()
+        _step = max(range(len(_steps)), key=_end, default=None)
+        while _step is not None:
+            chain.insert(0, _steps[_step]['step']['name'])
+            _step = max(deps[_step], key=_end, default=None)
+        return chain
+
+
+def main(argv:list[str] | None = None) -> int:
+    from bs2_config import read_params
+    from bs1_script import scriptValidator, scriptParallelValidator
+
+    parser = argparse.ArgumentParser(description='Script dry run: predicted cycle time with no hardware')
+    parser.add_argument('script', help='script YAML file')
+    parser.add_argument('--params', default='params.yml', help='parameters (default params.yml)')
+    parser.add_argument('--history', default=None, help='recorded profiler traces directory (default params.yml DRY_RUN/HISTORY)')
+    parser.add_argument('--pipelined', action='store_true', help='pipelined steps (default params.yml SCRIPT/PIPELINED)')
+    parser.add_argument('--json', default=None, help='save report to file (default - print)')
+    parser.add_argument('--trace', default=None, help='save Chrome trace of the predicted cycle')
+    args = parser.parse_args(argv)
+
+    try:
+        params = read_params(args.params)
+        with open(args.script) as _file:
+            script = yaml.safe_load(_file)
+        scriptValidator(script)
+        scriptParallelValidator(script)
+    except Exception as ex:
+        exptTrace(ex)
+        print_err(f'-ERROR- Loading {args.script} failed: {ex}')
+        return 2
+
+    _script_parms = params.get('SCRIPT') if isinstance(params.get('SCRIPT'), dict) else dict()
+    sim = dryRun(durationModel(params, args.history))
+    report = sim.simulate(script, pipelined = args.pipelined or bool(_script_parms.get('PIPELINED', False)))
+
+    _out = json.dumps(report, indent=2)
+    if args.json:
+        with open(args.json, 'w') as _file:
+            _file.write(_out)
+    else:
+        print(_out)
+    if args.trace:
+        with open(args.trace, 'w') as _file:
+            json.dump(scriptProfiler.chromeTrace(sim.spans, 0), _file)
+
+    print_inf(f'{args.script}: predicted cycle {report["predicted_cycle_s"]} sec (worst case {report["worst_cycle_s"]} sec), ' \
+              f'critical steps: {" -> ".join(report["critical_steps"])}, estimates: {report["sources"]}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,7 +22,7 @@ from queue import Queue
 from typing import TYPE_CHECKING
 
 from bs1_base_motor import BaseMotor
-from bs2_DSL_cmd import DevType, Command, devCmdCnfg, vType, pType
+from bs2_DSL_cmd import DevType, devCmdCnfg, vType, pType
 
 from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm 
 
@@ -372,7 +372,7 @@ class FH_Motor(BaseMotor):
 
     def operateDevice(self, command, **kwards) -> tuple[bool, bool]:
         try:
-            _cmd = Command(command)
+            _cmd = self.parseCommand(command, kwards.get('parsed'))
             if _cmd.device != self.devName:
                 raise Exception(f'({self.devName}) Device missmatch: FAULHABER operateDevice received command {command} for device {_cmd.device}')
             if _cmd.op == 'HO':                 #  HO = home operation
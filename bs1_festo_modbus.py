@@ -29,7 +29,7 @@ import numpy as np
 
 
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, unsigned_16 
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, unsigned_16, notifyQueue 
 from bs1_base_motor import BaseMotor
 
 ''' 
@@ -299,7 +299,7 @@ class Festo_Motor (BaseMotor):
         self.target_position = 0            
         # self.__target_velocity = None
 
-        self.devNotificationQ:Queue = Queue()
+        self.devNotificationQ:Queue = notifyQueue()
         self._title = None
 
         try:
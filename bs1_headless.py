@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+__author__ = "Leonid Voldman"
+__copyright__ = "Copyright 2024"
+__credits__ = ["VoldmanTech"]
+__license__ = "SLA"
+__version__ = "1.0.0"
+__maintainer__ = "Leonid Voldman"
+__email__ = "vleonid@voldman.com"
+__status__ = "Tool"
+
+
+'''
+headless script runner - runs YAML script by ProcManager with no GUI window / GUI event loop.
+Steps are started as soon as previous step is reported done (or by device dependencies, pipelined run),
+the results are printed (or saved) as JSON. For headless cell PC or CI against simulated devices
+(serials.yml PLC SIMULATION section, see bs1_ads_sim.py)
+
+usage: python bs1_headless.py <script.yml> [-c CYCLES] [--serials serials.yml] [--params params.yml]
+                              [--start GROUP] [--pipelined] [--timeout SEC] [--run-timeout SEC] [--json results.json]
+exit code: 0 - all cycles done, 1 - step failed / timed out / interrupted, 2 - script / configuration error
+Devices operated by GUI (IO control / interlocks, CAM calibration) are not started
+'''
+
+import sys, time, json, argparse, logging
+from queue import Queue, Empty
+from dataclasses import dataclass, field, asdict
+
+from bs1_utils import print_log, print_inf, print_err, exptTrace, assign_parm
+from bs2_config import systemDevices
+import bs1_proc_manager as pm
+from bs1_script import read_script, stepDependencies
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_ERROR = 2
+
+ABORT_GRACE = 5.0                           # wait for the stopped steps reports after a timeout (sec)
+
+class runTimeout(Exception):                # step / run timeout passed while waiting for step reports
+    pass
+
+@dataclass
+class stepResult:
+    cycle:int
+    group:str                               # top level group key
+    result:bool
+    device:str | None = None                # failed device / reason
+    start:float = 0                         # from run start (sec)
+    duration:float = 0                      # (sec)
+
+@dataclass
+class runResult:
+    script:str
+    cycles:int                              # requested
+    completed:int = 0                       # completed cycles
+    result:bool = False
+    reason:str | None = None                # why not completed
+    error:bool = False                      # script / configuration error (not a step failure)
+    duration:float = 0                      # (sec)
+    cycle_times:list[float] = field(default_factory=list)
+    steps:list[stepResult] = field(default_factory=list)
+    stop:dict | None = None                 # emergency stop report (failure / interrupt)
+
+    def toDict(self) -> dict:
+        return asdict(self)
+
+
+class headlessRunner:
+    def __init__(self, sysDevs:systemDevices, params:dict | None = None, pipelined:bool = False, \
+                 step_timeout:float = 0, run_timeout:float = 0):
+        self.__sysDevs:systemDevices = sysDevs
+        self.__params:dict = params if params is not None else sysDevs.getParams()
+        self.__pipelined:bool = pipelined
+        self.__step_timeout:float = max(float(step_timeout), 0)    # 0 - no timeout
+        self.__run_timeout:float = max(float(run_timeout), 0)      # 0 - no timeout
+        self.__pm:pm.ProcManager = pm.ProcManager(window=None, params=self.__params)
+        self.__reportQ:Queue = Queue()                          # task completion (event2GUI: -TASK_DONE- / -TASK_ERROR-)
+        self.__running:dict[int, tuple[int, float]] = dict()    # running steps: task id -> (step index, start)
+        self.__keys:list[str] = list()                          # step (top level group) keys of the script run
+        self.__t0:float = time.perf_counter()
+
+    @property
+    def procManager(self) -> pm.ProcManager:
+        return self.__pm
+
+    # validate -- configuration errors of the run (unknown start group, step operates not active device), 
+    # checked before any device is operated. Returns the error or None
+    def validate(self, script:dict, plan:pm.scriptPlan | None, start:str | None = None) -> str | None:
+        keys:list[str] = list(script.keys())
+        if start is not None and start not in keys:
+            return f'Unknown start group {start}. Groups: {keys}'
+        for _key in keys:
+            if pm.BuildPlannedWorkingClass(plan, script[_key], self.__sysDevs, _key, True) is None:
+                return f'Step {_key} operates device that is not active'
+        return None
+
+    def run(self, script:dict, plan:pm.scriptPlan | None, cycles:int = 1, start:str | None = None, name:str = '') -> runResult:
+        res = runResult(script=name, cycles=cycles)
+        keys:list[str] = list(script.keys())
+        self.__keys = keys
+        if start is not None and start not in keys:
+            res.reason = f'Unknown start group {start}'
+            res.error = True
+            print_err(f'-ERROR- {res.reason}. Groups: {keys}')
+            return res
+
+        deps = stepDependencies(script) if self.__pipelined else [set(range(_step)) for _step in range(len(keys))]
+        first = keys.index(start) if start is not None else 0
+        print_log(f'Headless run of {name}: {cycles} cycles, {len(keys)} steps from {keys[first]}{" (pipelined)" if self.__pipelined else ""}')
+
+        self.__t0 = time.perf_counter()
+        cycle:int = 0
+        try:
+            for cycle in range(cycles):
+                _tc = time.perf_counter()
+                if not self.__runCycle(script, plan, deps, first if cycle == 0 else 0, cycle, res):
+                    break
+                res.completed += 1
+                res.cycle_times.append(round(time.perf_counter() - _tc, 4))
+                pm.scriptProfiler.newCycle()
+                print_inf(f'Cycle {cycle + 1}/{cycles} done in {res.cycle_times[-1]} sec')
+        except KeyboardInterrupt:
+            res.reason = 'Interrupted'
+            print_err('-WARNING- Interrupted. Stopping running steps')
+            self.__abort(res, cycle)
+        except runTimeout as ex:
+            res.reason = str(ex)
+            print_err(f'-ERROR- {res.reason}. Stopping running steps')
+            self.__abort(res, cycle, force = True)         # the timed out steps are not in the running list
+
+        res.result = res.completed == cycles
+        res.duration = round(time.perf_counter() - self.__t0, 4)
+        if res.completed < cycles:
+            pm.scriptProfiler.newCycle()                # partial cycle
+        return res
+
+    # single cycle of the script steps starting from step # first, False if failed
+    def __runCycle(self, script:dict, plan:pm.scriptPlan | None, deps:list[set[int]], first:int, cycle:int, res:runResult) -> bool:
+        keys = self.__keys
+        pending:list[int] = list(range(first, len(keys)))
+        done:set[int] = set(range(first))
+
+        while len(pending) > 0 or len(self.__running) > 0:
+            for _step in list(pending):
+                if not deps[_step] <= done:
+                    continue
+                wTask = pm.BuildPlannedWorkingClass(plan, script[keys[_step]], self.__sysDevs, keys[_step], True)
+                if wTask is None:
+                    res.reason = f'Step {keys[_step]} operates device that is not active'
+                    res.error = True
+                    print_err(f'-ERROR- {res.reason}')
+                    res.steps.append(stepResult(cycle=cycle, group=keys[_step], result=False, device='Not active device', \
+                                                start=self.__since(time.perf_counter())))
+                    self.__abort(res, cycle)
+                    return False
+                pending.remove(_step)
+                self.__running[wTask.id()] = (_step, time.perf_counter())
+                self.__pm.load_task(wTask, self.__reportQ)
+
+            _step, _result = self.__collect(cycle, res, self.__deadline())
+            if not _result:
+                res.reason = f'Step {keys[_step]} failed ({res.steps[-1].device})'
+                print_err(f'-ERROR- {res.reason}')
+                self.__abort(res, cycle)
+                return False
+            done.add(_step)
+
+        return True
+
+    # __deadline -- the earliest of the run and running steps timeouts (perf_counter), None - no timeout
+    def __deadline(self) -> float | None:
+        _ends:list[float] = list()
+        if self.__run_timeout > 0:
+            _ends.append(self.__t0 + self.__run_timeout)
+        if self.__step_timeout > 0 and len(self.__running) > 0:
+            _ends.append(min(_start for _, _start in self.__running.values()) + self.__step_timeout)
+        return min(_ends) if len(_ends) > 0 else None
+
+    # __collect -- waits for step completion up to the end time (perf_counter, None - no timeout), 
+    # raises runTimeout when passed. The steps running over the step timeout are recorded as failed
+    def __collect(self, cycle:int, res:runResult, end:float | None = None) -> tuple[int, bool]:
+        keys = self.__keys
+        while True:
+            try:
+                msg = self.__reportQ.get(timeout = None if end is None else max(end - time.perf_counter(), 0))
+            except Empty:
+                raise runTimeout(self.__timedOut(cycle, res))
+            if msg.value not in self.__running:
+                print_err(f'-WARNING- Unexpected report {msg}')
+                continue
+            _step, _start = self.__running.pop(msg.value)
+            _end = time.perf_counter()
+            _result = msg.event == '-TASK_DONE-'
+            res.steps.append(stepResult(cycle=cycle, group=keys[_step], result=_result, device=msg.device, \
+                                        start=self.__since(_start), duration=round(_end - _start, 4)))
+            print_log(f'Step {keys[_step]} (cycle {cycle}) {"done" if _result else "FAILED"} in {res.steps[-1].duration} sec')
+            return _step, _result
+
+    def __timedOut(self, cycle:int, res:runResult) -> str:     # records the steps over the step timeout, returns the reason
+        _now = time.perf_counter()
+        if self.__run_timeout > 0 and _now >= self.__t0 + self.__run_timeout:
+            return f'Run timeout ({self.__run_timeout} sec)'
+        _over:list[str] = list()
+        for _id, (_step, _start) in list(self.__running.items()):
+            if _now - _start < self.__step_timeout:
+                continue
+            del self.__running[_id]
+            _over.append(self.__keys[_step])
+            res.steps.append(stepResult(cycle=cycle, group=self.__keys[_step], result=False, device='Timeout', \
+                                        start=self.__since(_start), duration=round(_now - _start, 4)))
+        return f'Step {", ".join(_over)} timeout ({self.__step_timeout} sec)'
+
+    def __abort(self, res:runResult, cycle:int, force:bool = False):       # stops running steps and waits for their reports
+        if len(self.__running) == 0 and not force:
+            return
+        res.stop = asdict(self.__pm.EmergencyStop())
+        _timeout = self.__step_timeout > 0 or self.__run_timeout > 0
+        _end = time.perf_counter() + ABORT_GRACE if _timeout else None     # no endless wait for a hung device
+        try:
+            while len(self.__running) > 0:
+                self.__collect(cycle, res, _end)
+        except runTimeout:
+            for _step, _start in self.__running.values():
+                res.steps.append(stepResult(cycle=cycle, group=self.__keys[_step], result=False, device='No report', \
+                                            start=self.__since(_start), duration=round(time.perf_counter() - _start, 4)))
+            print_err(f'-WARNING- Steps {[self.__keys[_step] for _step, _ in self.__running.values()]} not reported in {ABORT_GRACE} sec after the stop')
+            self.__running.clear()
+        _stopping = pm.emergencyStop.join(ABORT_GRACE if _timeout else None)   # the stop threads are daemons, the run exits next
+        if len(_stopping) > 0:
+            print_err(f'-WARNING- Devices {_stopping} did not confirm the stop')
+
+    def __since(self, _t:float) -> float:
+        return round(_t - self.__t0, 4)
+
+
+def main(argv:list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Headless script runner')
+    parser.add_argument('script', help='script YAML file')
+    parser.add_argument('-c', '--cycles', type=int, default=1, help='number of cycles (default 1)')
+    parser.add_argument('--serials', default='serials.yml', help='devices configuration (default serials.yml)')
+    parser.add_argument('--params', default='params.yml', help='parameters (default params.yml)')
+    parser.add_argument('--start', default=None, help='start group of the first cycle (default - the first group)')
+    parser.add_argument('--pipelined', action='store_true', help='pipelined steps (default params.yml SCRIPT/PIPELINED)')
+    parser.add_argument('--timeout', type=float, default=0, help='step timeout, sec (default 0 - no timeout)')
+    parser.add_argument('--run-timeout', type=float, default=0, help='whole run timeout, sec (default 0 - no timeout)')
+    parser.add_argument('--json', default=None, help='save results to file (default - print)')
+    args = parser.parse_args(argv)
+
+    try:
+        sysDevs = systemDevices(args.serials, args.params)
+        script, plan = read_script(args.script, sysDevs)
+    except Exception as ex:
+        exptTrace(ex)
+        print_err(f'-ERROR- Loading {args.script} failed: {ex}')
+        return EXIT_ERROR
+
+    _params = sysDevs.getParams()
+    runner = headlessRunner(sysDevs, _params, pipelined = args.pipelined or bool(assign_parm('SCRIPT', _params, 'PIPELINED', False)), \
+                            step_timeout = args.timeout, run_timeout = args.run_timeout)
+    _error = runner.validate(script, plan, start = args.start)
+    if _error is not None:
+        print_err(f'-ERROR- {args.script}: {_error}')
+        return EXIT_ERROR
+    res = runner.run(script, plan, cycles = max(args.cycles, 1), start = args.start, name = args.script)
+
+    _out = json.dumps(res.toDict(), indent=2)
+    if args.json:
+        with open(args.json, 'w') as _file:
+            _file.write(_out)
+        print_inf(f'Results saved to {args.json}')
+    else:
+        print(_out)
+    print_inf(f'{args.script}: {res.completed}/{res.cycles} cycles in {res.duration} sec. {res.reason if res.reason else "OK"}')
+
+    if res.error:
+        return EXIT_ERROR
+    return EXIT_OK if res.result else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    _code = main()
+    logging.shutdown()
+    sys.exit(_code)
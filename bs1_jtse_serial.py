@@ -6,7 +6,7 @@ from queue import Queue
 import re, time
 
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, assign_parm
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, assign_parm, notifyQueue
 
 # _baudrate = 9600
 _baudrate = 19200
@@ -28,7 +28,7 @@ _cnt_re = re.compile(r'\s*(R|W|A|N)(SMN|MAT|MIT|MAF|MIF|MAE|MIE|SER|RSP)\s*(\s+\
 class JTSEcontrol:
     def __init__(self, _devName, _port:str):
         self.devName = _devName
-        self.devNotificationQ = Queue()                 # for compatability
+        self.devNotificationQ:Queue = notifyQueue()     # for compatability
         self.port = _port
         self.REFRESH_TIMEOUT = REFRESH_TIMEOUT
         self.ser = serial.Serial(port=self.port, baudrate = _baudrate, timeout = _timeout, parity=_parity, bytesize= _bytesize, stopbits=_stopbits)
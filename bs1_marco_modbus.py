@@ -26,7 +26,7 @@ MARCO_TIMEOUT = 10
 
 #password = 413222 / Service
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm 
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, notifyQueue 
 
 pulseDataFields = ["pulse_on", "cycle_rate", "pulse_count"]
 pulseData = namedtuple("pulseData",  pulseDataFields, defaults=[0,] * len(pulseDataFields))
@@ -117,7 +117,7 @@ class Marco_modbus:
         self.__prog:int = 0
         self.__single_shot_status:bool = False
         self.m_client = None
-        self.devNotificationQ:Queue = Queue()         # for compatability
+        self.devNotificationQ:Queue = notifyQueue()         # for compatability
 
         self.devName = d_name
         try:
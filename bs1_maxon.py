@@ -22,7 +22,7 @@ from dataclasses import dataclass
 from queue import Queue 
 
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, num2binstr, set_parm, get_parm, void_f, assign_parm
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, num2binstr, set_parm, get_parm, void_f, assign_parm, notifyQueue
 
 from typing import TYPE_CHECKING
 
@@ -272,7 +272,7 @@ class MAXON_Motor:
         self.devName = devName
         self.__title = None
         self.dev_lock = Lock()
-        self.devNotificationQ = Queue()
+        self.devNotificationQ:Queue = notifyQueue()
 
         try:
 
@@ -34,7 +34,7 @@ from enum import Enum
 from mecademic_error import mecademicErrorMsg
 
 from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, \
-                      get_parm, unsigned_16, assign_parm
+                      get_parm, unsigned_16, assign_parm, notifyQueue
 
 from typing import TYPE_CHECKING
 
@@ -63,7 +63,7 @@ class baseRobot(ABC):
         self._last_status_update_time = 0
         self._last_pos_update_time = 0
         self.dev_lock =  Lock()                 # device lock to avoid multiply access
-        self.devNotificationQ = Queue()
+        self.devNotificationQ:Queue = notifyQueue()
         self.type = self.robot.GetRobotInfo().model
         self.__3Dcoord:dict = None
         self.__3Doffset:dict = None
@@ -13,7 +13,7 @@ from collections import namedtuple
 from queue import Queue 
 
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, notifyQueue
 
 # first, allocate the hardware using the automatic hardware
 # allocation available to the instrument; this is safe when there
@@ -53,7 +53,7 @@ class NI6002:
             self.daq = NIDAQmxInstrument(serial_number = sn)
             print_log(f'Activating DAQ NI device {self.daq}')
             # self.daq = NIDAQmxInstrument(model_number='USB-6002')
-            self.devNotificationQ:Queue = Queue()         # for compatability 
+            self.devNotificationQ:Queue = notifyQueue()         # for compatability 
 
             self.set_parms(parms=parms)
             self.__allOFF()
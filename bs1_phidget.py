@@ -23,7 +23,7 @@ import threading
 
 TRIGGER_DELAY  = 0.5
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, toInt 
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, toInt, notifyQueue 
 
 
 class PhidgetRELAY:
@@ -129,7 +129,7 @@ class PhidgetRELAY:
             self.__chan = chan
             self.__trigger_delay:float = TRIGGER_DELAY
             self.__state = PhidgetRELAY.dev_state.close                    # close means OFF
-            self.devNotificationQ:Queue = Queue()                          # for compotabolity and future prolonged op
+            self.devNotificationQ:Queue = notifyQueue()                          # for compotabolity and future prolonged op
 
             self.__digitalOutput = DigitalOutput()
 
@@ -13,6 +13,8 @@ from threading import Lock
 import threading
 from queue import Queue 
 import time, json
+from enum import Enum
+from dataclasses import dataclass
 
 from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, \
                                         s32, num2binstr, set_parm, get_parm, void_f
@@ -24,27 +26,42 @@ DEV_API_SIZE = 4000  # bytes
 DEV_NAME_SIZE = 80  # chars
 DEV_INFO_SIZE = 1024  # bytes
 
+wdMode = Enum("wdMode", ["poll", "notify", "shared"])   
+                        # PLC node operation watch mode: polling thread per device / ADS notifications / shared ADS poller
+
+@dataclass
+class nodeSnapshot:             # PLC DriverPool entry as read at startup (bulk enumeration)
+    index:int                   # 1-based index in DriverPool
+    name:str
+    info:dict | None = None     # parsed _instanceInfo
+    api:dict | None = None      # parsed _API
+
+# runnerFactory - runners allocation and devices assignment to runners. 
+# attach / detach are serialized by the factory lock, so the runner is released exactly once 
+# by the last detached device even if many watch dogs complete simultaneously
 class runnerFactory:
     def __init__(self, num_runners:int):
         try:
             self._num_runners = num_runners
             self._runners_pool:Pool = Pool(size=num_runners)
             self.__runners_lst:list[list] = [ list() for _ in range(num_runners) ]   # list of lists to hold assigned devices for each runner
+            self.__lock:Lock = Lock()
         except Exception as ex:
             exptTrace(ex)
             raise ex
 
     def attachNodeToRunner(self, dev:BaseDev, indx:int | None = None)-> int:
         try:
-            if indx is None:
-                _run_indx = self._runners_pool.alloc()
-                if _run_indx is None:
-                    raise Exception(f'runnerFactory: No available runners to attach device {dev._devName}')
+            with self.__lock:
+                if indx is None:
+                    _run_indx = self._runners_pool.alloc()
+                    if _run_indx is None:
+                        raise Exception(f'runnerFactory: No available runners to attach device {dev._devName}')
 
-            else:
-                _run_indx = indx
+                else:
+                    _run_indx = indx
 
-            self.__runners_lst[_run_indx - 1].append(dev)   # -1 because pool returns 1-based index
+                self.__runners_lst[_run_indx - 1].append(dev)   # -1 because pool returns 1-based index
 
         except Exception as ex:
             exptTrace(ex)
@@ -52,17 +69,22 @@ class runnerFactory:
 
         return _run_indx
     
-    def detachNodeFromRunner(self, dev:BaseDev, indx:int)-> int:
+    # detachNodeFromRunner -- returns number of devices left on the runner. The runner is released when the last 
+    # device is detached, unless release=False (the caller acknowledges the runner first and calls releaseRunner)
+    def detachNodeFromRunner(self, dev:BaseDev, indx:int, release:bool = True)-> int:
         try:
-            if dev in self.__runners_lst[indx - 1]:   # -1 because pool returns 1-based index
-                self.__runners_lst[indx - 1].remove(dev)
-                _runners_left = len(self.__runners_lst[indx - 1])
-                print_log(f'runnerFactory: Device {dev._devName} detached from runner {indx}. Devices left on runner: {_runners_left}')
-                if _runners_left == 0:
-                    print_log(f'runnerFactory: No more devices attached to runner {indx}. Releasing runner.')
-                    self._runners_pool.release(indx)
-            else:
-                raise Exception(f'runnerFactory: Device {dev._devName} is not attached to runner {indx}')
+            with self.__lock:
+                if dev in self.__runners_lst[indx - 1]:   # -1 because pool returns 1-based index
+                    self.__runners_lst[indx - 1].remove(dev)
+                    _runners_left = len(self.__runners_lst[indx - 1])
+                    if _runners_left == 0 and release:
+                        self._runners_pool.release(indx)
+                else:
+                    raise Exception(f'runnerFactory: Device {dev._devName} is not attached to runner {indx}')
+
+            print_log(f'runnerFactory: Device {dev._devName} detached from runner {indx}. Devices left on runner: {_runners_left}')
+            if _runners_left == 0:
+                print_log(f'runnerFactory: No more devices attached to runner {indx}. {"Runner released" if release else "Runner to be released"}.')
 
         except Exception as ex:
             exptTrace(ex)
@@ -70,17 +92,34 @@ class runnerFactory:
 
         return _runners_left
     
+    def releaseRunner(self, indx:int) -> None:
+        with self.__lock:
+            if len(self.__runners_lst[indx - 1]) > 0:
+                raise Exception(f'runnerFactory: Runner {indx} can not be released, {len(self.__runners_lst[indx - 1])} devices are attached')
+            self._runners_pool.release(indx)
+
+    # runnerNodes -- snapshot of devices assigned to the runner (safe to iterate while devices detach)
+    def runnerNodes(self, indx:int)-> list:
+        with self.__lock:
+            return list(self.__runners_lst[indx - 1])
+
     @property
     def runnersLst(self)-> list[list]:
-        return self.__runners_lst    
+        with self.__lock:
+            return [ list(_devs) for _devs in self.__runners_lst ]
 
 class PLCNode(BaseDev):
     nodesList:list[str] | None = None
+    nodesSnapshot:dict[str, nodeSnapshot] = dict()      # {plc_dev_name: nodeSnapshot} filled by load_nodes
     __global_lock:Lock = Lock()
     __number_of_runners:int | None = None
     __runner_factory:runnerFactory | None = None
     __ads:commADS | None = None
     __instances:int = 0
+    watchMode:wdMode = wdMode.poll          # operation watch mode (polling is default)
+    pollPeriod:float | None = None          # shared poller cycle period (sec), None - poller default
+    __notifyQ:Queue | None = None           # ADS notifications queue (notify mode)
+    __dispatcher:threading.Thread | None = None   # notifications dispatcher thread (notify mode)
 
     def __init__(self, dev_name:str, plc_dev_name:str, _comADS:commADS | None = None):
         try:
@@ -88,11 +127,14 @@ class PLCNode(BaseDev):
             self._plcNodeName:str = plc_dev_name
             self.__devAPI:dict | None =   None
             self.__devINFO:dict | None =  None
+            self.__rawINFO:str | None = None          # last parsed raw _instanceInfo (JSON text)
             self._dev_info:dict | None = None
             self.__runnerNum:int | None = None        # runner number assigned to the device
             self.__wd_thread_stop_event = threading.Event()  # event to stop WD thread
             self.__lastCmd:str | None = None          # last command executed
             self.success_flag = False          # flag to indicate successful operation
+            self.__ntf_handles:list = list()     # active ADS notification handles (notify mode)
+            self.__ntf_values:dict = dict()      # last notified values (notify mode)
 
             self.__wd_thread_stop_event.set()    # initially stop the thread
             PLCNode.__instances += 1
@@ -102,7 +144,9 @@ class PLCNode(BaseDev):
             if PLCNode.nodesList is None:
                 PLCNode.enum_nodes(_comADS=_comADS)
 
-            self._dev_idx:int = PLCNode.lookUpDev(self._plcNodeName) + 1   # +1 because PLC array is 1-based index
+            _snapshot:nodeSnapshot | None = PLCNode.nodesSnapshot.get(self._plcNodeName, None)
+            self._dev_idx:int = _snapshot.index if _snapshot is not None else PLCNode.lookUpDev(self._plcNodeName) + 1   
+                                                                            # +1 because PLC array is 1-based index
 
             if PLCNode.__ads is None:
                 if _comADS is not None:
@@ -114,17 +158,22 @@ class PLCNode(BaseDev):
                 print_log(f'[device {self._devName}] PLCNode {self._plcNodeName} initialized with existing commADS instance')
 
                 
-                                                        # read device info and API from PLC
-            _tmpINFO = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}]._instanceInfo', var_type=str, size=DEV_INFO_SIZE)
-            _tmpAPI  = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}]._API', var_type=str, size=DEV_API_SIZE)
-            
-            print_log(f'[device {self._devName}] PLCNode {self._plcNodeName} read _instanceInfo and _API from PLC for device index = {self._dev_idx}: ')
-            
-            # print_DEBUG(f'[device {self._devName}] _instanceInfo = {_tmpINFO}')
-            # print_DEBUG(f'[device {self._devName}] _API = {_tmpAPI}') 
+            if _snapshot is not None:                   # device info and API preloaded by load_nodes
+                self.__devINFO = dict(_snapshot.info) if _snapshot.info is not None else None
+                self.__devAPI = _snapshot.api
+                print_log(f'[device {self._devName}] PLCNode {self._plcNodeName} _instanceInfo and _API are taken from startup snapshot for device index = {self._dev_idx}')
+            else:                                       # read device info and API from PLC
+                _tmpINFO = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}]._instanceInfo', var_type=str, size=DEV_INFO_SIZE)
+                _tmpAPI  = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}]._API', var_type=str, size=DEV_API_SIZE)
+                
+                print_log(f'[device {self._devName}] PLCNode {self._plcNodeName} read _instanceInfo and _API from PLC for device index = {self._dev_idx}: ')
+                
+                # print_DEBUG(f'[device {self._devName}] _instanceInfo = {_tmpINFO}')
+                # print_DEBUG(f'[device {self._devName}] _API = {_tmpAPI}') 
 
-            self.__devINFO = (json.loads(str(_tmpINFO)) if (_tmpINFO is not None and len(str(_tmpINFO)) > 0) else None) 
-            self.__devAPI = (json.loads(str(_tmpAPI)) if (_tmpAPI is not None and len(str(_tmpAPI)) > 0) else None)
+                self.__devINFO = (json.loads(str(_tmpINFO)) if (_tmpINFO is not None and len(str(_tmpINFO)) > 0) else None) 
+                self.__rawINFO = _tmpINFO
+                self.__devAPI = (json.loads(str(_tmpAPI)) if (_tmpAPI is not None and len(str(_tmpAPI)) > 0) else None)
 
             print_DEBUG(f'[device {self._devName}] {self._plcNodeName}: _instanceInfo = {json.dumps(self.__devINFO, indent=1)}')
             print_DEBUG(f'[device {self._devName}] {self._plcNodeName}: _API = {json.dumps(self.__devAPI, indent=1)}') 
@@ -194,6 +243,56 @@ class PLCNode(BaseDev):
 
         return cls.nodesList
 
+    '''
+    load_nodes method enumerates PLC devices and preloads their _instanceInfo/_API in one batched (sum) read
+    the result is kept in nodesSnapshot and used by PLCNode instances instead of per device reads
+    falls back to enum_nodes if the batched read fails
+    NOTE: the data is read by single sum request, but on cold start pyads resolves the symbol info of every 
+    symbol by its own request (3N+1 symbols), so the startup takes about 3N round trips (about 6N with per device 
+    reads by handle). The later reads of the same symbols take single round trip
+    '''
+    @classmethod
+    def load_nodes(cls, _comADS:commADS)-> dict[str, nodeSnapshot]:
+        cls.nodesSnapshot = dict()
+        try:
+            num_of_devs:int = _comADS.readVar(symbol_name=symbolsADS._num_of_devices, var_type=int)
+            print_log(f'PLCNode load_nodes: Number of configured devices in PLC = {num_of_devs}')
+
+            _symbols:list[str] = [symbolsADS._max_number_of_runners]
+            for i in range(num_of_devs):
+                _symbols += [f'{symbolsADS._device_access}[{i+1}]._instanceName', 
+                             f'{symbolsADS._device_access}[{i+1}]._instanceInfo',
+                             f'{symbolsADS._device_access}[{i+1}]._API']
+            _start = time.perf_counter()
+            _vals:dict = _comADS.readVars(_symbols)
+            print_log(f'PLCNode load_nodes: {len(_symbols)} symbols read in {(time.perf_counter() - _start)*1000:.1f} ms')
+
+            cls.nodesList = list()
+            for i in range(num_of_devs):
+                _name, _info, _api = (_vals[_sym] for _sym in _symbols[1 + i*3 : 4 + i*3])
+                _name = str(_name)
+                if _name.strip() == '':
+                    print_err(f'PLCNode load_nodes: Unexpected empty device name at index {i}')
+                    break
+                cls.nodesList.append(_name)
+                cls.nodesSnapshot[_name] = nodeSnapshot(index = i + 1, name = _name, \
+                                            info = json.loads(str(_info)) if _info else None, \
+                                            api = json.loads(str(_api)) if _api else None)
+                print_log(f'PLCNode load_nodes: Device index {i}, name = {_name}')
+
+            if cls.__number_of_runners is None:
+                cls.__number_of_runners = int(_vals[symbolsADS._max_number_of_runners])
+
+            print_log(f'PLCNode load_nodes: Total enumerated devices = {len(cls.nodesList)}: {cls.nodesList}, runners = {cls.__number_of_runners}')
+
+        except Exception as ex:
+            exptTrace(ex)
+            print_err(f'PLCNode load_nodes: Batched device enumeration failed ({ex}). Falling back to per device enumeration')
+            cls.nodesSnapshot = dict()
+            cls.enum_nodes(_comADS=_comADS)
+
+        return cls.nodesSnapshot
+
     @classmethod
     def lookUpDev(cls, dev_name:str) -> int:
         # Implementation to look up device index by name
@@ -213,15 +312,18 @@ class PLCNode(BaseDev):
     @classmethod
     def runNodesOp(cls, runner:int)-> tuple[bool, bool]:
         cmdLst:list = list()
+        _nodes:list = list()            # devices assigned to the runner (snapshot, watch dogs detach concurrently)
+        _watched:list = list()          # devices with started watch (complete and detach by themselves)
         try:
             if cls.__runner_factory is None:
                 raise Exception(f'PLCNode runNodesOp: Runner factory is not initialized')
             if runner < 1 or runner > cls.__number_of_runners:
                 raise Exception(f'PLCNode runNodesOp: Invalid runner number {runner}. Valid range is 1 to {cls.__number_of_runners}')
-            if len(cls.__runner_factory.runnersLst[runner-1]) == 0:
+            _nodes = cls.__runner_factory.runnerNodes(runner)
+            if len(_nodes) == 0:
                 raise Exception(f'PLCNode runNodesOp: No devices assigned to runner number {runner}')
             
-            for dev in cls.__runner_factory.runnersLst[runner-1]:    # Operate watch dog thread for each device assigned to the runner  
+            for dev in _nodes:    # Operate watch dog thread for each device assigned to the runner  
                 command:str = dev.lastCmd
                 if command is None:
                     raise Exception(f'PLCNode runNodesOp: No command loaded to device {dev._devName} for runner {runner}')
@@ -250,16 +352,19 @@ class PLCNode(BaseDev):
 
 
 
-            print_log(f'PLCNode runNodesOp: Starting runner operation for runner number {runner} with {len(cls.__runner_factory.runnersLst[runner-1])} devices assigned')
-            for dev in cls.__runner_factory.runnersLst[runner-1]:    # Operate watch dog thread for each device assigned to the runner  
-                print_log(f'PLCNode runNodesOp: Starting watch dog thread for device {dev._devName} on runner {runner}')
-                dev.runWDThread()
+            print_log(f'PLCNode runNodesOp: Starting runner operation for runner number {runner} with {len(_nodes)} devices assigned')
+            for dev in _nodes:    # Operate watch dog thread for each device assigned to the runner  
+                print_log(f'PLCNode runNodesOp: Starting watch ({cls.watchMode.name}) for device {dev._devName} on runner {runner}')
+                dev.runWatch()
+                _watched.append(dev)
             
         except Exception as ex:
             exptTrace(ex)
             print_log(f'PLCNode runNodesOp: Error occurred while starting runner {runner}. Stopping all devices from the runner.')
-            for dev in cls.__runner_factory.runnersLst[runner-1]:    # stop all devices assigned to the runner
+            for dev in _nodes:    # stop all devices assigned to the runner
                 try:                    # stop watch dog thread if running
+                    if dev._wd is None and not dev.__wd_thread_stop_event.is_set():    
+                        dev.stop()          # notification / shared poller watch is active, completion is reported by PLC
                     if dev._wd is not None and dev._wd.is_alive():  # if watch dog thread is running
                         dev.stop()              # stop watch dog thread
                         print_log(f'[device {dev._devName}] PLCNode runNodesOp: Waiting for watch dog thread to end...')
@@ -272,16 +377,41 @@ class PLCNode(BaseDev):
                     exptTrace(ex_detach)
                     print_err(f'[device {dev._devName}] PLCNode runNodesOp: Exception occurred while stopping watch dog thread. Exception: {ex_detach}')
 
+            cls.unloadNodes([dev for dev in _nodes if dev not in _watched], runner)    # devices without watch never complete
+
             return False, False
         
         return True, True
 
-    # loadNodeOp command: str -> (blocked:bool, result:bool, runner:int)
-    # blocked - True if the device is in async mode and notification should be awaited
-    # result - True if the command run was successful (in case of synchronous mode) or operation started successfully (in case of async mode)
+    # unloadNodes -- detaches loaded (not started) devices from the runner. The last detached device acknowledges 
+    # and releases the runner. Devices that are not attached to the runner (already detached) are skipped
+    @classmethod
+    def unloadNodes(cls, devs:list, runner:int | None) -> None:
+        if cls.__runner_factory is None or runner is None:
+            return
+        _attached = cls.__runner_factory.runnerNodes(runner)
+        for dev in devs:
+            if dev not in _attached:
+                continue
+            try:
+                dev.__lastCmd = None
+                if cls.__runner_factory.detachNodeFromRunner(dev, runner, release=False) == 0:
+                    try:
+                        cls.__ads.writeVar(symbol_name=f'{symbolsADS._runner_array_str}[{runner}]._DoAck', dataToSend = True)
+                    finally:
+                        cls.__runner_factory.releaseRunner(runner)
+            except Exception as ex_detach:
+                exptTrace(ex_detach)
+                print_err(f'[device {dev._devName}] PLCNode unloadNodes: Exception occurred while detaching device from runner {runner}. Exception: {ex_detach}')
+
+    # loadNodeOp command: str -> runner:int | None
+    # returns the runner the device is attached to, None if the command parsing failed (the device is not attached)
     
-    def loadNodeOp(self, command:str, runnerNum:int | None = None)-> int | None:
+    # parsed - ExecutionInfo pre-parsed by the script plan compiler (see compileCmd), no parsing at run time
+    def loadNodeOp(self, command:str | list, runnerNum:int | None = None, parsed:dict | None = None)-> int | None:
         try:
+            if isinstance(command, (list, tuple)):          # script command tokens (CmdObj.operation)
+                command = ' '.join(map(str, command))
             
             self._wd = None
             # if runnerNum is None:
@@ -290,10 +420,10 @@ class PLCNode(BaseDev):
             #         raise Exception(f'[device {self._devName}] PLCNode loadNodeOp: No available runners to load device command for command="{command}"')
             #     print_log(f'[device {self._devName}] PLCNode loadNodeOp: Allocated runner number {runnerNum} for command="{command}"') 
 
-            send_exData = self.__parseCMD(command)
+            send_exData = parsed if parsed is not None else self.__parseCMD(command)
             if send_exData is None:
                 print_err(f'[device {self._devName}] PLCNode loadNodeOp: command parsing failed for command="{command}"')
-                return runnerNum
+                return None
 
             self.__lastCmd = json.dumps(send_exData)
             print_log(f'[device {self._devName}] Adding ExecutionInfo = {self.__lastCmd} to PLC for command="{command}"  ')
@@ -310,6 +440,12 @@ class PLCNode(BaseDev):
         self.__runnerNum = runnerNum
         return runnerNum
     
+    # compileCmd -- parses the command once (script plan compiler), the result is passed back as parsed=
+    def compileCmd(self, command:str | list)-> dict | None:
+        if isinstance(command, (list, tuple)):
+            command = ' '.join(map(str, command))
+        return self.__parseCMD(command)
+
     def __parseCMD(self, cmd:str)-> dict | None:
         # BUGBUG: implement command parsing here
         if cmd is not None:
@@ -327,7 +463,7 @@ class PLCNode(BaseDev):
         toBlock:bool = True 
         opResult:bool = True
         try:
-            runnerNum:int = self.loadNodeOp(command=command)
+            runnerNum:int = self.loadNodeOp(command=command, parsed=kwargs.get('parsed'))
             print_log(f'[device {self._devName}] operateNode: Device command loaded at runner = {runnerNum} for command="{command}"')
             if runnerNum is None:
                 raise Exception(f'[device {self._devName}] operateNode: loadNodeOp failed for command="{command}"')
@@ -357,7 +493,199 @@ class PLCNode(BaseDev):
     
         return True
     
+    # runWatch -- starts operation monitoring according to the configured watch mode
+    def runWatch(self) -> bool:
+        if PLCNode.watchMode == wdMode.notify:
+            return self.runNotifyWatch()
+        elif PLCNode.watchMode == wdMode.shared:
+            return self.runSharedWatch()
+        return self.runWDThread()
+
+    @classmethod
+    def setWatchMode(cls, mode:wdMode | str | None, period:float | None = None) -> wdMode:
+        try:
+            if period is not None:
+                cls.pollPeriod = float(period)
+            if isinstance(mode, str):
+                mode = wdMode[mode.strip().lower()]
+            cls.watchMode = mode if mode is not None else wdMode.poll
+            print_log(f'PLCNode: Watch mode = {cls.watchMode.name}, poll period = {cls.pollPeriod}')
+        except Exception as ex:
+            exptTrace(ex)
+            print_err(f'PLCNode: Unknown watch mode = {mode}. Polling mode is used')
+            cls.watchMode = wdMode.poll
+        return cls.watchMode
+
+    # runNotifyWatch -- registers ADS notifications on runner/device state. No thread per device is created,
+    # the notifications are handled by single (shared) dispatcher thread
+    def runNotifyWatch(self) -> bool:
+        try:
+            if len(self.__ntf_handles) > 0:
+                raise Exception(f'[device {self._devName}] Notification watch is already active')
+            
+            PLCNode.__startDispatcher()
+            self.__ntf_values = dict()
+            self.__wd_thread_stop_event.clear()  # allow notifications processing
+            self.success_flag = True   # assume success unless error occurs
+            
+            _watch = [ ('exStatus', f'{symbolsADS._runner_array_str}[{self.__runnerNum}].eExecutionStatus', int, None), 
+                       ('devErr', f'{symbolsADS._device_access}[{self._dev_idx}]._errorMessage', str, 256),
+                       ('devState', f'{symbolsADS._device_access}[{self._dev_idx}].eState', int, None) ]
+                                            # devState is the last one, the initial notification triggers evaluation
+            for _key, _symbol, _type, _size in _watch:
+                _handles = PLCNode.__ads.addNotification(symbol_name=_symbol, var_type=_type, size=_size, \
+                                callback = lambda _sym, _val, _key=_key: PLCNode.__notifyQ.put((self, _key, _val)))
+                self.__ntf_handles.append(_handles)
+
+            print_log(f'[device {self._devName}] Notification watch is active for runner = {self.__runnerNum}')
+
+        except Exception as ex:
+            exptTrace(ex)
+            self.__cancelNotifyWatch()
+            raise ex
+
+        return True
+
+    # runSharedWatch -- subscribes the device to the shared poller of the ADS connection.
+    # The state of all active devices is read by the poller in one batched request per cycle
+    def runSharedWatch(self) -> bool:
+        try:
+            self.__wd_thread_stop_event.clear()  # allow poll processing
+            self.success_flag = True   # assume success unless error occurs
+            PLCNode.__ads.getPoller(PLCNode.pollPeriod).subscribe(key=self, symbols=list(self.__wdSymbols()), callback=self.__onPoll)
+            print_log(f'[device {self._devName}] Shared poller watch is active for runner = {self.__runnerNum}')
+        except Exception as ex:
+            exptTrace(ex)
+            self.__wd_thread_stop_event.set()
+            raise ex
+
+        return True
+
+    # __onPoll -- shared poller callback, returns True when operation is completed (unsubscribe)
+    def __onPoll(self, vals:dict | None) -> bool:
+        if self.__wd_thread_stop_event.is_set():       # operation already completed
+            return True
+        
+        try:
+            if vals is None:
+                raise Exception(f'[device {self._devName}] ADS ERROR: Shared poller read failed')
+            _sym_exStatus, _sym_runErr, _sym_devState, _sym_devInfo, _sym_devErr = self.__wdSymbols()
+            self.__updateINFO(vals[_sym_devInfo])
+            print_DEBUG(f'[device {self._devName}]  S:{vals[_sym_exStatus]} r:{self.__runnerNum}dev state:{vals[_sym_devState]} INFO={self.__devINFO}')
+            _res = self.__evalState(exStatus = vals[_sym_exStatus], devState = vals[_sym_devState], \
+                                    runErr = lambda: vals[_sym_runErr], devErr = lambda: vals[_sym_devErr])
+            if _res is None:            # still running
+                return False
+            self.success_flag = _res
+        except Exception as ex:
+            exptTrace(ex)
+            self.success_flag = False
+
+        self.__completeOp()
+        return True
+
+    # __wdSymbols -- ADS symbols used to watch the device operation: 
+    # (runner eExecutionStatus, runner _errorMessage, device eState, device _instanceInfo, device _errorMessage)
+    def __wdSymbols(self) -> tuple:
+        return (f'{symbolsADS._runner_array_str}[{self.__runnerNum}].eExecutionStatus', 
+                f'{symbolsADS._runner_array_str}[{self.__runnerNum}]._errorMessage',
+                f'{symbolsADS._device_access}[{self._dev_idx}].eState',
+                f'{symbolsADS._device_access}[{self._dev_idx}]._instanceInfo',
+                f'{symbolsADS._device_access}[{self._dev_idx}]._errorMessage')
+
+    def __cancelNotifyWatch(self):
+        for _handles in self.__ntf_handles:
+            PLCNode.__ads.delNotification(_handles)
+        self.__ntf_handles = list()
+
+    @classmethod
+    def __startDispatcher(cls):
+        with cls.__global_lock:
+            if cls.__dispatcher is None or not cls.__dispatcher.is_alive():
+                cls.__notifyQ = Queue()
+                cls.__dispatcher = threading.Thread(target = cls.__notifyDispatcherThread, daemon = True)
+                cls.__dispatcher.start()
+                print_log(f'PLCNode: Notification dispatcher thread started')
+
+    # __notifyDispatcherThread -- handles notifications queued by ADS callbacks for all devices
+    @classmethod
+    def __notifyDispatcherThread(cls):
+        while True:
+            dev, _key, _value = cls.__notifyQ.get()
+            if dev is None:             # termination request
+                break
+            try:
+                dev.__onNotification(_key, _value)
+            except Exception as ex:
+                exptTrace(ex)
+        print_log(f'PLCNode: Notification dispatcher thread ended')
+
+    def __onNotification(self, key:str, value):
+        if self.__wd_thread_stop_event.is_set():       # operation already completed
+            return
+        
+        self.__ntf_values[key] = value
+        print_DEBUG(f'[device {self._devName}] notification {key} = {value} r:{self.__runnerNum}')
+        if 'devState' not in self.__ntf_values or 'exStatus' not in self.__ntf_values:
+            return
+        
+        try:
+            _res = self.__evalState(exStatus = self.__ntf_values['exStatus'], devState = self.__ntf_values['devState'], \
+                                    runErr = lambda: '', devErr = lambda: self.__ntf_values.get('devErr', ''))
+            if _res is None:            # still running
+                return
+            self.success_flag = _res
+        except Exception as ex:
+            exptTrace(ex)
+            self.success_flag = False
+
+        self.__cancelNotifyWatch()
+        try:
+            _jsonINFO = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}]._instanceInfo', \
+                                                var_type=str, size=DEV_INFO_SIZE)
+            self.__updateINFO(_jsonINFO)
+        except Exception as ex:
+            exptTrace(ex)
+
+        self.__completeOp()
+
+    # __updateINFO -- parses _instanceInfo only if the raw JSON text is changed since the last update
+    def __updateINFO(self, jsonINFO:str | None):
+        if jsonINFO is not None and jsonINFO == self.__rawINFO:
+            return                          # unchanged, skip parsing
+        self.__rawINFO = jsonINFO
+        if self.__devINFO is not None:      # update device info
+            self.__devINFO |= (json.loads(jsonINFO) if jsonINFO else dict())
+        else:               # set device info   
+            self.__devINFO = (json.loads(jsonINFO) if jsonINFO else None)
+
+    # __evalState -- evaluates runner/device state. 
+    # returns None if operation is still running, otherwise operation result (True/False)
+    # runErr/devErr are callables returning error messages (read on demand)
+    def __evalState(self, exStatus:int, devState:int, runErr, devErr) -> bool | None:
+        if exStatus == STATUS.DONE.value:   # Completed
+            print_DEBUG(f'[device {self._devName}] at runner={self.__runnerNum} completed successfully')
+        elif exStatus == STATUS.READY.value:   # Completed
+            print_DEBUG(f'[device {self._devName}] at runner={self.__runnerNum} was stoped by external request')
+        elif exStatus == STATUS.ERROR.value:   # Error
+            print_DEBUG(f'[device {self._devName}] runner={self.__runnerNum} ended with ERROR: {runErr()}')
+        
+        if devState == EN_DeviceCoreState.ERROR.value:   #    Device in error state
+            print_err(f'[device {self._devName}] ERROR: Device entered ERROR state during runner={self.__runnerNum}. Error meassage = {devErr()}')
+            return False
+        elif devState == EN_DeviceCoreState.DONE.value:   #    Device in error state
+            print_log(f'[device {self._devName}] Device entered DONE state during runner={self.__runnerNum}')
+            PLCNode.__ads.writeVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}]._DoAck', dataToSend = True)
+            return True
+        elif devState == EN_DeviceCoreState.READY.value:   #    Device in error state
+            print_log(f'[device {self._devName}] Device entered READY state during runner={self.__runnerNum}.')
+            return True
+        elif devState != EN_DeviceCoreState.RUN.value:   #    Device in error state
+            _errorMsg:str = devErr()
+            print_err(f'[device {self._devName}] ERROR: Device in non RUN state = ({EN_DeviceCoreState(devState).name}) runner={self.__runnerNum}. {"Error="+_errorMsg if _errorMsg != "" else ""}')
+            return False
         
+        return None
 
     def _watch_dog_thread(self):
         
@@ -368,56 +696,23 @@ class PLCNode(BaseDev):
                 raise Exception(f'[device {self._devName}] ADS ERROR: PLC connection is not established in watch dog thread')
                 
             
+            _wd_symbols:list[str] = list(self.__wdSymbols())    # all watch dog symbols are read in one ADS sum request
+            _sym_exStatus, _sym_runErr, _sym_devState, _sym_devInfo, _sym_devErr = _wd_symbols
+
             while not self.__wd_thread_stop_event.is_set():  # main watch dog loop
-                exStatus:int = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._runner_array_str}[{self.__runnerNum}].eExecutionStatus', \
-                                                var_type=int)
-                devState:int = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}].eState', \
-                                                var_type=int)   
-                __jsonINFO = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}]._instanceInfo', \
-                                                var_type=str, size=1024)   
-                if self.__devINFO is not None:      # update device info
-                    self.__devINFO |= (json.loads(__jsonINFO) if __jsonINFO is not None else dict())
-                else:               # set device info   
-                    self.__devINFO = (json.loads(__jsonINFO) if __jsonINFO is not None else None)
+                _vals:dict = PLCNode.__ads.readVars(_wd_symbols)
+                exStatus:int = _vals[_sym_exStatus]
+                devState:int = _vals[_sym_devState]
+                self.__updateINFO(_vals[_sym_devInfo])
                 
                 # print_DEBUG(f'[device {self._devName}] ExecutionStatus = {STATUS(exStatus)} ({exStatus}) for runner = {self.__runnerNum}, DeviceState = {EN_DeviceCoreState(devState).name} ({devState})')
                 print_DEBUG(f'[device {self._devName}]  S:{exStatus} r:{self.__runnerNum}dev state:{devState} INFO={self.__devINFO}')
                 
-                if exStatus == STATUS.DONE.value:   # Completed
-                    print_DEBUG(f'[device {self._devName}] at runner={self.__runnerNum} completed successfully')
-                    # break
-                elif exStatus == STATUS.READY.value:   # Completed
-                    print_DEBUG(f'[device {self._devName}] at runner={self.__runnerNum} was stoped by external request')
-                    # break
-                elif exStatus == STATUS.ERROR.value:   # Error
-                    _errorMsg:str = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._runner_array_str}[{self.__runnerNum}]._errorMessage', \
-                                                        var_type=str, size=256)
-                    print_DEBUG(f'[device {self._devName}] runner={self.__runnerNum} ended with ERROR: {_errorMsg}')
-                    
-                    # break
-                
-                if devState == EN_DeviceCoreState.ERROR.value:   #    Device in error state
-                    _errorMsg:str = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}]._errorMessage', \
-                                                        var_type=str, size=256)
-
-                    print_err(f'[device {self._devName}] ERROR: Device entered ERROR state during runner={self.__runnerNum}. Error meassage = {_errorMsg}')
-                    self.success_flag = False
-                    break  
-                elif devState == EN_DeviceCoreState.DONE.value:   #    Device in error state
-                    print_log(f'[device {self._devName}] Device entered DONE state during runner={self.__runnerNum}')
-                    self.success_flag = True
-                    PLCNode.__ads.writeVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}]._DoAck', dataToSend = True)
-                    break  
-                elif devState == EN_DeviceCoreState.READY.value:   #    Device in error state
-                    print_log(f'[device {self._devName}] Device entered READY state during runner={self.__runnerNum}.')
-                    self.success_flag = True
-                    break 
-                elif devState != EN_DeviceCoreState.RUN.value:   #    Device in error state
-                    _errorMsg:str = PLCNode.__ads.readVar(symbol_name=f'{symbolsADS._device_access}[{self._dev_idx}]._errorMessage', \
-                                                        var_type=str, size=256)
-                    print_err(f'[device {self._devName}] ERROR: Device in non RUN state = ({EN_DeviceCoreState(devState).name}) runner={self.__runnerNum}. {"Error="+_errorMsg if _errorMsg != "" else ""}')
-                    self.success_flag = False
-                    break 
+                _res = self.__evalState(exStatus = exStatus, devState = devState, \
+                                        runErr = lambda: _vals[_sym_runErr], devErr = lambda: _vals[_sym_devErr])
+                if _res is not None:
+                    self.success_flag = _res
+                    break
                 
                 time.sleep(0.5)
                     
@@ -426,26 +721,37 @@ class PLCNode(BaseDev):
             exptTrace(ex)   
             self.success_flag = False
         
+        self.__completeOp()
+        self._wd = None
+
+        return
+
+    # __completeOp -- releases the runner and notifies the operation result (common for all watch modes)
+    def __completeOp(self):
         if self.__wd_thread_stop_event.is_set():        # the stop is applyed explicetly 
-            print_log (f'[device {self._devName}] Watch dog thread for devices on runner = {self.__runnerNum} is stopping...')
+            print_log (f'[device {self._devName}] Watch dog for devices on runner = {self.__runnerNum} is stopping...')
         else:
             self.__wd_thread_stop_event.set()    # set the stop event if exiting normally
 
-        _runners_left = PLCNode.__runner_factory.detachNodeFromRunner(self, self.__runnerNum)
-        if _runners_left == 0:          # last device on the runner
-            print_log (f'[device {self._devName}] Last device on runner = {self.__runnerNum} has completed operation.') 
-            PLCNode.__ads.writeVar(symbol_name=f'{symbolsADS._runner_array_str}[{self.__runnerNum}]._DoAck', dataToSend = True)
-                                        # acknowledge runner operation completion in PLC
+        try:
+            _runners_left = PLCNode.__runner_factory.detachNodeFromRunner(self, self.__runnerNum, release=False)
+            if _runners_left == 0:          # last device on the runner
+                print_log (f'[device {self._devName}] Last device on runner = {self.__runnerNum} has completed operation.') 
+                try:
+                    PLCNode.__ads.writeVar(symbol_name=f'{symbolsADS._runner_array_str}[{self.__runnerNum}]._DoAck', dataToSend = True)
+                                            # acknowledge runner operation completion in PLC
+                finally:                    # the runner is reused only after the acknowledge
+                    PLCNode.__runner_factory.releaseRunner(self.__runnerNum)
+        except Exception as ex:
+            exptTrace(ex)
+            self.success_flag = False
 
-        print_log (f'[device {self._devName}] Watch dog thread for devices on runner = {self.__runnerNum} has ended')
+        print_log (f'[device {self._devName}] Watch dog for devices on runner = {self.__runnerNum} has ended')
         print_log (f'[device {self._devName}] Info = {self.__devINFO}')
 
         # BUGBUG: clean up if last device in runner
         self.devNotificationQ.put(self.success_flag)
         self.__lastCmd = None
-        self._wd = None
-
-        return
     
     def stop(self) -> bool:
         try:
@@ -461,6 +767,24 @@ class PLCNode(BaseDev):
     def devQuery(self, query:str, timeout:float=0)-> str:
         return ''
 
+    # operateDevice -- single device operation on own runner (see operateNode)
+    # for simultaneous operation of several devices on one runner use loadNodeOp + runNodesOp
+    def operateDevice(self, command:str | list, **kwargs)-> tuple[bool, bool]:
+        if isinstance(command, (list, tuple)):          # script command tokens (CmdObj.operation)
+            command = ' '.join(map(str, command))
+        return self.operateNode(command, **kwargs)
+
+    def mDev_stop(self) -> bool:                    # for compatability (emergency stop)
+        try:
+            return self.stop()
+        except Exception as ex:
+            exptTrace(ex)
+            return False
+
+
+    @property
+    def devName(self)-> str:
+        return self._devName
 
     @property
     def devINFO(self)-> dict:
@@ -479,6 +803,60 @@ class PLCNode(BaseDev):
 
     ############  UNIT TEST  ##############
 if __name__ == "__main__":
+    # runners stress test: python bs1_plc_dev.py STRESS [threads] [steps] [runners]
+    # parallel steps of 1..3 devices attach to a runner and detach concurrently (as watch dogs do)
+    # checks that no runner is allocated twice, lost or released twice
+    if len(sys.argv) > 1 and sys.argv[1].upper() == 'STRESS':
+        import random
+        from types import SimpleNamespace
+        _threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+        _steps = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+        _num_runners = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+        _factory = runnerFactory(num_runners=_num_runners)
+        _busy:set = set()                   # runners in use
+        _busy_lock = Lock()
+        _errors:list = list()
+
+        def _detach(dev, runner:int):
+            if _factory.detachNodeFromRunner(dev, runner, release=False) == 0:
+                with _busy_lock:
+                    _busy.remove(runner)
+                _factory.releaseRunner(runner)
+
+        def _step_thread(thread_id:int):
+            for _step in range(_steps):
+                _devs = [SimpleNamespace(_devName=f'T{thread_id}_S{_step}_D{i}') for i in range(random.randint(1, 3))]
+                try:
+                    _runner = _factory.attachNodeToRunner(_devs[0])
+                except MemoryError:
+                    time.sleep(0)               # all runners are busy
+                    continue
+                with _busy_lock:
+                    if _runner in _busy:
+                        _errors.append(f'runner {_runner} allocated twice')
+                    _busy.add(_runner)
+                for _dev in _devs[1:]:
+                    _factory.attachNodeToRunner(_dev, indx=_runner)
+                _detachers = [threading.Thread(target=_detach, args=(_dev, _runner)) for _dev in _devs]
+                for _th in _detachers:
+                    _th.start()
+                for _th in _detachers:
+                    _th.join()
+
+        _start = time.perf_counter()
+        _workers = [threading.Thread(target=_step_thread, args=(i,)) for i in range(_threads)]
+        for _th in _workers:
+            _th.start()
+        for _th in _workers:
+            _th.join()
+        _elapsed = time.perf_counter() - _start
+
+        if _factory._runners_pool.available != _num_runners:
+            _errors.append(f'{_num_runners - _factory._runners_pool.available} runners lost')
+        print(f'[UNITEST] STRESS: {_threads} threads x {_steps} steps on {_num_runners} runners in {_elapsed:.2f} sec. '
+              f'{"PASSED" if len(_errors) == 0 else "FAILED: " + str(_errors[:10])}')
+        sys.exit(0 if len(_errors) == 0 else 1)
+
     # testData:dict = \
     #     {
     #         "Devices": [
@@ -9,19 +9,28 @@ __maintainer__ = "Leonid Voldman"
 __email__ = "vleonid@voldman.com"
 __status__ = "Prototype"
 
-import os, sys, time, re
+import os, sys, time, re, weakref
 import PySimpleGUI as sg
 
 from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, real_num_validator, \
-    int_num_validator, real_validator, int_validator, globalEventQ, smartLocker, clearQ, globalEventQ, event2GUI
+    int_num_validator, real_validator, int_validator, globalEventQ, smartLocker, clearQ, globalEventQ, event2GUI, assign_parm, \
+    notifyQueue
 
 from bs2_config import CDev, systemDevices
+from bs1_plc_dev import PLCNode
+from bs2_DSL_cmd import Command
+from bs1_profiler import scriptProfiler, profSpan, PROFILER_DIR
 
 from enum import Enum
-from queue import Queue 
-from threading import Thread, Lock, get_ident 
-from dataclasses import dataclass
+from queue import Queue, Empty
+from threading import Thread, Lock, Condition, Event, Timer, local, get_ident 
+from contextlib import contextmanager
+from concurrent import futures
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
 from collections import namedtuple
+from typing import Any
 
 # from playsound import playsound
 import sounddevice as sd
@@ -66,6 +75,8 @@ class CmdObj:
     device:CDev = None          # device to run command on
     cmd:OpType = None           # command to run, ie. OpType.go_to_dest
     args:argsType = None        # parameters for cms (position, time, etc)     
+    parsed:Any = None           # command pre-parsed by the script plan compiler (Command / PLC ExecutionInfo), 
+                                # passed to device as parsed=
 
     @property
     def operation(self):        # cmd text fore unparsed_cmd type
@@ -82,7 +93,7 @@ class CmdObj:
 class TaskObj:
     wTask:WorkingTask = None                # working task (CmdObj or WorkingTask)
     status:bool = False                     # True - in progress, False = not on progress
-    threadID:Thread = None                  # thread ID if in progress
+    threadID:Thread | execJob = None        # thread / executor job if in progress (THREAD engine)
     def __repr__(self) -> str:
         return self.wTask.__repr__()
 
@@ -91,13 +102,525 @@ taskResFields = ["wTaskID", "result", "device"]
 taskRes = namedtuple("taskRes",  taskResFields, defaults=[None,] * len(taskResFields))
 taskRes.__annotations__={'wTaskID':int,  'result':bool, 'device':str}         # specify type of elements
 
+EXECUTOR_MAX_WORKERS = 32                   # default bound of active worker threads (params.yml EXECUTOR/MAX_WORKERS)
+EXECUTOR_IDLE_TIMEOUT = 60                  # idle worker thread exits after (sec) (params.yml EXECUTOR/IDLE_TIMEOUT)
+
+@dataclass
+class executorStats:                        # task executor metrics
+    workers:int = 0                         # live worker threads
+    idle:int = 0                            # workers waiting for a job
+    blocked:int = 0                         # workers waiting for their sub tasks (not counted against the bound)
+    queue_depth:int = 0                     # jobs waiting for a worker
+    max_queue_depth:int = 0
+    submitted:int = 0
+    completed:int = 0
+    threads_started:int = 0                 # worker threads created so far
+    compensations:int = 0                   # workers started beyond the bound on behalf of blocked workers
+    wait_total:float = 0                    # submit to start time (sec)
+    wait_max:float = 0
+
+    @property
+    def wait_ave(self) -> float:
+        return self.wait_total / self.submitted if self.submitted > 0 else 0
+
+    def __str__(self) -> str:
+        return f'workers={self.workers} (idle={self.idle}, blocked={self.blocked}), queue depth={self.queue_depth} (max={self.max_queue_depth}), ' \
+               f'jobs submitted/completed = {self.submitted}/{self.completed}, threads started={self.threads_started}, compensations={self.compensations}, ' \
+               f'wait(ms) ave/max = {self.wait_ave*1000:.2f}/{self.wait_max*1000:.2f}'
+
+class execJob:                              # job submitted to taskExecutor, provides Thread-like join()/is_alive()/ident
+    def __init__(self, target, args:tuple):
+        self.__target = target
+        self.__args = args
+        self.__done:Event = Event()
+        self.submitted:float = time.perf_counter()
+        self.ident:int | None = None        # worker thread ident when started
+
+    def run(self):
+        self.ident = get_ident()
+        try:
+            self.__target(*self.__args)
+        except Exception as ex:
+            exptTrace(ex)
+        finally:
+            self.__done.set()
+
+    def join(self, timeout:float | None = None) -> bool:
+        return self.__done.wait(timeout)
+
+    def is_alive(self) -> bool:
+        return not self.__done.is_set()
+
+# taskExecutor - bounded set of reusable worker threads for WorkingTask / ProcManager jobs
+# The bound applies to active workers. A worker waiting for its own sub tasks (parallel group) declares 
+# itself blocked (see blocked()), so nested parallel/serial groups can't exhaust the pool and deadlock
+class taskExecutor:
+    def __init__(self, max_workers:int = EXECUTOR_MAX_WORKERS, idle_timeout:float = EXECUTOR_IDLE_TIMEOUT):
+        self.__max_workers:int = max(1, int(max_workers))
+        self.__idle_timeout:float = float(idle_timeout)
+        self.__jobs:deque[execJob] = deque()
+        self.__cond:Condition = Condition(Lock())
+        self.__local = local()              # marks executor worker threads
+        self.__stats:executorStats = executorStats()
+        print_log(f'Task executor created: max workers = {self.__max_workers}, idle timeout = {self.__idle_timeout} sec')
+
+    @property
+    def stats(self) -> executorStats:
+        with self.__cond:
+            self.__stats.queue_depth = len(self.__jobs)
+            return executorStats(**self.__stats.__dict__)
+
+    def submit(self, target, *args) -> execJob:
+        _job = execJob(target, args)
+        with self.__cond:
+            self.__jobs.append(_job)
+            self.__stats.submitted += 1
+            self.__stats.max_queue_depth = max(self.__stats.max_queue_depth, len(self.__jobs))
+            self.__spawn()
+            self.__cond.notify()
+        return _job
+
+    # blocked -- context of a worker waiting for jobs it has submitted 
+    @contextmanager
+    def blocked(self):
+        if not getattr(self.__local, 'worker', False):      # not an executor thread (e.g. GUI / test)
+            yield
+            return
+        with self.__cond:
+            self.__stats.blocked += 1
+            self.__spawn()
+        try:
+            yield
+        finally:
+            with self.__cond:
+                self.__stats.blocked -= 1
+
+    # __spawn -- starts a worker if queued jobs are not covered by idle workers and the bound allows (lock acquired)
+    def __spawn(self):
+        if len(self.__jobs) <= self.__stats.idle:
+            return
+        if self.__stats.workers - self.__stats.blocked >= self.__max_workers:
+            return                          # the job waits for a worker
+        if self.__stats.workers >= self.__max_workers:
+            self.__stats.compensations += 1
+        self.__stats.workers += 1
+        self.__stats.threads_started += 1
+        Thread(target=self.__worker, daemon=True).start()
+
+    def __worker(self):
+        self.__local.worker = True
+        while True:
+            with self.__cond:
+                self.__stats.idle += 1
+                while len(self.__jobs) == 0:
+                    if not self.__cond.wait(self.__idle_timeout) and len(self.__jobs) == 0:
+                        self.__stats.idle -= 1          # idle timeout, the worker exits
+                        self.__stats.workers -= 1
+                        return
+                self.__stats.idle -= 1
+                _job = self.__jobs.popleft()
+                _wait = time.perf_counter() - _job.submitted
+                self.__stats.wait_total += _wait
+                self.__stats.wait_max = max(self.__stats.wait_max, _wait)
+
+            _job.run()
+
+            with self.__cond:
+                self.__stats.completed += 1
+
+
+ENGINE_THREAD = 'THREAD'                    # WorkingTask tree run by executor threads (default)
+ENGINE_ASYNC = 'ASYNC'                      # WorkingTask tree run as coroutines on single event loop thread (params.yml EXECUTOR/ENGINE)
+ASYNC_POLL_MIN = 0.001                      # device completion poll period (devNotificationQ is not notifyQueue), initial (sec) (params.yml EXECUTOR/ASYNC_POLL_MIN)
+ASYNC_POLL_MAX = 0.02                       # device completion poll period (devNotificationQ is not notifyQueue), upper bound (sec) (params.yml EXECUTOR/ASYNC_POLL_MAX)
+
+@dataclass
+class asyncEngineStats:                     # async engine metrics
+    submitted:int = 0                       # WorkingTask trees submitted
+    completed:int = 0
+    cancelled:int = 0                       # trees cancelled by EmergencyStop
+    running:int = 0                         # trees running now
+    waiting:int = 0                         # device completions awaited now
+    max_waiting:int = 0
+    offloaded:int = 0                       # blocking calls (device command start) passed to the executor
+    polled:int = 0                          # device completions polled (devNotificationQ is not notifyQueue)
+
+    def __str__(self) -> str:
+        return f'trees submitted/completed/cancelled = {self.submitted}/{self.completed}/{self.cancelled}, running={self.running}, ' \
+               f'device waits = {self.waiting} (max={self.max_waiting}, polled={self.polled}), offloaded calls={self.offloaded}'
+
+class asyncJob:                             # WorkingTask tree submitted to asyncEngine, provides execJob-like join()/is_alive()
+    def __init__(self, wTask:WorkingTask):
+        self.wTask:WorkingTask = wTask
+        self.future:futures.Future | None = None      # result (taskRes) future of the tree coroutine
+        self.aTask:asyncio.Task | None = None           # the tree coroutine task (set on the loop thread)
+        self.cancelRequested:bool = False
+
+    def join(self, timeout:float | None = None) -> bool:
+        futures.wait([self.future], timeout)
+        return self.future.done()
+
+    def is_alive(self) -> bool:
+        return not self.future.done()
+
+    def result(self) -> taskRes:
+        return self.future.result()
+
+# asyncEngine - runs WorkingTask trees (see WorkingTask.arun) as coroutines on a single event loop thread
+# Device completions (devNotificationQ) are awaited on the loop, so hundreds of concurrent device operations 
+# do not hold a thread each. notifyQueue put wakes up the awaiting coroutine, the queues of other types are polled.
+# Blocking calls (device command start) are passed to the taskExecutor.
+# EmergencyStop cancels the tree: each awaiting leaf stops its device before the cancellation propagates up
+class asyncEngine:
+    def __init__(self, executor:taskExecutor, poll_min:float = ASYNC_POLL_MIN, poll_max:float = ASYNC_POLL_MAX):
+        self.__executor:taskExecutor = executor
+        self.__poll_min:float = float(poll_min)
+        self.__poll_max:float = max(float(poll_max), self.__poll_min)
+        self.__jobs:dict[int, asyncJob] = dict()         # running trees by WorkingTask id
+        self.__jLock:Lock = Lock()
+        self.__stats:asyncEngineStats = asyncEngineStats()
+        self.__loop:asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self.__thread:Thread = Thread(target=self.__loop_thread, daemon=True)
+        self.__thread.start()
+        print_log(f'Async engine started: poll period = {self.__poll_min}..{self.__poll_max} sec')
+
+    def __loop_thread(self):
+        asyncio.set_event_loop(self.__loop)
+        self.__loop.run_forever()
+
+    @property
+    def stats(self) -> asyncEngineStats:
+        with self.__jLock:
+            return asyncEngineStats(**self.__stats.__dict__)
+
+    def submit(self, wTask:WorkingTask, window:sg.Window = None, onDone = None) -> asyncJob:
+                                        # non blocking. onDone(taskRes) is called on the loop thread
+        _job = asyncJob(wTask)
+        with self.__jLock:
+            self.__jobs[wTask.id()] = _job
+            self.__stats.submitted += 1
+            self.__stats.running += 1
+        _job.future = asyncio.run_coroutine_threadsafe(self.__runJob(_job, window, onDone), self.__loop)
+        return _job
+
+    def run(self, wTask:WorkingTask, window:sg.Window = None) -> taskRes:      # blocking
+        return self.submit(wTask, window).result()
+
+    def cancel(self, wTaskID:int) -> bool:
+                                        # False if the tree isn't run by the engine
+        with self.__jLock:
+            _job = self.__jobs.get(wTaskID)
+        if _job is None:
+            return False
+        self.__loop.call_soon_threadsafe(self.__cancelJob, _job)
+        return True
+
+    def __cancelJob(self, job:asyncJob):
+        job.cancelRequested = True
+        if job.aTask is not None:
+            job.aTask.cancel()
+
+    async def __runJob(self, job:asyncJob, window:sg.Window, onDone) -> taskRes:
+        job.aTask = asyncio.current_task()
+        _cancelled = False
+        try:
+            if job.cancelRequested:         # stopped before started
+                raise asyncio.CancelledError()
+            tRes = await job.wTask.arun(window=window)
+        except asyncio.CancelledError:
+            print_log(f'Task {job.wTask.id()} cancelled (emergency stop)')
+            _cancelled = True
+            tRes = taskRes(wTaskID=job.wTask.id(), result=False, device='Emergency stop')
+        except Exception as ex:
+            exptTrace(ex)
+            tRes = taskRes(wTaskID=job.wTask.id(), result=False, device='System error')
+
+        with self.__jLock:
+            self.__jobs.pop(job.wTask.id(), None)
+            self.__stats.running -= 1
+            self.__stats.completed += 1
+            if _cancelled:
+                self.__stats.cancelled += 1
+
+        if onDone is not None:
+            try:
+                onDone(tRes)
+            except Exception as ex:
+                exptTrace(ex)
+        return tRes
+
+    # offload -- awaits blocking call target(*args) run by the executor
+    async def offload(self, target, *args):
+        _future = self.__loop.create_future()
+
+        def _set(res, ex):
+            if _future.done():              # cancelled meanwhile
+                return
+            if ex is not None:
+                _future.set_exception(ex)
+            else:
+                _future.set_result(res)
+
+        def _call():
+            try:
+                res = target(*args)
+            except Exception as ex:
+                self.__loop.call_soon_threadsafe(_set, None, ex)
+                return
+            self.__loop.call_soon_threadsafe(_set, res, None)
+
+        with self.__jLock:
+            self.__stats.offloaded += 1
+        self.__executor.submit(_call)
+        return await _future
+
+    # waitQ -- awaits device notification. notifyQueue put sets the loop future (no polling), 
+    # other thread queues (driver replaced devNotificationQ) are polled with growing period
+    async def waitQ(self, _Q:Queue):
+        with self.__jLock:
+            self.__stats.waiting += 1
+            self.__stats.max_waiting = max(self.__stats.max_waiting, self.__stats.waiting)
+            if not isinstance(_Q, notifyQueue):
+                self.__stats.polled += 1
+        try:
+            if isinstance(_Q, notifyQueue):
+                return await self.__awaitQ(_Q)
+            _poll = self.__poll_min
+            while True:
+                try:
+                    return _Q.get_nowait()
+                except Empty:
+                    pass
+                await asyncio.sleep(_poll)
+                _poll = min(_poll * 2, self.__poll_max)
+        finally:
+            with self.__jLock:
+                self.__stats.waiting -= 1
+
+    async def __awaitQ(self, _Q:notifyQueue):
+        def _set(future:asyncio.Future):
+            if not future.done():           # cancelled meanwhile
+                future.set_result(None)
+
+        while True:
+            try:
+                return _Q.get_nowait()
+            except Empty:
+                pass
+            _future = self.__loop.create_future()
+            _wake = lambda: self.__loop.call_soon_threadsafe(_set, _future)
+            _Q.addWaiter(_wake)
+            try:
+                try:
+                    return _Q.get_nowait()  # put between the check and the waiter registration
+                except Empty:
+                    pass
+                await _future
+            finally:
+                _Q.removeWaiter(_wake)
+
+
+ESTOP_DEADLINE = 1.0                        # device stop confirmation deadline (sec) (params.yml EMERGENCY_STOP/DEADLINE)
+
+@dataclass
+class stopAck:                              # stop command of single device in progress
+    device:str
+    done:Event = field(default_factory=Event)
+    result:bool = False                     # mDev_stop() result (valid when done)
+    confirmed:float = 0                     # perf_counter of the completion
+
+@dataclass
+class emergencyStopReport:
+    devices:list[str] = field(default_factory=list)         # devices the stop was sent to
+    unconfirmed:list[str] = field(default_factory=list)     # not confirmed within the deadline (still stopping)
+    failed:list[str] = field(default_factory=list)          # stop returned False / raised exception
+    latency:float = 0                       # fan out start to the last confirmation, or to the deadline (sec)
+
+    def __str__(self) -> str:
+        return f'{len(self.devices)} devices stopped in {self.latency*1000:.1f} ms, ' \
+               f'unconfirmed = {self.unconfirmed}, failed = {self.failed}'
+
+# emergencyStop - stop commands fan out: mDev_stop() of all devices are sent at once, each on its own thread, 
+# so a slow device (i.e. Modbus timeout) doesn't delay stopping others. The caller waits up to the deadline only.
+# Dedicated threads are used since the task executor may be busy with the script being stopped.
+# Repeated stop of a device still stopping (i.e. cancelled async leaf) joins the stop in progress
+class emergencyStop:
+    __deadline:float = ESTOP_DEADLINE
+    __lock:Lock = Lock()
+    __inflight:dict[int, stopAck] = dict()      # stops in progress by id(device)
+    __last:emergencyStopReport | None = None
+
+    @classmethod
+    def configure(cls, deadline:float = ESTOP_DEADLINE):
+        cls.__deadline = max(float(deadline), 0)
+        print_log(f'Emergency stop deadline = {cls.__deadline} sec')
+
+    @classmethod
+    def lastReport(cls) -> emergencyStopReport | None:
+        return cls.__last
+
+    # send -- starts stop of the device (non blocking)
+    @classmethod
+    def send(cls, devPtr) -> stopAck:
+        with cls.__lock:
+            _ack = cls.__inflight.get(id(devPtr))
+            if _ack is not None:
+                return _ack
+            _ack = stopAck(device=str(getattr(devPtr, 'devName', devPtr)))
+            cls.__inflight[id(devPtr)] = _ack
+        Thread(target=cls.__stopThread, args=(devPtr, _ack), daemon=True).start()
+        return _ack
+
+    # join -- waits for the stops in progress (no deadline if timeout is None), returns devices still stopping.
+    # The stop threads are daemons, so the application exit must join them
+    @classmethod
+    def join(cls, timeout:float | None = None) -> list[str]:
+        with cls.__lock:
+            _acks = list(cls.__inflight.values())
+        _end = None if timeout is None else time.perf_counter() + timeout
+        for _ack in _acks:
+            _ack.done.wait(None if _end is None else max(_end - time.perf_counter(), 0))
+        return [_ack.device for _ack in _acks if not _ack.done.is_set()]
+
+    @classmethod
+    def __stopThread(cls, devPtr, ack:stopAck):
+        try:
+            ack.result = devPtr.mDev_stop() is not False
+        except Exception as ex:
+            exptTrace(ex)
+            ack.result = False
+        ack.confirmed = time.perf_counter()
+        with cls.__lock:
+            cls.__inflight.pop(id(devPtr), None)
+        ack.done.set()
+
+    # fanOut -- stops the devices and waits for confirmations up to the deadline
+    @classmethod
+    def fanOut(cls, devs:list, deadline:float | None = None) -> emergencyStopReport:
+        _t0 = time.perf_counter()
+        _end = _t0 + (cls.__deadline if deadline is None else deadline)
+        _acks:dict[int, stopAck] = dict()
+        for devPtr in devs:
+            if devPtr is not None and id(devPtr) not in _acks:
+                _acks[id(devPtr)] = cls.send(devPtr)
+
+        for _ack in _acks.values():
+            _ack.done.wait(max(_end - time.perf_counter(), 0))
+
+        report = emergencyStopReport(devices=[_ack.device for _ack in _acks.values()])
+        report.unconfirmed = [_ack.device for _ack in _acks.values() if not _ack.done.is_set()]
+        report.failed = [_ack.device for _ack in _acks.values() if _ack.done.is_set() and not _ack.result]
+        if len(report.unconfirmed) > 0 or len(_acks) == 0:
+            report.latency = time.perf_counter() - _t0
+        else:
+            report.latency = max(max(_ack.confirmed for _ack in _acks.values()) - _t0, 0)
+        cls.__last = report
+
+        if len(report.unconfirmed) > 0 or len(report.failed) > 0:
+            print_err(f'-WARNING- Emergency stop: {report}')
+        else:
+            print_log(f'Emergency stop: {report}')
+        return report
+
+# EmergencyStopAll -- emergency stop of several task trees by single fan out
+def EmergencyStopAll(tasks:list[WorkingTask]) -> emergencyStopReport:
+    devs:list = list()
+    for wTask in tasks:
+        devs.extend(wTask.stopTargets())
+    return emergencyStop.fanOut(devs)
+
+
+# Timeout / retry policies
+# script group entry:  POLICY: TIMEOUT 30 RETRY 1 BACKOFF 0.5 CMD_TIMEOUT 10 CMD_RETRY 2
+#   TIMEOUT / RETRY - the group run (all its commands), on timeout the active devices of the group are stopped
+#   CMD_TIMEOUT / CMD_RETRY - each single command of the group and its sub groups (unless redefined there)
+#   BACKOFF - delay before the first retry (sec), doubled every next retry up to BACKOFF_MAX
+# params.yml TASK_POLICY section: defaults for single commands, per device overrides by device name
+# (i.e. Z1: TIMEOUT 20 RETRY 1). The script policy takes precedence.
+# Commands of simultaneous group run on single PLC runner, only the group policy applies
+POLICY_KEY = 'POLICY'                       # reserved script key
+POLICY_BACKOFF = 0.5                        # default retry backoff (sec)
+POLICY_BACKOFF_MAX = 10                     # retry backoff upper bound (sec)
+POLICY_POLL = 0.05                          # device completion wait is checked for stop / timeout every (sec)
+POLICY_GROUP_WORDS = ('TIMEOUT', 'RETRY', 'BACKOFF')
+POLICY_CMD_WORDS = ('CMD_TIMEOUT', 'CMD_RETRY')
+
+@dataclass(frozen=True)
+class taskPolicy:
+    timeout:float = 0                       # 0 - no timeout
+    retry:int = 0                           # re-runs after failure / timeout
+    backoff:float = POLICY_BACKOFF
+    backoff_max:float = POLICY_BACKOFF_MAX
+
+    @property
+    def active(self) -> bool:
+        return self.timeout > 0 or self.retry > 0
+
+    def delay(self, attempt:int) -> float:  # backoff before retry # attempt + 1
+        return min(self.backoff * (2 ** attempt), self.backoff_max)
+
+    def update(self, words:dict[str, float], prefix:str = '') -> taskPolicy:
+        return taskPolicy(timeout = words.get(prefix + 'TIMEOUT', self.timeout), \
+                          retry = int(words.get(prefix + 'RETRY', self.retry)), \
+                          backoff = words.get('BACKOFF', self.backoff), backoff_max = self.backoff_max)
+
+    def __str__(self) -> str:
+        return f'timeout={self.timeout if self.timeout > 0 else "none"}, retry={self.retry}, backoff={self.backoff}'
+
+# parsePolicy -- 'TIMEOUT 30 RETRY 1' -> {'TIMEOUT': 30.0, 'RETRY': 1.0}, raises ValueError on wrong format
+def parsePolicy(text:str) -> dict[str, float]:
+    _words = str(text).split()
+    if len(_words) == 0 or len(_words) % 2 != 0:
+        raise ValueError(f'Wrong policy format: "{text}". Expected: NAME value [NAME value ...]')
+    words:dict[str, float] = dict()
+    for _name, _val in zip(_words[::2], _words[1::2]):
+        _name = _name.upper()
+        if _name not in POLICY_GROUP_WORDS + POLICY_CMD_WORDS:
+            raise ValueError(f'Unknown policy {_name} in "{text}". Valid: {POLICY_GROUP_WORDS + POLICY_CMD_WORDS}')
+        words[_name] = float(_val)
+        if words[_name] < 0:
+            raise ValueError(f'Negative policy {_name} value in "{text}"')
+    return words
+
+def _policySection(params:dict | None) -> dict:
+    _section = params.get('TASK_POLICY') if isinstance(params, dict) else None
+    return _section if isinstance(_section, dict) else dict()
+
+# basePolicy -- no timeout / retry, backoff of params.yml TASK_POLICY
+def basePolicy(params:dict | None) -> taskPolicy:
+    _section = _policySection(params)
+    try:
+        return taskPolicy(backoff = float(_section.get('BACKOFF', POLICY_BACKOFF)), \
+                          backoff_max = float(_section.get('BACKOFF_MAX', POLICY_BACKOFF_MAX)))
+    except Exception as ex:
+        print_err(f'-WARNING- Wrong TASK_POLICY backoff in params.yml: {ex}')
+        return taskPolicy()
+
+# commandPolicy -- policy of single command: params.yml TASK_POLICY defaults < device override < script CMD_* words
+def commandPolicy(params:dict | None, devName:str, cmdWords:dict[str, float]) -> taskPolicy:
+    _section = _policySection(params)
+    _policy = basePolicy(params)
+    try:
+        _policy = _policy.update({'CMD_TIMEOUT': float(_section.get('CMD_TIMEOUT', 0) or 0), \
+                                  'CMD_RETRY': float(_section.get('CMD_RETRY', 0) or 0)}, 'CMD_')
+        if _section.get(devName):
+            _policy = _policy.update(parsePolicy(_section[devName]))
+    except Exception as ex:
+        print_err(f'-WARNING- Wrong TASK_POLICY in params.yml ({devName}): {ex}')
+    return _policy.update(cmdWords, 'CMD_')
+
 
 class WorkingTask:                                  # WorkingTask - self-recursive object structure where each object 
                                                     # is a single command or list of objects of WorkingTask type, that may be 
                                                     # operated in serial or paralel (simultaneously) manner
+    __executor:taskExecutor | None = None           # shared executor for parallel sub tasks (set by ProcManager)
+    __engine:asyncEngine | None = None              # async engine for arun() (set by ProcManager, ASYNC engine)
+
     def __init__(self, taskList: list[TaskObj] | CmdObj | None = None, 
-                sType: RunType = RunType.parallel, stepTask:bool = False):
+                sType: RunType = RunType.parallel, stepTask:bool = False, name:str | None = None, \
+                policy:taskPolicy | None = None):
         self.__sub_tasks: list[TaskObj | CmdObj] = list()      # list of objects of type TaskObj or CmdObj 
+        self.__sub_index: dict[int, TaskObj] = dict()          # sub tasks by WorkingTask id (completion report lookup)
                                                                # (at __sub_tasks[0]), if single command
         self.__task_type:RunType = sType                       # running sequence: parallel/serial
         self.__reportQ: Queue =  Queue()                        # Queue() object for termination notification 
@@ -105,6 +628,13 @@ class WorkingTask:                                  # WorkingTask - self-recursi
         self.__id = id(self)                                   # unique ID of the working task
         self.__stepTask:bool = stepTask                      # True - step task (i.e. STEP button pressed in GUI) 
                                                             # and wait for user confirmation to proceed to next step
+        self.__name:str | None = name                       # script group key (profiler)
+        self.__cmd_time:float = 0                           # last run: device command start time (single)
+        self.__wait:float = 0                               # last run: device completion wait time (single)
+        self.__policy:taskPolicy | None = policy if policy is not None and policy.active else None 
+                                                            # timeout / retry policy
+        self.__stop_event:Event = Event()                   # emergency stop (breaks retry backoff)
+        self.__timed_out:bool = False                       # the policy timeout expired on the last attempt
 
         if taskList == None:                    # empty task (i.e. no active dev)
             print_err(f'-WARNING- Empty task being loaded')
@@ -117,12 +647,14 @@ class WorkingTask:                                  # WorkingTask - self-recursi
 
 
 
-        elif (sType == RunType.parallel or sType == RunType.serial) and type(taskList) == list:
+        elif (sType == RunType.parallel or sType == RunType.serial or sType == RunType.simultaneous) and type(taskList) == list:
                                                 # list of commands to be run in paralel or serial manner
+                                                # or simultaneously (single PLC runner for all commands)
             self.__sub_tasks = [None] * len(taskList)
             for i, tsk in enumerate(taskList):
                 subTask = TaskObj(wTask=tsk, status=False)
                 self.__sub_tasks[i] = subTask
+                self.__sub_index[tsk.id()] = subTask
         else:
             print_err(f'ERROR task list initiation of {sType} run type')
 
@@ -153,6 +685,10 @@ class WorkingTask:                                  # WorkingTask - self-recursi
                 _type = '<serial>'
                 _tsk_repr = self.__sub_tasks
 
+            case RunType.simultaneous:
+                _type = '<simultaneous>'
+                _tsk_repr = self.__sub_tasks
+
             case RunType.single:
                 _type = '<single>'
                 _tsk_repr = self.singleTaskRepr()
@@ -181,6 +717,9 @@ class WorkingTask:                                  # WorkingTask - self-recursi
 
     def is_single(self):
         return (self.__task_type == RunType.single) or (self.__sub_tasks == None)
+
+    def singleCmd(self) -> CmdObj | None:          # command of single task
+        return self.__sub_tasks[0] if self.__task_type == RunType.single and len(self.__sub_tasks) > 0 else None
     
     def exploreDevs(self)-> list[CDev]:
         dList:list[CDev] = list()
@@ -194,49 +733,177 @@ class WorkingTask:                                  # WorkingTask - self-recursi
         return dList
 
   
-    def EmergencyStop(self):
+    def EmergencyStop(self) -> emergencyStopReport:
                                                         # This method is generaly accessible from another context (thread)
                                                         # but it  PURPOSELY is not protected by mutex to enable emergency op 
                                                         # at waiting state. Even operation completed the device will be stoped 
                                                         # twice
+                                                        # The stop is sent to all active devices at once (emergencyStop),
+                                                        # blocks up to the deadline
         print_log(f'EmergencyStop for task {self}')
+        return emergencyStop.fanOut(self.stopTargets())
+
+    # stopTargets -- marks the tree stopped and returns its active devices to be stopped
+    def stopTargets(self) -> list:
         self.__emergency_stop = True
+        self.__stop_event.set()
+        devs:list = list()
+
+        if WorkingTask.__engine is not None:
+            WorkingTask.__engine.cancel(self.__id)      # run by async engine, the cancellation stops awaiting 
         
         if self.__sub_tasks == None or len(self.__sub_tasks) == 0:                    # empty task. do nothing
             print_err(f'-WARNING- Empty task. Nothing to do with Emergency Stop. Exiting')
-            return
+            return devs
         
-        if self.__task_type == RunType.parallel:        # send stop to each dev
+        if self.__task_type == RunType.parallel or self.__task_type == RunType.simultaneous:        # send stop to each dev
             for working_tsk in self.__sub_tasks:
                 if working_tsk.status:
-                    working_tsk.wTask.EmergencyStop()
+                    devs.extend(working_tsk.wTask.stopTargets())
 
         elif self.__task_type == RunType.serial:
             for working_tsk in self.__sub_tasks:
                 if working_tsk.status:
-                    working_tsk.wTask.EmergencyStop()
+                    devs.extend(working_tsk.wTask.stopTargets())
                     break                               # no simultanious run in serial mode
             
         elif self.__task_type == RunType.single:
             devTmp =  self.__sub_tasks[0].device
             if devTmp:
-                devTmp.get_device().mDev_stop()
+                devs.append(devTmp.get_device())
             else:
                 print_err(f'-WARNING- null device - for {self.__sub_tasks[0]}')
+
+        return devs
                       
+    @classmethod
+    def setExecutor(cls, executor:taskExecutor):
+        cls.__executor = executor
+
+    @classmethod
+    def executor(cls) -> taskExecutor:
+        if cls.__executor is None:                  # no ProcManager (i.e. unit test), executor with default size
+            cls.__executor = taskExecutor()
+        return cls.__executor
+
+    @classmethod
+    def setEngine(cls, engine:asyncEngine):
+        cls.__engine = engine
+
+    @classmethod
+    def engine(cls) -> asyncEngine:
+        if cls.__engine is None:                    # no ProcManager (i.e. unit test), engine on default executor
+            cls.__engine = asyncEngine(cls.executor())
+        return cls.__engine
+
+    def __stopDevice(self, devPtr):                 # stop on cancellation (async engine), doesn't block the loop
+        print_log(f'Stopping device {devPtr.devName} (task {self.__id} cancelled)')
+        emergencyStop.send(devPtr)
+
+    def __profName(self) -> tuple[str, str | None]:         # (span name, device name)
+        if self.__task_type == RunType.single and len(self.__sub_tasks) > 0:
+            _cmd:CmdObj = self.__sub_tasks[0]
+            _dev = _cmd.device.get_device().devName if _cmd.device else None
+            return (_dev if _dev else f'{_cmd.cmd.name}'), _dev
+        return (self.__name if self.__name else f'<{self.__task_type.name}>'), None
+
+    def __profCmd(self) -> str | None:                     # script command text of single task: DEV[.OP] args
+        if self.__task_type != RunType.single or len(self.__sub_tasks) == 0 or self.__name is None:
+            return None
+        _cmd:CmdObj = self.__sub_tasks[0]
+        _ops = _cmd.args.cmd_txt if _cmd.args is not None else None
+        return ' '.join([str(self.__name), *(str(_ops).split() if isinstance(_ops, str) else map(str, _ops or []))])
+
+    def __profBegin(self) -> profSpan | None:
+        if not scriptProfiler.enabled():
+            return None
+        _name, _dev = self.__profName()
+        return scriptProfiler.begin(self.__id, _name, self.__task_type.name, tuple(self.__sub_index.keys()), _dev, self.__profCmd())
+
+    def __profLoaded(self, loaded:list[TaskObj]) -> dict[int, profSpan]:      # spans of simultaneous group devices
+        if not scriptProfiler.enabled():
+            return dict()
+        return {working_tsk.wTask.id(): working_tsk.wTask.__profBegin() for working_tsk in loaded}
+
     def __parallelProcessingThread(self, wTask:WorkingTask, __reportQ:Queue, window:sg.Window):
-        opResult = wTask.run(window=window)
+        try:
+            if self.__emergency_stop:               # the job was queued by the executor when stopped
+                opResult = taskRes(result=False, device='Emergency stop')
+            else:
+                opResult = wTask.run(window=window)
+        except Exception as ex:                     # the parent waits for the report anyway
+            exptTrace(ex)
+            opResult = taskRes(result=False, device='System error')
         __reportQ.put(taskRes(wTaskID=wTask.id(), result=opResult.result, device= opResult.device))
         
-    def __resolveTaskIndex(self, wTaskID:int) -> int:
-        for index, working_tsk in enumerate(self.__sub_tasks):   
-            if wTaskID == working_tsk.wTask.id():
-                return index
-        print_err(f'Cant resolve taskID {wTaskID} in tasks list. size =  {len(self.__sub_tasks)}, Tasks:')
-        print_err(f'{self.__sub_tasks}')
-        return -1
+    def __resolveTask(self, wTaskID:int) -> TaskObj | None:
+        working_tsk = self.__sub_index.get(wTaskID)
+        if working_tsk is None:
+            print_err(f'Cant resolve taskID {wTaskID} in tasks list. size =  {len(self.__sub_tasks)}, Tasks:')
+            print_err(f'{self.__sub_tasks}')
+        return working_tsk
 
     def run(self, window:sg.Window = None) -> taskRes:
+        _span = self.__profBegin()
+        tRes = self.__runPolicy(window) if self.__policy else self.__run(window)
+        scriptProfiler.finish(_span, tRes.result, self.__cmd_time, self.__wait)
+        return tRes
+
+    def policy(self) -> taskPolicy | None:
+        return self.__policy
+
+    # __runPolicy -- run with timeout / retry policy. Group timeout stops the active devices of the group,
+    # single command timeout is handled by the device wait (__waitDevice)
+    def __runPolicy(self, window:sg.Window = None) -> taskRes:
+        self.__stop_event.clear()
+        attempt:int = 0
+        while True:
+            self.__timed_out = False
+            _timer:Timer | None = None
+            if self.__policy.timeout > 0 and self.__task_type != RunType.single:
+                _timer = Timer(self.__policy.timeout, self.__expire)
+                _timer.daemon = True
+                _timer.start()
+            tRes = self.__run(window)
+            if _timer is not None:
+                _timer.cancel()
+            if self.__timed_out:
+                tRes = taskRes(result = False, device = f'{self.__profName()[0]} timeout')
+
+            if tRes.result or attempt >= self.__policy.retry or self.__stop_event.is_set():
+                return tRes
+            _delay = self.__policy.delay(attempt)
+            attempt += 1
+            print_err(f'-WARNING- Task {self.__profName()[0]} failed ({tRes.device}). Retry {attempt}/{self.__policy.retry} in {_delay} sec')
+            if self.__stop_event.wait(_delay):                  # emergency stop while waiting
+                return tRes
+
+    def __expire(self):                                 # group policy timeout (timer thread)
+        print_err(f'-WARNING- Task {self.__profName()[0]} timeout ({self.__policy.timeout} sec). Stopping its devices')
+        self.__timed_out = True
+        self.__emergency_stop = True                    # no new sub tasks are started
+        devs:list = list()
+        for working_tsk in self.__sub_tasks:
+            if working_tsk.status:
+                devs.extend(working_tsk.wTask.stopTargets())
+        emergencyStop.fanOut(devs)
+
+    # __waitDevice -- device completion result. False if stopped meanwhile, None on timeout (0 - no timeout)
+    def __waitDevice(self, devPtr, timeout:float = 0) -> bool | None:
+        _end = time.perf_counter() + timeout if timeout > 0 else None
+        while True:
+            _poll = POLICY_POLL if _end is None else min(POLICY_POLL, max(_end - time.perf_counter(), 0))
+            try:
+                return devPtr.devNotificationQ.get(timeout=_poll)
+            except Empty:
+                pass
+            if self.__emergency_stop:
+                print_err(f'-WARNING- Device {devPtr.devName} completion is not reported after stop')
+                return False
+            if _end is not None and time.perf_counter() >= _end:
+                return None
+
+    def __run(self, window:sg.Window = None) -> taskRes:
 
         print_log(f'Starting RUN at task {self}')
         if (self.__sub_tasks == None) or (len(self.__sub_tasks) == 0):                    # empty task. do nothing
@@ -247,31 +914,31 @@ class WorkingTask:                                  # WorkingTask - self-recursi
         wTaskCounter = 0
         if self.__task_type == RunType.parallel:
             __paralelStatus = True                          # True if all paralel tasks succeeded
+            _executor = WorkingTask.executor()
             print_log(f'WorkigTasks - paralel series')
             for working_tsk in self.__sub_tasks:
                 if self.__emergency_stop:
                     break
                 working_tsk.status = True
-                working_tsk.threadID = Thread(target=self.__parallelProcessingThread, args=(working_tsk.wTask, self.__reportQ, window))
-                working_tsk.threadID.start()
+                working_tsk.threadID = _executor.submit(self.__parallelProcessingThread, working_tsk.wTask, self.__reportQ, window)
                 wTaskCounter += 1
             
             print_log(f'Number of subtask in paralel: {wTaskCounter}')
             while wTaskCounter > 0: 
                 print_log(f'Waiting subtask to complete (paralel proceeding)')
-                tRes:taskRes = self.__reportQ.get()
+                with _executor.blocked():                   # waiting for own sub tasks doesn't hold the executor slot
+                    tRes:taskRes = self.__reportQ.get()
                 # self.__reportQ.task_done()
                 wTaskID = tRes.wTaskID  
                 opResult = tRes.result
                 print_log(f'Subtask id = {wTaskID} completed opResult = {opResult} (paralel proceeding)')
-                taskIndex = self.__resolveTaskIndex(wTaskID)
+                working_tsk = self.__resolveTask(wTaskID)
 
-                if taskIndex < 0:
+                if working_tsk is None:
                     print_err(f'ERROR resolving sub task. ID = {wTaskID}')
                     return  taskRes(result=False, device='System error')
                 
-                working_tsk = self.__sub_tasks[taskIndex]
-                working_tsk.threadID.join()                 # thread completed
+                working_tsk.threadID.join()                 # job completed
                 working_tsk.status = False
                 if not opResult:                            # operation failed. Emeregency stop must be performed 
                     # return tRes                           
@@ -305,8 +972,11 @@ class WorkingTask:                                  # WorkingTask - self-recursi
                 clearQ(devPtr.devNotificationQ)
                 
             # opResult, toBlock = self.__runCmd(window=window)        # run command for device 
+            _t0 = time.perf_counter()
             opResult, toBlock = self.__runDevCmd(window=window)        # load and than Run  command for device                                                                     
                                                                                 #  (the command will be parsed by device)
+            _t1 = time.perf_counter()
+            self.__cmd_time, self.__wait = _t1 - _t0, 0
             
             print_log(f'WorkigTasks initiation done! with (block = {toBlock},result ={opResult}) [device cmd] at {self.__sub_tasks[0].device} ')
             
@@ -315,7 +985,14 @@ class WorkingTask:                                  # WorkingTask - self-recursi
           
             elif toBlock:
                 print_log(f'Waiting device to complete the motion/operation. Device = {devPtr.devName}')
-                opResult = devPtr.devNotificationQ.get()         # the ONLY block untill completed
+                opResult = self.__waitDevice(devPtr, self.__policy.timeout if self.__policy else 0)         
+                                                                # the ONLY block untill completed
+                self.__wait = time.perf_counter() - _t1
+                if opResult is None:
+                    print_err(f'Device {devPtr.devName} timeout ({self.__policy.timeout} sec). Stopping the device')
+                    emergencyStop.fanOut([devPtr])
+                    self.__sub_tasks[0].status = False
+                    return  taskRes(result = False, device = f'{devPtr.devName} timeout')
                 # devPtr.devNotificationQ.task_done()
                 print_log(f'Device operation completed. Device = {devPtr.devName}. Result = {opResult}')
             
@@ -325,12 +1002,12 @@ class WorkingTask:                                  # WorkingTask - self-recursi
                 print_err(f'Device {self.__sub_tasks[0].device} returned ERROR on THREAD operation {self.__sub_tasks[0].cmd}')
                 return  taskRes(result = False, device = self.__sub_tasks[0].device.get_device().devName)
         elif self.__task_type == RunType.simultaneous: 
-                                                                # 1) load all commands to devices (PLCDev:loadDevicesOp)
-                                                                # 2) start runner (PLCDev:runDevicesOp) to proceed all devices assigned to the runner
+                                                                # 1) load all commands to devices (PLCNode:loadNodeOp)
+                                                                # 2) start runner (PLCNode:runNodesOp) to proceed all devices assigned to the runner
             print_log(f'WorkigTasks - simultaneous series')
-            # BUGBUG: implement simultaneous run type
-            print_err(f'ERROR - simultaneous run type is not implemented yet')
-            return  taskRes(result = False, device = 'System error')
+            tRes = self.__runSimultaneous()
+            if not tRes.result:
+                return tRes
         else:
             print_err(f'ERROR - undefined run type: {self.__task_type}')
             return taskRes(result = False, device = 'System error')
@@ -338,6 +1015,159 @@ class WorkingTask:                                  # WorkingTask - self-recursi
 
         return  taskRes(result = True)
     
+    # arun -- asyncio version of run(), the tree is run as coroutines by asyncEngine (ASYNC engine).
+    # Parallel sub tasks are gathered, the device completion is awaited on the loop.
+    # asyncio.CancelledError (EmergencyStop) stops active devices of the tree and propagates up
+    async def arun(self, window:sg.Window = None) -> taskRes:
+        _span = self.__profBegin()
+        try:
+            tRes = await (self.__arunPolicy(window) if self.__policy else self.__arun(window))
+        except asyncio.CancelledError:
+            scriptProfiler.finish(_span, False, self.__cmd_time, self.__wait)
+            raise
+        scriptProfiler.finish(_span, tRes.result, self.__cmd_time, self.__wait)
+        return tRes
+
+    # __arunPolicy -- async run with timeout / retry policy. Group timeout cancels the group run (the cancelled
+    # leaves stop their devices), single command timeout is handled by the device wait
+    async def __arunPolicy(self, window:sg.Window = None) -> taskRes:
+        attempt:int = 0
+        while True:
+            try:
+                if self.__policy.timeout > 0 and self.__task_type != RunType.single:
+                    tRes = await asyncio.wait_for(self.__arun(window), self.__policy.timeout)
+                else:
+                    tRes = await self.__arun(window)
+            except asyncio.TimeoutError:
+                print_err(f'-WARNING- Task {self.__profName()[0]} timeout ({self.__policy.timeout} sec)')
+                tRes = taskRes(result = False, device = f'{self.__profName()[0]} timeout')
+
+            if tRes.result or attempt >= self.__policy.retry:
+                return tRes
+            _delay = self.__policy.delay(attempt)
+            attempt += 1
+            print_err(f'-WARNING- Task {self.__profName()[0]} failed ({tRes.device}). Retry {attempt}/{self.__policy.retry} in {_delay} sec')
+            await asyncio.sleep(_delay)                 # cancelled by emergency stop
+
+    async def __arun(self, window:sg.Window = None) -> taskRes:
+
+        print_log(f'Starting async RUN at task {self}')
+        if (self.__sub_tasks == None) or (len(self.__sub_tasks) == 0):                    # empty task. do nothing
+            print_err(f'-WARNING-  enpty task, id = {self.__id}. Exiting.')
+            return taskRes(result=True)
+
+        self.__emergency_stop = False
+        _engine = WorkingTask.engine()
+        if self.__task_type == RunType.parallel:
+            print_log(f'WorkigTasks - paralel series (async)')
+            _aTasks:list[asyncio.Task] = list()
+            for working_tsk in self.__sub_tasks:
+                working_tsk.status = True
+                _aTask = asyncio.ensure_future(working_tsk.wTask.arun(window=window))
+                _aTask.add_done_callback(lambda _t, _tsk=working_tsk: setattr(_tsk, 'status', False))
+                _aTasks.append(_aTask)
+
+            print_log(f'Number of subtask in paralel: {len(_aTasks)}')
+            try:
+                _results = await asyncio.gather(*_aTasks, return_exceptions=True)
+            except asyncio.CancelledError:
+                for _aTask in _aTasks:
+                    _aTask.cancel()
+                await asyncio.gather(*_aTasks, return_exceptions=True)     # sub tasks stop their devices
+                raise
+
+            _failed:taskRes | None = None
+            for tRes in _results:               # one failed task should not affect tasks running in paralel
+                if isinstance(tRes, BaseException):
+                    print_err(f'Exception in paralel sub task: {tRes}')
+                    _failed = taskRes(result = False, device = 'System error')
+                elif not tRes.result:
+                    _failed = taskRes(result = False, device = tRes.device)
+            if _failed is not None:
+                return _failed
+
+        elif self.__task_type == RunType.serial:
+            print_log(f'WorkigTasks - serial series (async)')
+            for working_tsk in self.__sub_tasks:
+                if self.__emergency_stop:
+                    break
+                working_tsk.status = True
+                try:
+                    tRes = await working_tsk.wTask.arun(window=window)
+                finally:
+                    working_tsk.status = False
+                if not tRes.result:                                 # operation failed. Emeregency stop must be performed 
+                     return tRes
+
+        elif self.__task_type == RunType.single:
+            print_log(f'WorkigTasks - single [device cmd] at {self.__sub_tasks[0].device} (async)')
+            devPtr = self.__sub_tasks[0].device.get_device() if self.__sub_tasks[0].device else None
+            if devPtr:
+                clearQ(devPtr.devNotificationQ)
+            self.__sub_tasks[0].status = True
+            try:
+                _t0 = time.perf_counter()
+                self.__cmd_time, self.__wait = 0, 0
+                opResult, toBlock = await _engine.offload(self.__runDevCmd, window)
+                _t1 = time.perf_counter()
+                self.__cmd_time = _t1 - _t0
+                print_log(f'WorkigTasks initiation done! with (block = {toBlock},result ={opResult}) [device cmd] at {self.__sub_tasks[0].device} ')
+                if not opResult:
+                    print_err(f'Device {self.__sub_tasks[0].device} returned ERROR on operation {self.__sub_tasks[0].cmd}')
+                elif toBlock:
+                    print_log(f'Waiting device to complete the motion/operation. Device = {devPtr.devName}')
+                    if self.__policy and self.__policy.timeout > 0:
+                        try:
+                            opResult = await asyncio.wait_for(_engine.waitQ(devPtr.devNotificationQ), self.__policy.timeout)
+                        except asyncio.TimeoutError:
+                            print_err(f'Device {devPtr.devName} timeout ({self.__policy.timeout} sec). Stopping the device')
+                            await _engine.offload(emergencyStop.fanOut, [devPtr])
+                            return  taskRes(result = False, device = f'{devPtr.devName} timeout')
+                    else:
+                        opResult = await _engine.waitQ(devPtr.devNotificationQ)
+                    self.__wait = time.perf_counter() - _t1
+                    print_log(f'Device operation completed. Device = {devPtr.devName}. Result = {opResult}')
+            except asyncio.CancelledError:
+                if devPtr:
+                    self.__stopDevice(devPtr)
+                raise
+            finally:
+                self.__sub_tasks[0].status = False
+
+            if not opResult:                                    # operation failed. Emeregency stop must be performed 
+                print_err(f'Device {self.__sub_tasks[0].device} returned ERROR on async operation {self.__sub_tasks[0].cmd}')
+                return  taskRes(result = False, device = devPtr.devName if devPtr else 'System error')
+
+        elif self.__task_type == RunType.simultaneous:
+            print_log(f'WorkigTasks - simultaneous series (async)')
+            try:
+                tRes, loaded = await _engine.offload(self.__startSimultaneous)
+                if tRes is not None:
+                    return tRes
+                tRes = taskRes(result = True)
+                _spans = self.__profLoaded(loaded)
+                for working_tsk in loaded:              # wait all devices on the runner
+                    devPtr = working_tsk.wTask.singleCmd().device.get_device()
+                    opResult = await _engine.waitQ(devPtr.devNotificationQ)
+                    scriptProfiler.finish(_spans.get(working_tsk.wTask.id()), opResult)
+                    working_tsk.status = False
+                    print_log(f'Device operation completed (simultaneous). Device = {devPtr.devName}. Result = {opResult}')
+                    if not opResult:
+                        tRes = taskRes(result = False, device = devPtr.devName)
+            except asyncio.CancelledError:
+                self.__emergency_stop = True            # stops loading if the runner is not started yet
+                for working_tsk in self.__sub_tasks:    # the runner may be started by the executor meanwhile
+                    self.__stopDevice(working_tsk.wTask.singleCmd().device.get_device())
+                    working_tsk.status = False
+                raise
+            if not tRes.result:
+                return tRes
+        else:
+            print_err(f'ERROR - undefined run type: {self.__task_type}')
+            return taskRes(result = False, device = 'System error')
+
+        return  taskRes(result = True)
+
     # def __clearQ(self, _Q:Queue):
     #     iCount = 0
     #     while not _Q.empty():
@@ -711,6 +1541,68 @@ class WorkingTask:                                  # WorkingTask - self-recursi
         return opResult, toBlock
 
 
+    # simultaneous run: all commands of the group are loaded to the same PLC runner 
+    # and started by single _DoRun. Each device notifies its completion via devNotificationQ
+    def __runSimultaneous(self) -> taskRes:
+        tRes, loaded = self.__startSimultaneous()
+        if tRes is not None:
+            return tRes
+
+        _result = taskRes(result = True)
+        _spans = self.__profLoaded(loaded)
+        for working_tsk in loaded:                  # wait all devices on the runner
+            devPtr = working_tsk.wTask.singleCmd().device.get_device()
+            opResult = self.__waitDevice(devPtr)
+            scriptProfiler.finish(_spans.get(working_tsk.wTask.id()), opResult)
+            working_tsk.status = False
+            print_log(f'Device operation completed (simultaneous). Device = {devPtr.devName}. Result = {opResult}')
+            if not opResult:
+                _result = taskRes(result = False, device = devPtr.devName)
+
+        return _result
+
+    # loads the group commands to the runner and starts it -> (error result or None if started, loaded sub tasks)
+    def __startSimultaneous(self) -> tuple[taskRes | None, list[TaskObj]]:
+        runner:int | None = None
+        loaded:list[TaskObj] = list()
+        try:
+            for working_tsk in self.__sub_tasks:
+                if self.__emergency_stop:
+                    break
+                wCmd:CmdObj = working_tsk.wTask.singleCmd()
+                devPtr = wCmd.device.get_device()
+                clearQ(devPtr.devNotificationQ)
+                _runner = devPtr.loadNodeOp(command=wCmd.operation, runnerNum=runner, parsed=wCmd.parsed)
+                if _runner is None:             # the device is not attached, the runner (if any) keeps the loaded ones
+                    raise Exception(f'Loading cmd {wCmd.operation} to device {devPtr.devName} failed')
+                runner = _runner
+                working_tsk.status = True
+                loaded.append(working_tsk)
+
+            if self.__emergency_stop or len(loaded) == 0:
+                self.__unloadSimultaneous(loaded, runner)
+                return taskRes(result = False, device = 'Emergency stop'), loaded
+
+            print_log(f'{len(loaded)} commands are loaded to runner {runner}. Starting simultaneous run')
+            opResult, toBlock = PLCNode.runNodesOp(runner=runner)
+            if not opResult:
+                raise Exception(f'Starting runner {runner} failed')
+
+        except Exception as ex:
+            print_err(f'Exception running simultaneous task {self}: {ex}')
+            exptTrace(ex)
+            self.__unloadSimultaneous(loaded, runner)
+            return taskRes(result = False, device = 'System error'), loaded
+
+        return None, loaded
+
+    # devices loaded but not started are detached from the runner, so the runner is acknowledged and released
+    @staticmethod
+    def __unloadSimultaneous(loaded:list[TaskObj], runner:int | None):
+        for working_tsk in loaded:
+            working_tsk.status = False
+        PLCNode.unloadNodes([working_tsk.wTask.singleCmd().device.get_device() for working_tsk in loaded], runner)
+
     # similar to __runCmd but passes entire command to device with no prior parsing by calling
     # loadDeviceOp method of CDev class. Do not run cmd itself. Use PLCDev:runDevicesOp to run all loaded commands
     def __runDevCmd(self, window:sg.Window = None)-> tuple[bool, bool]: 
@@ -730,7 +1622,7 @@ class WorkingTask:                                  # WorkingTask - self-recursi
                                 
             # runner = wCmd.device.loadDeviceOp(wCmd)
             # toBlock, opResult = wCmd.device.__class__.runDevicesOp(runner)          # run the loaded commands
-            opResult, toBlock = wCmd.device.cDevice.operateDevice(command=wCmd.operation, window=window)          
+            opResult, toBlock = wCmd.device.cDevice.operateDevice(command=wCmd.operation, window=window, parsed=wCmd.parsed)          
                                                                                 # run the loaded commands directly on device itself
                                                                                 # other option is to run via CDev.wCmd.device.operateDevice()
                                                                                 # expected the same result
@@ -756,39 +1648,82 @@ class WorkingTask:                                  # WorkingTask - self-recursi
 # task_ref.__annotations__={'task':WorkingTask, 'ID':int, 'thread_id':Thread}         # specify type of elements
 
 task_ref = namedtuple("task_ref", ["task",  "thread_id"])
-task_ref.__annotations__={'task':WorkingTask,  'thread_id':Thread}         # specify type of elements
+task_ref.__annotations__={'task':WorkingTask,  'thread_id':execJob | asyncJob}         # specify type of elements
 
 
-# Process manager manages separate threads for each task
-# All working task are run in separates thread
+# Process manager manages the tasks run by the task executor (reusable worker threads)
 # The load_task API call is non-blocking
-# Each workingTask (blocked untill completion) is operated from the separte thread and the thread terminates itself upon complition
+# Each workingTask (blocked untill completion) is operated by executor worker, parallel sub tasks are submitted 
+# to the same executor. The executor is sized by EXECUTOR section of params.yml
+# With EXECUTOR/ENGINE: ASYNC the tasks are run by asyncEngine (single event loop thread), the executor 
+# is used for device command start only
 
 class ProcManager:
-    def __init__(self, window:sg.Window):
+    def __init__(self, window:sg.Window, params:dict | None = None):
         self.__window:sg.Window = window                              # ref to returnt completion event   
-        self.__tasks_list: list[task_ref] = list()                 # list of tasks (task_ref) refernces 
+        self.__tasks: dict[int, task_ref] = dict()                 # running tasks (task_ref) by task id
+        self.__scripts:int = 0                                     # running non single tasks (scripts)
+        self.__steps:int = 0                                       # of them script steps (may overlap in pipelined run)
         self.__mLock:Lock = Lock()                                 # mutex for task list access control
+        _max_workers, _idle_timeout = EXECUTOR_MAX_WORKERS, EXECUTOR_IDLE_TIMEOUT
+        if params is not None:
+            _max_workers = assign_parm('EXECUTOR', params, 'MAX_WORKERS', EXECUTOR_MAX_WORKERS)
+            _idle_timeout = assign_parm('EXECUTOR', params, 'IDLE_TIMEOUT', EXECUTOR_IDLE_TIMEOUT)
+        self.__executor:taskExecutor = taskExecutor(max_workers = _max_workers, idle_timeout = _idle_timeout)
+        WorkingTask.setExecutor(self.__executor)
+
+        self.__engine:asyncEngine | None = None                    # None - THREAD engine
+        _engine = str(assign_parm('EXECUTOR', params, 'ENGINE', ENGINE_THREAD)).upper() if params is not None else ENGINE_THREAD
+        if _engine == ENGINE_ASYNC:
+            self.__engine = asyncEngine(self.__executor, \
+                                        poll_min = assign_parm('EXECUTOR', params, 'ASYNC_POLL_MIN', ASYNC_POLL_MIN), \
+                                        poll_max = assign_parm('EXECUTOR', params, 'ASYNC_POLL_MAX', ASYNC_POLL_MAX))
+            WorkingTask.setEngine(self.__engine)
+        elif _engine != ENGINE_THREAD:
+            print_err(f'-WARNING- Unknown task engine {_engine}. {ENGINE_THREAD} engine will be used')
+        print_log(f'Task engine = {ENGINE_ASYNC if self.__engine else ENGINE_THREAD}')
+
+        if params is not None:
+            emergencyStop.configure(assign_parm('EMERGENCY_STOP', params, 'DEADLINE', ESTOP_DEADLINE))
+            scriptProfiler.configure(assign_parm('PROFILER', params, 'ENABLED', False), \
+                                     assign_parm('PROFILER', params, 'DIR', PROFILER_DIR))
 
           
 
     def __del__(self):
 
-        for tsk in self.__tasks_list:
+        for tsk in self.__runningTasks():
             tsk.task.EmergencyStop()
             tsk.thread_id.join()
         
 
-    def EmergencyStop(self):
-        for tsk in self.__tasks_list:
-            tsk.task.EmergencyStop()
+    def EmergencyStop(self) -> emergencyStopReport:
+        return EmergencyStopAll([tsk.task for tsk in self.__runningTasks()])
+
+    @property
+    def stopReport(self) -> emergencyStopReport | None:        # the last emergency stop
+        return emergencyStop.lastReport()
+
+    def __runningTasks(self) -> list[task_ref]:
+        with self.__mLock:
+            return list(self.__tasks.values())
+
+    @property
+    def executorStats(self) -> executorStats:
+        return self.__executor.stats
+
+    @property
+    def engineStats(self) -> asyncEngineStats | None:
+        return self.__engine.stats if self.__engine else None
 
     def __proc_control_thread(self, wTask:WorkingTask, reportQ:Queue):
         tRes = wTask.run(self.__window)                                             # blocking
+        self.__task_done(wTask, reportQ, tRes)
+
+    def __task_done(self, wTask:WorkingTask, reportQ:Queue, tRes:taskRes):
         print_log(f'Task completed with result = {tRes.result}, taskID = {wTask.id()}')
 
-        current_thread_id = get_ident()
-        self.__release_task(current_thread_id)
+        self.__release_task(wTask)
 
         print_log(f'Task completed. {"TASK_DONE" if tRes.result else "TASK_ERROR"} event will be sent')
         
@@ -808,20 +1743,20 @@ class ProcManager:
             
         print_log(f'Task done with result = {tRes.result}, dev = {tRes.device}')
 
-    def __release_task(self, threadID):
-        for tsk in self.__tasks_list:
-            if tsk.thread_id.ident ==  threadID:
-                print_log(f'Removing task (id={tsk.task.id()})')
-                try:
-                    l = smartLocker(self.__mLock)
-                    self.__tasks_list.remove(tsk)
-                    l.release()
-
-                except Exception as ex:
-                    exptTrace(ex)
-            
-                return
+    def __release_task(self, wTask:WorkingTask):
+        l = smartLocker(self.__mLock)           # the task may complete before load_task has added it to the list
+        tsk = self.__tasks.get(wTask.id())
+        if tsk is not None and tsk.task is wTask:
+            print_log(f'Removing task (id={wTask.id()})')
+            del self.__tasks[wTask.id()]
+            if not wTask.is_single():
+                self.__scripts -= 1
+                if wTask.isStep():
+                    self.__steps -= 1
+            l.release()
+            return
                             
+        l.release()
         print_err(f'-WARNING - Cant find appropiate task to remove')
 
 
@@ -829,18 +1764,27 @@ class ProcManager:
                                         # task_to_run - WorkingTask object
                                         # reportQ - Queue to send back the task completion event
     
-        for tsk in self.__tasks_list:   # verify if single task is already running
-            if (not tsk.task.is_single()) and (not task_to_run.is_single()):
-                print_err(f'ERROR - the oly one script is allowed in time')
-                print_err(f'1 ({task_to_run.id()}) -> {task_to_run}')
-                print_err(f'2 {tsk.task.id()} -> {tsk.task}')
-        wThread = Thread(target = self.__proc_control_thread, args =(task_to_run, reportQ,  )) 
         l = smartLocker(self.__mLock)
-        # self.__tasks_list.append(task_ref(task = task_to_run, ID = WorkingTask.id(), thread_id = thread_id ))
-        self.__tasks_list.append(task_ref(task = task_to_run, thread_id = wThread ))
+        if not task_to_run.is_single() and \
+                ((self.__scripts > 0 and not task_to_run.isStep()) or self.__scripts > self.__steps):
+                                                                    # verify if script is already running
+            print_err(f'ERROR - the oly one script is allowed in time')
+            print_err(f'1 ({task_to_run.id()}) -> {task_to_run}')
+            print_err(f'2 {[tsk.task for tsk in self.__tasks.values() if not tsk.task.is_single()]}')
+        if task_to_run.id() in self.__tasks:
+            print_err(f'-WARNING- Task (id={task_to_run.id()}) is already running')
+        elif not task_to_run.is_single():
+            self.__scripts += 1
+            if task_to_run.isStep():
+                self.__steps += 1
+        if self.__engine is not None:
+            wJob = self.__engine.submit(task_to_run, self.__window, \
+                                        onDone = lambda tRes: self.__task_done(task_to_run, reportQ, tRes))
+        else:
+            wJob = self.__executor.submit(self.__proc_control_thread, task_to_run, reportQ)
+        self.__tasks[task_to_run.id()] = task_ref(task = task_to_run, thread_id = wJob )
         l.release()
-        wThread.start() 
-        print_log(f'Added new task to list. thread ID = {wThread.ident}')
+        print_log(f'Added new task to list. taskID = {task_to_run.id()}, executor: {self.__executor.stats}')
 
 
         
@@ -946,21 +1890,105 @@ def resolve_SYS_device( opName:str, devs_list:list[CDev]) -> CDev:
     print_err(f'-ERROR- Cant resolve the device {opName}/{dName}')    
     return None
 
+# execution plan node: single command (cmd) or group of plan nodes (children) of sType run type
+planNode = namedtuple("planNode", ["key", "sType", "cmd", "children", "policy"], defaults=[None])
+planNode.__annotations__={'key':str, 'sType':RunType, 'cmd':CmdObj, 'children':tuple, 'policy':taskPolicy}         # specify type of elements
+
+PLAN_CACHE_SIZE = 8                         # compiled scripts kept (by file hash)
+
+# scriptPlan - compiled execution plan of loaded YAML script. Each top level group is compiled once 
+# (devices resolved, commands pre-parsed). WorkingTask of the group is built from the plan with no parsing,
+# so cyclic run of the script does not rebuild the group from the script dict every step
+class scriptPlan:
+    __plans:dict[str, scriptPlan] = dict()          # compiled plans by file hash
+    __pLock:Lock = Lock()
+
+    def __init__(self, script:dict, _sysDevs:systemDevices, fileHash:str):
+        self.fileHash:str = fileHash
+        self.__sysDevs = weakref.ref(_sysDevs)              # the plan is valid for these system devices only
+        self.__groups:dict[str, planNode | None] = dict()   # None - the group failed to compile (i.e. inactive device)
+        for key, group in script.items():
+            self.__groups[key] = CompileScriptGroup(group, _sysDevs, key)
+
+    # load -- compiled plan of the script. The plans of other (or released) system devices are dropped, 
+    # so the cache never returns / keeps alive devices of an old configuration
+    @classmethod
+    def load(cls, script:dict, _sysDevs:systemDevices, fileHash:str) -> scriptPlan:
+        with cls.__pLock:
+            cls.__plans = {_hash: _plan for _hash, _plan in cls.__plans.items() if _plan.__sysDevs() is _sysDevs}
+            _plan = cls.__plans.get(fileHash)
+            if _plan is not None:
+                print_log(f'Script plan {fileHash} is taken from cache')
+                return _plan
+            _plan = cls(script, _sysDevs, fileHash)
+            if len(cls.__plans) >= PLAN_CACHE_SIZE:
+                del cls.__plans[next(iter(cls.__plans))]        # the oldest one
+            cls.__plans[fileHash] = _plan
+            print_log(f'Script plan {fileHash} compiled: {len(_plan.__groups)} groups')
+        return _plan
+
+    # clear -- drops the compiled plans (i.e. parameters reload, the plans embed TASK_POLICY)
+    @classmethod
+    def clear(cls):
+        with cls.__pLock:
+            cls.__plans = dict()
+
+    def __contains__(self, key:str) -> bool:
+        return key in self.__groups
+
+    def build(self, key:str, stepTask:bool = False) -> WorkingTask | None:
+        _node = self.__groups.get(key)
+        return BuildPlanTask(_node, stepTask) if _node is not None else None
+
+# pre-parses the device command (CmdObj.parsed), the device parses it at run time if failed here
+def _precompile_cmd(key:str, wCmd:CmdObj):
+    try:
+        devPtr = wCmd.device.get_device() if wCmd.device else None
+        if isinstance(devPtr, PLCNode):
+            wCmd.parsed = devPtr.compileCmd(wCmd.operation)
+        elif devPtr is not None and '.' in key:             # DEV.OP par:val ...
+            wCmd.parsed = Command.parse_cmd(' '.join([key, *map(str, wCmd.operation)]))
+    except Exception as ex:
+        print_err(f'-WARNING- Command {key} {wCmd.operation} will be parsed at run time: {ex}')
+
+def BuildPlanTask(node:planNode, stepTask:bool = False) -> WorkingTask:
+    if node.sType == RunType.single:
+        return WorkingTask(taskList = node.cmd, sType=RunType.single, name=node.key, policy=node.policy)
+    return WorkingTask([BuildPlanTask(sub, stepTask) for sub in node.children], sType=node.sType, stepTask=stepTask, name=node.key, \
+                       policy=node.policy)
+
 # def BuildComplexWorkingClass(script:dict, devs_list:List[CDev], stepTask:bool = False, tempTaskList: List[WorkingTask] = list())-> WorkingTask:
 # def BuildComplexWorkingClass(script:dict, devs_list:list[CDev], key , stepTask:bool = False)-> WorkingTask:
 def BuildComplexWorkingClass(script:dict, _sysDevs:systemDevices, key , stepTask:bool = False)-> WorkingTask:
+    _node = CompileScriptGroup(script, _sysDevs, key)
+    return BuildPlanTask(_node, stepTask) if _node is not None else None
+
+# the group compiled by the script plan or compiled now (no plan / part of group selected)
+def BuildPlannedWorkingClass(plan:scriptPlan | None, script:dict, _sysDevs:systemDevices, key , stepTask:bool = False)-> WorkingTask:
+    if plan is not None and key in plan:
+        return plan.build(key, stepTask)
+    return BuildComplexWorkingClass(script, _sysDevs, key, stepTask)
+
+# cmdWords - CMD_TIMEOUT / CMD_RETRY policy inherited from upper groups
+def CompileScriptGroup(script:dict, _sysDevs:systemDevices, key, cmdWords:dict | None = None)-> planNode | None:
   
-    tempTaskList: list[WorkingTask] = list()
+    tempTaskList: list[planNode] = list()
 
     print_DEBUG(f'Working on script = {script} key = {key}')
     try:
+        _params = _sysDevs.getParams() if _sysDevs else None
+        _words = parsePolicy(script[POLICY_KEY]) if POLICY_KEY in script else dict()
+        cmdWords = {**(cmdWords or dict()), **{_w: _val for _w, _val in _words.items() if _w in POLICY_CMD_WORDS or _w == 'BACKOFF'}}
+        _policy = basePolicy(_params).update(_words) if len(_words) > 0 else None
         for group_n, cmd in script.items():
             print_DEBUG(f'Procceeding cmd = {cmd} group_n = {group_n}')
 
+            if group_n == POLICY_KEY:
+                continue
+
             if isinstance(cmd, dict):     # complex command (sub-script) / cmd block, nested script
-                print_DEBUG(f'Creating complex task for cmd = {cmd}')
-                # woT:WorkingTask = BuildComplexWorkingClass(cmd, devs_list, group_n, stepTask)
-                woT:WorkingTask = BuildComplexWorkingClass(cmd, _sysDevs, group_n, stepTask)
+                print_DEBUG(f'Compiling complex task for cmd = {cmd}')
+                woT:planNode = CompileScriptGroup(cmd, _sysDevs, group_n, cmdWords)
                 if woT == None:
                     return None
                 else:
@@ -977,29 +2005,38 @@ def BuildComplexWorkingClass(script:dict, _sysDevs:systemDevices, key , stepTask
                     return None
 
 
-                print_DEBUG(f'Creating single task for cmd = {_cmd}')
+                print_DEBUG(f'Compiling single task for cmd = {_cmd}')
                 # wTask:WorkingTask = Create_Single_Task(_cmd, devs_list) 
                 wTask:WorkingTask = Create_Dev_Single_Task(_cmd, _sysDevs)
                 print_DEBUG(f'Single_Task = {wTask}')
                 if wTask is not None:     
-                    tempTaskList.append(wTask)
+                    _precompile_cmd(group_n, wTask.singleCmd())
+                    tempTaskList.append(planNode(key=group_n, sType=RunType.single, cmd=wTask.singleCmd(), children=(), \
+                                                 policy=commandPolicy(_params, str(group_n).split('.')[0], cmdWords)))
                 else:    
                     print_err(f'Dev {_cmd[1]} at script cmd {_cmd} is not active in the system')                               # device for cmd is not active in the system 
                     return None
-        # BUGBUG: code for simultaneous runner add HERE
         if key[-1] == 'P':
             sType = RunType.parallel
         elif key[-1] == 'S':
             sType = RunType.serial
+        elif key[-1] == 'M':                    # simultaneous - all commands on single PLC runner
+            sType = RunType.simultaneous
+            for wTask in tempTaskList:
+                _cmd:CmdObj | None = wTask.cmd
+                if _cmd is None or _cmd.device is None or not isinstance(_cmd.device.get_device(), PLCNode):
+                    print_err(f'--WARNING Simultaneous group [{key}] may contain PLC device commands only. Found: {wTask.key}. The group is treated as paralel')
+                    sType = RunType.parallel
+                    break
         else:
             print_err(f'--WARNING Commands combination [{group_n}] that is not predefined group is treated as paralel')
             sType = RunType.parallel
         
-        wT = WorkingTask(tempTaskList, sType=sType, stepTask=stepTask)
-        print_DEBUG(f'completed wTask = {wT}')
+        wT = planNode(key=key, sType=sType, cmd=None, children=tuple(tempTaskList), policy=_policy)
+        print_DEBUG(f'compiled plan = {wT}')
 
     except Exception as ex:
-        print_err(f'Exception building complex working task for script key = {key}')
+        print_err(f'Exception compiling working task for script key = {key}')
         exptTrace(ex)
         return None
         
@@ -1507,30 +2544,28 @@ def Create_Dev_Single_Task(cmd:str, _sysDevs: systemDevices) -> WorkingTask:
 
 class WorkingTasksList:
     def __init__(self):
-        self.tList:list[WorkingTask] = list()
+        self.__tasks:dict[int, WorkingTask] = dict()       # tasks by task id
+        self.__tLock:Lock = Lock()
 
     def __del__(self):
-        if len(self.tList):
+        if len(self.__tasks):
             print_err(f'-WARNING- There are unterminated tasks in the list')
 
     def addTask(self, wTask:WorkingTask):
-        self.tList.append(wTask)
+        with self.__tLock:
+            self.__tasks[wTask.id()] = wTask
 
     def delTask(self, tID:int)-> bool:
-        for t in self.tList:
-            if tID == t.id():
-                self.tList.remove(t)
-                return True
-        return False
+        with self.__tLock:
+            return self.__tasks.pop(tID, None) is not None
     
     def getTask(self, tID:int) -> WorkingTask:
-        for t in self.tList:
-            if tID == t.id():
-                return t
-        return None
+        with self.__tLock:
+            return self.__tasks.get(tID)
     
-    def getAllTasks(self) -> list[WorkingTask]:
-        return self.tList
+    def getAllTasks(self) -> list[WorkingTask]:             # snapshot (the list may change while iterating)
+        with self.__tLock:
+            return list(self.__tasks.values())
 
 
 if __name__ == "__main__":
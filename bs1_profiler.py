@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+__author__ = "Leonid Voldman"
+__copyright__ = "Copyright 2024"
+__credits__ = ["VoldmanTech"]
+__license__ = "SLA"
+__version__ = "1.0.0"
+__maintainer__ = "Leonid Voldman"
+__email__ = "vleonid@voldman.com"
+__status__ = "Tool"
+
+
+'''
+scriptProfiler - timing profiler of script runs (WorkingTask trees)
+records a span per WorkingTask run: group (parallel/serial/simultaneous) or single device command
+with device command start time and device completion wait time. Per cycle report contains
+per device / per group statistics and critical path of each step (root task),
+exported as JSON and Chrome trace (chrome://tracing, https://ui.perfetto.dev)
+
+params.yml:
+PROFILER:
+    ENABLED: False                  # record script run timing
+    DIR: profile                    # report directory: <stamp>_cycle<N>.json / <stamp>_cycle<N>.trace.json
+'''
+
+import os, time, json
+from threading import Lock, get_ident
+from dataclasses import dataclass
+
+from bs1_utils import print_log, exptTrace
+
+PROFILER_DIR = 'profile'
+
+@dataclass
+class profSpan:                             # single WorkingTask run
+    id:int                                  # WorkingTask id
+    name:str                                # group key / device name
+    kind:str                                # parallel / serial / simultaneous / single
+    start:float                             # perf_counter (sec)
+    end:float = 0
+    cmd_time:float = 0                      # device command start (load and run) time (single) (sec)
+    wait:float = 0                          # device completion wait time (single) (sec)
+    result:bool = True
+    device:str | None = None
+    children:tuple = ()                     # sub tasks ids
+    thread:int = 0
+    cmd:str | None = None                   # script command: DEV[.OP] args (single), dry run history key
+
+    @property
+    def duration(self) -> float:
+        return max(self.end - self.start, 0)
+
+    def toDict(self, origin:float) -> dict:
+        return {'name': self.name, 'kind': self.kind, 'device': self.device, 'cmd': self.cmd, 'result': self.result, \
+                'start_ms': round((self.start - origin) * 1000, 3), 'duration_ms': round(self.duration * 1000, 3), \
+                'cmd_ms': round(self.cmd_time * 1000, 3), 'wait_ms': round(self.wait * 1000, 3)}
+
+
+class scriptProfiler:
+    __enabled:bool = False
+    __dir:str = PROFILER_DIR
+    __lock:Lock = Lock()
+    __spans:list[profSpan] = list()         # current cycle spans
+    __cycle:int = 0
+    __cycle_start:float = time.perf_counter()
+
+    @classmethod
+    def configure(cls, enabled:bool, _dir:str = PROFILER_DIR):
+        cls.__enabled = bool(enabled)
+        cls.__dir = _dir if _dir else PROFILER_DIR
+        print_log(f'Script profiler {"enabled, reports at " + cls.__dir if cls.__enabled else "disabled"}')
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls.__enabled
+
+    # begin -- starts span of the task run, None if profiler is disabled
+    @classmethod
+    def begin(cls, wTaskID:int, name:str, kind:str, children:tuple = (), device:str | None = None, \
+              cmd:str | None = None) -> profSpan | None:
+        if not cls.__enabled:
+            return None
+        _span = profSpan(id=wTaskID, name=name, kind=kind, start=time.perf_counter(), device=device, \
+                         children=children, thread=get_ident(), cmd=cmd)
+        with cls.__lock:
+            cls.__spans.append(_span)
+        return _span
+
+    @staticmethod
+    def finish(span:profSpan | None, result:bool = True, cmd_time:float = 0, wait:float = 0):
+        if span is None:
+            return
+        span.end = time.perf_counter()
+        span.result = bool(result)
+        span.cmd_time = cmd_time
+        span.wait = wait
+
+    # newCycle -- closes current cycle: builds the report, exports it and starts next cycle
+    @classmethod
+    def newCycle(cls) -> dict | None:
+        if not cls.__enabled:
+            return None
+        with cls.__lock:
+            _spans = [_span for _span in cls.__spans if _span.end > 0]
+            _origin = cls.__cycle_start
+            cls.__spans = [_span for _span in cls.__spans if _span.end == 0]    # still running
+            cls.__cycle += 1
+            _cycle = cls.__cycle
+            cls.__cycle_start = time.perf_counter()
+
+        if len(_spans) == 0:
+            return None
+        _report = cls.report(_spans, _origin, _cycle)
+        cls.export(_report, _spans, _origin, _cycle)
+        return _report
+
+    @staticmethod
+    def criticalPath(span:profSpan, index:dict[int, profSpan]) -> list[profSpan]:
+        path:list[profSpan] = [span]
+        _subs = [index[_id] for _id in span.children if _id in index]
+        if len(_subs) == 0:
+            return path
+        if span.kind == 'serial':                   # all sub tasks in sequence
+            for _sub in _subs:
+                path.extend(scriptProfiler.criticalPath(_sub, index))
+        else:                                       # parallel / simultaneous - the last completed one
+            path.extend(scriptProfiler.criticalPath(max(_subs, key=lambda _s: _s.end), index))
+        return path
+
+    @staticmethod
+    def report(spans:list[profSpan], origin:float, cycle:int = 0) -> dict:
+        index:dict[int, profSpan] = {_span.id: _span for _span in spans}        # the last run of the task
+        _childs = {_id for _span in spans for _id in _span.children}
+        _roots = [_span for _span in spans if _span.id not in _childs]
+
+        devices:dict[str, dict] = dict()
+        groups:dict[str, dict] = dict()
+        for _span in spans:
+            if _span.kind == 'single':
+                _stat = devices.setdefault(_span.device or _span.name, {'count': 0, 'total_ms': 0, 'max_ms': 0, 'wait_ms': 0, 'errors': 0})
+                _stat['wait_ms'] = round(_stat['wait_ms'] + _span.wait * 1000, 3)
+            else:
+                _stat = groups.setdefault(_span.name, {'kind': _span.kind, 'count': 0, 'total_ms': 0, 'max_ms': 0, 'errors': 0})
+            _stat['count'] += 1
+            _stat['total_ms'] = round(_stat['total_ms'] + _span.duration * 1000, 3)
+            _stat['max_ms'] = round(max(_stat['max_ms'], _span.duration * 1000), 3)
+            if not _span.result:
+                _stat['errors'] += 1
+
+        steps:list[dict] = list()
+        for _root in sorted(_roots, key=lambda _s: _s.start):
+            _path = scriptProfiler.criticalPath(_root, index)
+            steps.append({'step': _root.toDict(origin), \
+                          'critical_path': [_span.toDict(origin) for _span in _path if _span.kind == 'single'], \
+                          'critical_devices': ' -> '.join(_span.device or _span.name for _span in _path if _span.kind == 'single')})
+
+        _end = max(_span.end for _span in spans)
+        return {'cycle': cycle, 'duration_ms': round((_end - origin) * 1000, 3), 'steps': steps, \
+                'devices': dict(sorted(devices.items(), key=lambda _i: -_i[1]['total_ms'])), 'groups': groups}
+
+    @staticmethod
+    def chromeTrace(spans:list[profSpan], origin:float) -> dict:
+        _events:list[dict] = list()
+        for _span in spans:
+            _events.append({'name': _span.name, 'cat': _span.kind, 'ph': 'X', 'pid': 1, 'tid': _span.thread, \
+                            'ts': round((_span.start - origin) * 1e6, 1), 'dur': round(_span.duration * 1e6, 1), \
+                            'args': {'device': _span.device, 'cmd': _span.cmd, 'result': _span.result, 'cmd_ms': round(_span.cmd_time * 1000, 3), \
+                                     'wait_ms': round(_span.wait * 1000, 3)}})
+        return {'traceEvents': _events, 'displayTimeUnit': 'ms'}
+
+    @classmethod
+    def export(cls, report:dict, spans:list[profSpan], origin:float, cycle:int):
+        try:
+            os.makedirs(cls.__dir, exist_ok=True)
+            _base = os.path.join(cls.__dir, f'{time.strftime("%Y%m%d-%H%M%S")}_cycle{cycle}')
+            with open(_base + '.json', 'w') as _file:
+                json.dump(report, _file, indent=2)
+            with open(_base + '.trace.json', 'w') as _file:
+                json.dump(cls.chromeTrace(spans, origin), _file)
+            print_log(f'Profile of cycle {cycle} ({report["duration_ms"]} ms) exported to {_base}.json / .trace.json')
+        except Exception as ex:
+            exptTrace(ex)
@@ -13,10 +13,12 @@ import string, io
 import yaml, sys, re
 import datetime, time
 import os
+import hashlib
 
 
 from bs2_config import  DevType, systemDevices
 from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, void_f
+from bs1_proc_manager import scriptPlan, POLICY_KEY, parsePolicy
 # print_DEBUG = void_f
 
 
@@ -48,6 +50,13 @@ def validate_dev_cmd(dev:str, cmd:str, sysDevs: systemDevices) -> bool:
         return False
     elif dev == 'NOP':
         return True
+    elif dev == POLICY_KEY:                             # group timeout / retry policy
+        try:
+            print_log (f' Group policy: {parsePolicy(cmd)}')
+        except Exception as ex:
+            print_err (f' Invalid policy: {cmd}. {ex}')
+            return False
+        return True
     
     try:
         _cmd:Command = Command.parse_cmd(f'{dev}.{cmd}')
@@ -311,6 +320,7 @@ def validate_cmd(dev, cmd, sysDevs: systemDevices):
 new_colors:list = list()                         # Colors per line (in fact one of two main and alt colors for adjacent command group)
 new_script:list = list()                         # The loaded  script in text format will be dispalyes in the table (using pweudo graphic)
 LoadedScript:dict = dict()                       # The script in dictionary format (as it loaded from YAML file)
+LoadedPlan:scriptPlan | None = None              # The script compiled to execution plan (cached by file hash)
 groups= list()                                   # list of lists of commands's group 
 
 def collectDevices(vScript):
@@ -324,6 +334,26 @@ def collectDevices(vScript):
     return colectD
 
 
+SCHEDULE_BARRIER_DEVS = {'SYS'}                 # step with these devices (i.e. SYS.DELAY) waits for all previous steps and blocks next ones
+SCHEDULE_SKIP_DEVS = {'NOP', 'CMNT', POLICY_KEY}            # no device operated
+
+# stepDependencies -- for each group (step) of loaded script the set of previous groups it depends on,
+# i.e. groups operating the same device (DEV of DEV.OP). Used by pipelined script run: a step starts
+# as soon as the steps it depends on are done. Step with no device or with SYS command is a barrier
+def stepDependencies(script:dict | None = None) -> list[set[int]]:
+    _devSets:list[set | None] = list()              # None - barrier
+    for _group in (LoadedScript if script is None else script).values():
+        _devs = {str(_dev).split('.')[0] for _dev in collectDevices(_group)} - SCHEDULE_SKIP_DEVS
+        _devSets.append(None if len(_devs) == 0 or not _devs.isdisjoint(SCHEDULE_BARRIER_DEVS) else _devs)
+
+    deps:list[set[int]] = list()
+    for _step, _devs in enumerate(_devSets):
+        deps.append({_prev for _prev in range(_step) \
+                     if _devs is None or _devSets[_prev] is None or not _devs.isdisjoint(_devSets[_prev])})
+    print_DEBUG(f'Step dependencies = {deps}')
+    return deps
+
+
 def scriptParallelValidator(vScript:dict, op = 'S'):
     parSet:list= list()
 
@@ -331,11 +361,11 @@ def scriptParallelValidator(vScript:dict, op = 'S'):
         for _key, _val in vScript.items():
             if  isinstance(_val, dict): 
                 scriptParallelValidator(_val, str(_key)[-1])
-                if op == 'P':
+                if op == 'P' or op == 'M':          # parallel / simultaneous (PLC runner) group
                     parSet.append(collectDevices(_val))
                 
             else:
-                if op == 'P':
+                if op == 'P' or op == 'M':
                     tmpSet = set()
                     tmpSet.add(_key)
                     parSet.append(tmpSet)
@@ -351,6 +381,7 @@ def scriptParallelValidator(vScript:dict, op = 'S'):
         _set.discard('PHG')                      # exlude PHG relay
         _set.discard('CAM1')                      # exlude CAM1 
         _set.discard('CAM2')                      # exlude CAM2
+        _set.discard(POLICY_KEY)                  # exlude group policy
         if not tmpSet.isdisjoint(_set):
             raise Exception (f'The same devices {list(tmpSet.intersection(_set))} in paralel proceeding')
         tmpSet.update(_set)
@@ -506,17 +537,17 @@ def ymlPars(CmdScript:dict, sysDevs:systemDevices, group:list=None, line:int = 0
 
                 print_DEBUG(f'group = {group}, group_n={group_n}, group_index = {group_index},, cmdStr = {cmdStr}, _count = {_count}, device = {device}, commands = {commands}, commands[{device}]= {commands[device]}')
                 leadColumn = cmdStr
-                group_re = re.compile(r'(\b[1-9][0-9]*(P|S)\b)|(\bPROC_[a-zA-Z0-9]+(P|S)\b)')
+                group_re = re.compile(r'(\b[1-9][0-9]*(P|S|M)\b)|(\bPROC_[a-zA-Z0-9]+(P|S|M)\b)')
                 if not group_re.match(group_n):
                     raise Exception(f"Script error. Invalid group [{group_n}] format ")
                 if _count == 0:
                     leadColumn  = leadColumn + (str(group_n[:-1])) + delimiter
                 elif _count > 0:
-                    con_char = "╚" if group_n[-1] == "P" else "└"
+                    con_char = "╚" if group_n[-1] in "PM" else "└"
                     if _count == (len(commands) - 1):           # last command in group
-                        leadColumn  = (f'{len(leadColumn)*" "}{"╚" if group_n[-1] == "P" else "└"}')
+                        leadColumn  = (f'{len(leadColumn)*" "}{"╚" if group_n[-1] in "PM" else "└"}')
                     else:
-                        leadColumn  = (f'{len(leadColumn)*" "}{"╠" if group_n[-1] == "P" else "├"}')
+                        leadColumn  = (f'{len(leadColumn)*" "}{"╠" if group_n[-1] in "PM" else "├"}')
 
 
                 # row = list()
@@ -635,39 +666,47 @@ def buildScriptTable(CmdScript:dict):
 
     pass
 
-def load_embeded_script(filename, sysDevs:systemDevices)->bool:
-    global LoadedScript
+# read_script -- reads, validates and compiles the script file (no GUI). Raises exception on wrong script
+# Sets LoadedScript / LoadedPlan and the table rows (new_script, new_colors, groups)
+def read_script(filename, sysDevs:systemDevices) -> tuple[dict, scriptPlan]:
+    global LoadedScript, LoadedPlan
     global new_colors, new_script, groups
 
     new_script.clear()          # reset script list
     new_colors.clear()          # reset colors list
     groups.clear()
 
-    group_n:int = 0
-    group_index = 0
-    
-    try:
-        with open(filename) as script_file:
+    LoadedPlan = None
+    with open(filename) as script_file:
+
+        scriptText = script_file.read()
+        doc = yaml.safe_load(scriptText)
 
-            doc = yaml.safe_load(script_file)
+        print_log(f'Script doc = {doc}\n\n')
 
-            print_log(f'Script doc = {doc}\n\n')
+        scriptValidator(doc)
 
-            scriptValidator(doc)
+        scriptParallelValidator(doc)
 
-            scriptParallelValidator(doc)
+        LoadedScript = scriptFormater(doc)
 
-            LoadedScript = scriptFormater(doc)
+        print_DEBUG(f'LoadedScript == doc = {LoadedScript == doc}')
 
-            print_DEBUG(f'LoadedScript == doc = {LoadedScript == doc}')
+        ymlPars(LoadedScript, sysDevs=sysDevs)
 
-            ymlPars(LoadedScript, sysDevs=sysDevs)
+        buildScriptTable(LoadedScript)
 
-            buildScriptTable(LoadedScript)
- 
-            print_log(f'new_script = {new_script}')
-            print_log(f'new_colors = {new_colors}')
-            print_log(f'groups = {groups}')
+        LoadedPlan = scriptPlan.load(LoadedScript, sysDevs, hashlib.sha1(scriptText.encode()).hexdigest())
+
+        print_log(f'new_script = {new_script}')
+        print_log(f'new_colors = {new_colors}')
+        print_log(f'groups = {groups}')
+
+    return LoadedScript, LoadedPlan
+
+def load_embeded_script(filename, sysDevs:systemDevices)->bool:
+    try:
+        read_script(filename, sysDevs)
     except Exception as ex:
         # print_log(f'Exception -> {ex} of type {type(ex)}')
         exptTrace(ex=ex)
@@ -682,6 +721,19 @@ def load_embeded_script(filename, sysDevs:systemDevices)->bool:
     return True
 
 
+def GetScriptPlan() -> scriptPlan | None:
+    return LoadedPlan
+
+# ReloadScriptPlan -- drops the compiled plans and compiles the loaded script again (i.e. parameters are reloaded)
+def ReloadScriptPlan(sysDevs:systemDevices) -> scriptPlan | None:
+    global LoadedPlan
+
+    scriptPlan.clear()
+    if LoadedPlan is not None:
+        LoadedPlan = scriptPlan.load(LoadedScript, sysDevs, LoadedPlan.fileHash)
+    return LoadedPlan
+
+
 def get_subscript(script, sub_script_lines)->list[str]:
     devs = set()
     subscript:list[str] = list()
@@ -13,7 +13,7 @@ import time, datetime
 from queue import Queue 
 
 
-from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, num2binstr, set_parm, get_parm, globalEventQ, smartLocker
+from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, num2binstr, set_parm, get_parm, globalEventQ, smartLocker, notifyQueue
 
 
 
@@ -28,7 +28,7 @@ class StatisticSQLite:
         self.__cursor = None
         self.__success_counter = 0
         self.devName = _devName
-        self.devNotificationQ = Queue()                 # for compatability
+        self.devNotificationQ:Queue = notifyQueue()     # for compatability
 
 
         self.__sqliteConnection = sqlite3.connect(self.__db_name)
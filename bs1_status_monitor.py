@@ -12,28 +12,199 @@ from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s
     real_num_validator, int_num_validator, real_validator, int_validator
 from bs1_mecademic import _mcs500_pos 
 from bs1_cognex_modbus import statisticData
-from threading import Thread
+from threading import Thread, Lock, Event
 import os, sys, time, re
 from queue import Queue 
 from enum import Enum
+from dataclasses import dataclass, field, replace
 from bs1_DH_RB_modbus import MAX_DH_ANGLE
 from Motors_Control_Dashboard import SetLED
 
 from typing import TYPE_CHECKING
 
-from bs2_DSL_cmd import DevType
 
 
 tSync = Enum("tSync", ["start", "stop", "cont"])
 
 # MAX_DH_ANGLE = 65536
 
+STATE_POLL_PERIOD = 0.2                 # device in motion state poll period (sec) (params.yml STATUS_MONITOR/PERIOD)
+STATE_IDLE_PERIOD = 2                   # idle device state poll period (sec) (params.yml STATUS_MONITOR/IDLE_PERIOD)
+MOTOR_DEV_TYPES = ('TROLLEY', 'GRIPPER', 'GRIPPERv3', 'DIST_ROTATOR', 'TIME_ROTATOR', 'DH')      # device type names
+STATE_DEV_TYPES = MOTOR_DEV_TYPES + ('HMP', 'ZABER', 'MARCO', 'MCDMC', 'DB', 'JTSE')
+DEV_OBJ_ATTR = {'HMP': 'dev_hmp', 'ZABER': 'dev_zaber', 'MARCO': 'dev_marco', 'MCDMC': 'dev_mcdmc', 'DB': 'dev_DB', 'JTSE': 'dev_jtse'}
+
+def devTypeName(m_dev) -> str:
+    return getattr(m_dev.C_type, 'name', str(m_dev.C_type))
+
+# devInMotion -- device operation is in progress: motion flag is set / watch dog thread is alive
+def devInMotion(m_dev) -> bool:
+    _type = devTypeName(m_dev)
+    _dev = getattr(m_dev, 'dev_mDC' if _type in MOTOR_DEV_TYPES else DEV_OBJ_ATTR.get(_type, ''), None)
+    if _dev is None:
+        return False
+    if getattr(_dev, 'mDev_in_motion', False) is True or getattr(_dev, '_mDev_in_motion', False) is True:
+        return True
+    _wd = getattr(_dev, 'wd', None) or getattr(_dev, '_wd', None)
+    return isinstance(_wd, Thread) and _wd.is_alive()
+
+@dataclass(frozen=True)
+class pollRate:                         # device type poll periods (sec)
+    moving:float = STATE_POLL_PERIOD
+    idle:float = STATE_IDLE_PERIOD      # 0 - not polled while idle (read once when motion ends)
+
+# pollRates -- STATUS_MONITOR entry of device type: period (in motion and idle) / {MOVING: sec, IDLE: sec}
+def pollRates(section:dict, devType:str) -> pollRate:
+    _default = pollRate(moving = float(section.get('PERIOD', STATE_POLL_PERIOD)), \
+                        idle = float(section.get('IDLE_PERIOD', STATE_IDLE_PERIOD)))
+    _entry = section.get(devType)
+    if _entry is None:
+        return _default
+    elif isinstance(_entry, dict):
+        return pollRate(moving = float(_entry.get('MOVING', _default.moving)), idle = float(_entry.get('IDLE', _default.idle)))
+    return pollRate(moving = float(_entry), idle = float(_entry))
+
+@dataclass
+class devState:                         # device state snapshot
+    values:dict = field(default_factory=dict)
+    stamp:float = 0                     # last successful read (perf_counter), 0 - never read
+    error:str | None = None             # last read error
+    moving:bool = False                 # in motion at the last read
+    reads:int = 0                       # successful reads
+
+    @property
+    def age(self) -> float:             # (sec)
+        return time.perf_counter() - self.stamp if self.stamp > 0 else float('inf')
+
+# deviceStateCache -- background device state reads. Devices are polled in a thread per device type,
+# so slow device does not block GUI loop / other device types. Each device is polled at the MOVING period
+# of its type while in motion and at the IDLE period otherwise (params.yml STATUS_MONITOR), motion start / end
+# is detected within the MOVING period and triggers immediate read.
+# realTime = False (script is running) - stored positions only, no device position requests
+class deviceStateCache:
+    def __init__(self, devs_list:list, params:dict | None = None):
+        self.__lock:Lock = Lock()
+        self.__stop:Event = Event()
+        self.__states:dict = dict()                         # CDev -> devState
+        self.__realTime:bool = True
+        self.__threads:list[Thread] = list()
+
+        _section = params.get('STATUS_MONITOR') if isinstance(params, dict) else None
+        _section = _section if isinstance(_section, dict) else dict()
+        _groups:dict[str, list] = dict()
+        for m_dev in devs_list:
+            if devTypeName(m_dev) in STATE_DEV_TYPES:
+                _groups.setdefault(devTypeName(m_dev), list()).append(m_dev)
+
+        for _type, _devs in _groups.items():
+            try:
+                _rate = pollRates(_section, _type)
+            except Exception as ex:
+                print_err(f'-WARNING- Wrong STATUS_MONITOR periods of {_type} in params.yml: {ex}')
+                _rate = pollRate()
+            _rate = pollRate(moving = max(_rate.moving, 0.01), idle = max(_rate.idle, 0))
+            _thread = Thread(target=self.__pollThread, args=(_devs, _rate,), name=f'state-{_type}', daemon=True)
+            self.__threads.append(_thread)
+            print_log(f'Device state cache: {len(_devs)} {_type} devices every {_rate.moving} sec in motion, ' \
+                      f'{_rate.idle if _rate.idle > 0 else "no polling"} idle')
+            _thread.start()
+
+    @property
+    def realTime(self) -> bool:
+        return self.__realTime
+
+    @realTime.setter
+    def realTime(self, val:bool):
+        self.__realTime = bool(val)
+
+    # getState -- copy of the device state, None if not polled yet
+    def getState(self, m_dev) -> devState | None:
+        with self.__lock:
+            _state = self.__states.get(m_dev)
+            return replace(_state, values=dict(_state.values)) if _state is not None else None
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            return {m_dev: replace(_state, values=dict(_state.values)) for m_dev, _state in self.__states.items()}
+
+    def stop(self):
+        self.__stop.set()
+        for _thread in self.__threads:
+            _thread.join(timeout=1)
+
+    def __pollThread(self, devs:list, rate:pollRate):
+        _due:dict = {m_dev: 0.0 for m_dev in devs}          # next read time
+        _moving:dict = {m_dev: False for m_dev in devs}
+        while not self.__stop.is_set():
+            for m_dev in devs:
+                if self.__stop.is_set():
+                    break
+                _now = time.perf_counter()
+                _motion = devInMotion(m_dev)
+                if _motion != _moving[m_dev]:               # motion started / ended - read now
+                    _moving[m_dev] = _motion
+                    _due[m_dev] = _now
+                if _now >= _due[m_dev]:
+                    self.__poll(m_dev, _motion)
+                    _period = rate.moving if _motion else rate.idle
+                    _due[m_dev] = time.perf_counter() + _period if _period > 0 else float('inf')
+                                                            # idle devices are checked for motion every MOVING period
+            self.__stop.wait(min(max(min(_due.values()) - time.perf_counter(), 0), rate.moving))
+
+    def __poll(self, m_dev, moving:bool = False):
+        try:
+            _values = readDevState(m_dev, self.__realTime)
+            with self.__lock:
+                _reads = self.__states[m_dev].reads if m_dev in self.__states else 0
+                self.__states[m_dev] = devState(values=_values, stamp=time.perf_counter(), moving=moving, reads=_reads + 1)
+        except Exception as ex:
+            with self.__lock:
+                _state = self.__states.setdefault(m_dev, devState())
+                _report = _state.error != str(ex)           # report error once
+                _state.error = str(ex)
+            if _report:
+                exptTrace(ex)
+                print_err(f'-ERROR- Reading state of {m_dev} failed: {ex}')
+
+
+# readDevState -- device state values shown by status monitor (device requests, run in the cache poll thread)
+def readDevState(m_dev, realTime:bool) -> dict:
+    values:dict = dict()
+    _type = devTypeName(m_dev)
+    if _type in MOTOR_DEV_TYPES:
+        values['pos'] = m_dev.dev_mDC.mDev_get_cur_pos() if realTime else m_dev.dev_mDC.mDev_stored_pos()
+        values['current'] = m_dev.dev_mDC.el_current_on_the_fly
+        if _type == 'GRIPPER':
+            values['gripper_onof'] = m_dev.dev_mDC.gripper_onof
+    elif _type == 'HMP':
+        values['ave'] = m_dev.dev_hmp.getAve()
+        values['curr'] = m_dev.dev_hmp.getCurrRT()
+        values['volt'] = m_dev.dev_hmp.getVoltRT()
+    elif _type == 'ZABER':
+        values['pos'] = m_dev.dev_zaber.GetPos() if realTime else m_dev.dev_zaber.readStoredPos()
+    elif _type == 'MARCO':
+        values['temp'] = m_dev.dev_marco.get_temp()
+        values['pulses'] = m_dev.dev_marco.get_pulse_count_since_last_reset()
+        values['program'] = m_dev.dev_marco.progNum
+        values['shoting_status'] = m_dev.dev_marco.shoting_status
+    elif _type == 'MCDMC':
+        values['online'] = m_dev.dev_mcdmc.isCognexOnline
+        values['active'] = m_dev.dev_mcdmc.isActive
+        values['pos'] = m_dev.dev_mcdmc.getPos
+        values['info'] = m_dev.dev_mcdmc.statisticINFO
+    elif _type == 'DB':
+        values['counter'] = m_dev.dev_DB.success_counter
+    elif _type == 'JTSE':
+        values['temp'] = m_dev.dev_jtse.RAT
+    return values
+
 
 class StatusMonitor:
-    def __init__(self, window, devs_list, statusPub, timeout = 0.1):
+    def __init__(self, window, devs_list, statusPub, timeout = 0.1, params:dict | None = None):
         self.__devs_list = devs_list
         self.__statusPub = statusPub
         self.__window = window
+        self.__cache:deviceStateCache = deviceStateCache(devs_list, params)      # device reads off the GUI thread
         # self.__timeout = timeout
         # self.__syncQ:Queue = Queue()
         # print_log(f'Starting Status Monitor')
@@ -53,124 +224,109 @@ class StatusMonitor:
 
     #     print_log(f'Status monitor terminated')
 
+    # monitorUpdate -- GUI refresh by device state cache (GUI thread, no device requests)
     def monitorUpdate(self, realTime = False):
 
         statusData = dict() 
-        new_pos = 0
+        self.__cache.realTime = realTime
+        states:dict = self.__cache.snapshot()
     
         for m_dev in  self.__devs_list:
 
-            if m_dev.C_type == DevType.TROLLEY or m_dev.C_type == DevType.GRIPPER \
-                    or m_dev.C_type == DevType.GRIPPERv3 \
-                    or m_dev.C_type == DevType.DIST_ROTATOR or m_dev.C_type == DevType.TIME_ROTATOR \
-                    or m_dev.C_type == DevType.DH :
+            _state:devState | None = states.get(m_dev)
+            if _state is None or _state.stamp == 0:                 # not read yet
+                continue
+            _val:dict = _state.values
+            new_pos = _val.get('pos', 0)
+            _type = devTypeName(m_dev)                              # matched by name, as in the state cache
+
+            if _type in MOTOR_DEV_TYPES:
                 
-                # if realTime and not (m_dev.C_type == DevType.DH) :
-                if realTime :
-                    new_pos = m_dev.dev_mDC.mDev_get_cur_pos()
-                else:
-                    new_pos = m_dev.dev_mDC.mDev_stored_pos()
-
-                otf_cur = m_dev.dev_mDC.el_current_on_the_fly
-                if m_dev.C_type == DevType.TROLLEY:
+                otf_cur = _val['current']
+                if _type == 'TROLLEY':
                     self.__window[f'-{m_dev.c_gui}-TROLLEY_POSSITION-'].update(value = new_pos)
                     self.__window[f'-{m_dev.c_gui}-TROLLEY_CUR_DISPLAY-'].update(value = otf_cur)
 
-                elif m_dev.C_type == DevType.DH:
+                elif _type == 'DH':
                     # if int(new_pos) > (MAX_DH_ANGLE/2):
                     #     new_pos = new_pos - MAX_DH_ANGLE
                     self.__window[f'-{m_dev.c_gui}-DH_GRIPPER_POSSITION-'].update(value = new_pos)    
 
                 
 
-                elif m_dev.C_type == DevType.GRIPPERv3:
+                elif _type == 'GRIPPERv3':
                     self.__window[f'-{m_dev.c_gui}-GRIPPER_POSSITION-'].update(value = new_pos)
                     self.__window[f'-{m_dev.c_gui}-GRIPPER_CUR_DISPLAY-'].update(value = otf_cur)
-                elif m_dev.C_type == DevType.GRIPPER:
+                elif _type == 'GRIPPER':
                     self.__window[f'-{m_dev.c_gui}-GRIPPER_CUR_DISPLAY-'].update(value = otf_cur)
-                elif m_dev.C_type == DevType.DIST_ROTATOR:
+                elif _type == 'DIST_ROTATOR':
                     self.__window[f'-{m_dev.c_gui}-DIST_ROTATOR_POSSITION-'].update(value = new_pos)
                     self.__window[f'-{m_dev.c_gui}-DIST_ROTATOR_CUR_DISPLAY-'].update(value = otf_cur)
-                elif m_dev.C_type == 'DevType.TIME_ROTATOR':
+                elif _type == 'TIME_ROTATOR':
                     # self.__window[f'-{m_dev.c_gui}-TIME_ROTATOR_CUR_DISPLAY-'].update(value = otf_cur)
                     self.__window[f'-TIME_ROTATOR_CUR_DISPLAY-'].update(value = otf_cur)
-            elif m_dev.C_type == DevType.HMP:
-                _ave = m_dev.dev_hmp.getAve()
-                self.__window[f'-HMP-RES-'].update(value = _ave)
-                self.__window[f'-HMP-CURR-RES-'].update(value = m_dev.dev_hmp.getCurrRT())
-                self.__window[f'-HMP-VOLT-RES-'].update(value = m_dev.dev_hmp.getVoltRT())
+            elif _type == 'HMP':
+                self.__window[f'-HMP-RES-'].update(value = _val['ave'])
+                self.__window[f'-HMP-CURR-RES-'].update(value = _val['curr'])
+                self.__window[f'-HMP-VOLT-RES-'].update(value = _val['volt'])
 
 
-            elif m_dev.C_type == DevType.ZABER:
-                
-                if realTime:
-                    new_pos = m_dev.dev_zaber.GetPos()
-                else:
-                    new_pos = m_dev.dev_zaber.readStoredPos()
-                    
+            elif _type == 'ZABER':
                 self.__window[f'-{m_dev.c_gui:02d}-ZABER-POSSITION-'].update(value = new_pos)
             
-            elif  DevType.MARCO == m_dev.C_type:
-                self.__window[f'-MARCO_ACTUAL_TEMP-'].update(value = m_dev.dev_marco.get_temp())  
-                self.__window[f'-MARCO_PULSE_COUNT_AFTER_RESET-'].update(value = m_dev.dev_marco.get_pulse_count_since_last_reset())  
-                # self.__window[f'-MARCO_PROGRAM-'].update(value = m_dev.dev_marco.progNum)  
-                # self.__window[f'-MARCO_PROGRAM-'].update(value = 'Prog '+ str(m_dev.dev_marco.program_control()))
-                self.__window[f'-MARCO_PROGRAM-'].update(value = f'Prog {m_dev.dev_marco.progNum}')  
-                if not m_dev.dev_marco.shoting_status:
+            elif _type == 'MARCO':
+                self.__window[f'-MARCO_ACTUAL_TEMP-'].update(value = _val['temp'])  
+                self.__window[f'-MARCO_PULSE_COUNT_AFTER_RESET-'].update(value = _val['pulses'])  
+                self.__window[f'-MARCO_PROGRAM-'].update(value = f'Prog {_val["program"]}')  
+                if not _val['shoting_status']:
                     self.__window[f'-MARCO_SINGLE_SHOT_OFF-'].update(button_color='tomato on red')
                     self.__window[f'-MARCO_SINGLE_SHOT_ON-'].update(button_color='white on green')
             
-            elif DevType.MCDMC == m_dev.C_type:
-                if m_dev.dev_mcdmc.isCognexOnline:
-                    SetLED (self.__window, '_cognex_', 'green')
-                else:
-                    SetLED (self.__window, '_cognex_', 'red')
-
-                if m_dev.dev_mcdmc.isActive:
-                    SetLED (self.__window, '_mcdmc_active_', 'green')
-                else:
-                    SetLED (self.__window, '_mcdmc_active_', 'red')
-
-                _r_pos:_mcs500_pos =  m_dev.dev_mcdmc.getPos
+            elif _type == 'MCDMC':
+                SetLED (self.__window, '_cognex_', 'green' if _val['online'] else 'red')
+                SetLED (self.__window, '_mcdmc_active_', 'green' if _val['active'] else 'red')
+
+                _r_pos:_mcs500_pos =  _val['pos']
                 self.__window[f'-MCDMC_POS_X-'].update(value = _r_pos.x)
                 self.__window[f'-MCDMC_POS_Y-'].update(value = _r_pos.y)
                 self.__window[f'-MCDMC_POS_Z-'].update(value = _r_pos.z)
                 self.__window[f'-MCDMC_POS_GAMMA-'].update(value = _r_pos.gamma)
-                _info:statisticData = m_dev.dev_mcdmc.statisticINFO   
+                _info:statisticData = _val['info']   
                 self.__window[f'-CGNX_VALID_PRODUCT-'].update(value = _info.valid_products)
                 self.__window[f'-CGNX_WRONG_PRODUCT-'].update(value = _info.wrong_products)
                 self.__window[f'-CGNX_UP_SIDE_DOWN-'].update(value = _info.up_side_down)
                 self.__window[f'-CGNX_OUT_OF_RANGE-'].update(value = _info.out_of_range)
             
-            elif (DevType.DB  == m_dev.C_type) and ('-CGNX_PROCEEDED_PRODUCT-' in self.__window.AllKeysDict):
-                self.__window[f'-CGNX_PROCEEDED_PRODUCT-'].update(value = m_dev.dev_DB.success_counter)
+            elif (_type == 'DB') and ('-CGNX_PROCEEDED_PRODUCT-' in self.__window.AllKeysDict):
+                self.__window[f'-CGNX_PROCEEDED_PRODUCT-'].update(value = _val['counter'])
             
-            elif (DevType.JTSE == m_dev.C_type) and ('-JBC_TEMP-' in self.__window.AllKeysDict): 
-                self.__window[f'-JBC_TEMP-'].update(value = m_dev.dev_jtse.RAT)
+            elif (_type == 'JTSE') and ('-JBC_TEMP-' in self.__window.AllKeysDict): 
+                self.__window[f'-JBC_TEMP-'].update(value = _val['temp'])
                 
             
                 
-            statusData = self.__updatePayloadStatus(m_dev, statusData, new_pos)    # update status for external apps
+            statusData = self.__updatePayloadStatus(m_dev, statusData, new_pos, _val)    # update status for external apps
 
-        self.__statusPub.publishJsonMsg(statusData)
+        self.__statusPub.publishStatus(statusData)
 
 
-    def __updatePayloadStatus(self, m_dev, statusData, pos):
-        if m_dev.C_type == DevType.TROLLEY:
+    def __updatePayloadStatus(self, m_dev, statusData, pos, values:dict):
+        _type = devTypeName(m_dev)
+        if _type == 'TROLLEY':
             statusData[f'T{m_dev.c_gui}'] = dict()
             statusData[f'T{m_dev.c_gui}']["encoder"] = pos
-        elif m_dev.C_type == DevType.GRIPPER:
+        elif _type == 'GRIPPER':
             statusData[f'G{m_dev.c_gui}'] = dict()
-            statusData[f'G{m_dev.c_gui}']["encoder"] = 0 if m_dev.dev_mDC.gripper_onof else 1
-        elif m_dev.C_type == DevType.GRIPPERv3:
+            statusData[f'G{m_dev.c_gui}']["encoder"] = 0 if values.get('gripper_onof') else 1
+        elif _type == 'GRIPPERv3':
             statusData[f'G{m_dev.c_gui}'] = dict()
             statusData[f'G{m_dev.c_gui}']["encoder"] = pos
-        elif m_dev.C_type == DevType.DIST_ROTATOR:
+        elif _type == 'DIST_ROTATOR':
             statusData[f'R{m_dev.c_gui}'] = dict()
             statusData[f'R{m_dev.c_gui}']["encoder"] = pos
-        elif m_dev.C_type == 'DevType.TIME_ROTATOR':
+        elif _type == 'TIME_ROTATOR':
             pass
-        elif m_dev.C_type == DevType.ZABER:
+        elif _type == 'ZABER':
             statusData[f'Z{m_dev.c_gui}'] = dict()
             statusData[f'Z{m_dev.c_gui}']["encoder"] = pos
 
@@ -186,5 +342,6 @@ class StatusMonitor:
         
     def StopMonitor(self):
         print_log(f'Stoping monitor')
+        self.__cache.stop()
         # self.__syncQ.put(tSync.stop)
 
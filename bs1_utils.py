@@ -221,6 +221,33 @@ class smartLocker:                              # Mutex mechanism
             self.lock.release() 
 
 
+# notifyQueue - device notification queue, which also calls the waiter callbacks (one shot) on put. 
+# Used by the async engine to await the device completion on the event loop with no polling 
+# (the callback is loop.call_soon_threadsafe). The callbacks are called under the queue mutex, must not block
+class notifyQueue(Queue):
+    def __init__(self, maxsize:int = 0):
+        super().__init__(maxsize)
+        self.__waiters:list = list()
+
+    def addWaiter(self, callback) -> None:
+        with self.mutex:
+            self.__waiters.append(callback)
+
+    def removeWaiter(self, callback) -> None:
+        with self.mutex:
+            if callback in self.__waiters:
+                self.__waiters.remove(callback)
+
+    def _put(self, item):
+        super()._put(item)
+        _waiters, self.__waiters = self.__waiters, list()
+        for _callback in _waiters:
+            try:
+                _callback()
+            except Exception as ex:
+                exptTrace(ex)
+
+
 def clearQ(_Q:Queue):
     iCount = 0
     while not _Q.empty():
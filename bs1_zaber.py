@@ -23,7 +23,7 @@ from queue import Queue
 import random
 
 from bs1_utils import print_log, print_inf, print_err, print_DEBUG, exptTrace, s16, s32, set_parm, get_parm, \
-    assign_type_parm, assign_parm
+    assign_type_parm, assign_parm, notifyQueue
 
 
 default_unit = Units.LENGTH_MILLIMETRES
@@ -126,7 +126,7 @@ class Zaber_Motor:
         self.max_velocity = self.axis.settings.get("maxspeed", default_velocity_unit)
         self.devName = devName
         self.dev_lock =  Lock()                 # device lock to avoid multiply access
-        self.devNotificationQ = Queue()
+        self.devNotificationQ:Queue = notifyQueue()
         self.__stopFlag:bool = False
         self.rnd_step:int = None
         self.__rnd_gen = random.Random()
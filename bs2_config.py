@@ -26,7 +26,6 @@ import weakref
 
 
 from bs1_ads import commADS, symbolsADS
-from bs1_plc_dev import PLCDev
 from bs1_sysdev import sysDevice
 from bs1_marco_modbus import Marco_modbus
 from bs1_base_motor import BaseMotor, BaseDev
@@ -171,8 +170,10 @@ class systemDevices:
                             print_log(f'Configuring PLC platform: {_plc_name} with parameters: {_plc_conf}')
                         
                         if _plc_name is  None or not isinstance(_plc_conf, dict) \
-                                    or 'ADS_NETID' not in _plc_conf.keys() or 'REMOTE_IP' not in _plc_conf.keys():
-                            raise Exception(f'Error: ADS_NETID or REMOTE_IP are not defined in PLC section for {_plc_name} the configuration file {self.__conf_file}')
+                                    or ('SIMULATION' not in _plc_conf.keys() \
+                                        and ('ADS_NETID' not in _plc_conf.keys() or 'REMOTE_IP' not in _plc_conf.keys())):
+                                                                    # SIMULATION replaces ADS_NETID / REMOTE_IP
+                            raise Exception(f'Error: ADS_NETID or REMOTE_IP (or SIMULATION) are not defined in PLC section for {_plc_name} the configuration file {self.__conf_file}')
 
 
                         if len(doc['PLC']) > 1:
@@ -180,7 +181,11 @@ class systemDevices:
                             raise Exception(f'Multiple PLC platforms defined in configuration file, only single PLC platform is supported currently')
 
                         try:
-                            self.__plc_devs = plcPlatformNode(self.__conf_file, self.__params_file, _plc_conf['ADS_NETID'], _plc_conf['REMOTE_IP'])
+                            self.__plc_devs = plcPlatformNode(self.__conf_file, self.__params_file, _plc_conf.get('ADS_NETID', None), _plc_conf.get('REMOTE_IP', None), \
+                                                            _watch_mode = _plc_conf.get('WATCH_MODE', None), \
+                                                            _poll_period = _plc_conf.get('POLL_PERIOD', None), \
+                                                            _pool_size = _plc_conf.get('POOL_SIZE', None), \
+                                                            _simulation = _plc_conf.get('SIMULATION', None))
                         except Exception as ex:            
                             print_err(f'Error configuring PLC platform {_plc_name}, exception = {ex}')
                             exptTrace(ex)
@@ -234,6 +239,10 @@ class systemDevices:
 
     def getParams(self) -> dict:
         return self.__pc_devs.params_table
+
+    def setParams(self, params:dict):           # reloaded parameters table
+        if self.__pc_devs is not None:
+            self.__pc_devs.params_table = params
     
     def getConfDevs(self) -> dict:
         return self.__pc_devs.getDevs()
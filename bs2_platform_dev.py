@@ -26,6 +26,7 @@ import weakref
 
 
 from bs1_ads import commADS, symbolsADS
+from bs1_ads_sim import simADS
 from bs1_plc_dev import PLCNode
 from bs1_sysdev import sysDevice
 from bs1_marco_modbus import Marco_modbus
@@ -108,7 +109,8 @@ class abstractNode(ABC):
 class plcPlatformNode(abstractNode):
     _max_num_of_devs:int = None
 
-    def __init__(self, _config_file:str = None, _params_file:str = None, _ads_netid:str = None, _remote_ip:str = None):
+    def __init__(self, _config_file:str = None, _params_file:str = None, _ads_netid:str = None, _remote_ip:str = None, \
+                 _watch_mode:str = None, _poll_period:float = None, _pool_size:int = None, _simulation:dict | bool = None):
 
         super().__init__()
         self.ADS_NETID = _ads_netid
@@ -119,18 +121,23 @@ class plcPlatformNode(abstractNode):
 
         self.__config_file = _config_file
         try:
-         
-            if self.ADS_NETID is None or self.REMOTE_IP is None:
-                raise Exception(f'Error: ADS_NETID or REMOTE_IP are not defined ')
+            if _simulation not in (None, False):       # simulated ADS backend (offline / load testing)
+                self._ads = simADS.fromConfig(_simulation)
+            else:
+                if self.ADS_NETID is None or self.REMOTE_IP is None:
+                    raise Exception(f'Error: ADS_NETID or REMOTE_IP are not defined ')
                 
-            _ams_re = r'\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)(?:\.1\.1)\b'
-            _remip_re  = r'\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\b'
-            _ams_re_compiled = re.compile(_ams_re)
-            _remip_re_compiled = re.compile(_remip_re)
-            if not _ams_re_compiled.match(self.ADS_NETID) or not _remip_re_compiled.match(self.REMOTE_IP):
-                raise Exception(f'Error: Wrong ADS_NETID ({self.ADS_NETID}) or REMOTE_IP ({self.REMOTE_IP}) format in the configuration file {_config_file}')
+                _ams_re = r'\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)(?:\.1\.1)\b'
+                _remip_re  = r'\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\b'
+                _ams_re_compiled = re.compile(_ams_re)
+                _remip_re_compiled = re.compile(_remip_re)
+                if not _ams_re_compiled.match(self.ADS_NETID) or not _remip_re_compiled.match(self.REMOTE_IP):
+                    raise Exception(f'Error: Wrong ADS_NETID ({self.ADS_NETID}) or REMOTE_IP ({self.REMOTE_IP}) format in the configuration file {_config_file}')
             
-            self._ads = commADS(self.ADS_NETID, self.REMOTE_IP)
+                self._ads = commADS(self.ADS_NETID, self.REMOTE_IP) if _pool_size is None else \
+                                commADS(self.ADS_NETID, self.REMOTE_IP, pool_size = int(_pool_size))
+
+            PLCNode.setWatchMode(_watch_mode, _poll_period)       # POLL (default) / NOTIFY / SHARED
 
             # plcPlatformNode._max_num_of_devs = self._ads.readVar(symbol_name=symbolsADS._max_num_of_devs, var_type=int)
             
@@ -167,7 +174,8 @@ class plcPlatformNode(abstractNode):
             
             _dev_idx = 0
 
-            _devLst = PLCNode.enum_nodes(_comADS=self._ads)
+            self._plcDevs = PLCNode.load_nodes(_comADS=self._ads)      # bulk read of names, INFO and API
+            _devLst = PLCNode.nodesList
             self.number_of_devs = len(_devLst)
             print_log(f'Found {_devLst} ({self.number_of_devs}) devices in PLC configuration')
 
@@ -340,6 +348,16 @@ PLC:
     PLC_NAME:
         REMOTE_IP: '192.168.10.153'
         ADS_NETID: '192.168.137.1.1.1'
+        WATCH_MODE: POLL                    # POLL (default) - watch dog thread per device / NOTIFY - ADS notifications
+                                            # SHARED - single poller thread for all devices (batched read per cycle)
+        POLL_PERIOD: 0.1                    # SHARED poller cycle period (sec)
+        POOL_SIZE: 3                        # number of pooled ADS connections (reconnected with backoff on failure)
+        SIMULATION:                         # optional: simulated PLC instead of REMOTE_IP/ADS_NETID (see bs1_ads_sim.py)
+            RUNNERS: 10
+            LATENCY: 0.002                  # ADS request round trip (sec)
+            TASK_TIME: 0.2                  # default device task duration (sec)
+            DEVICES:                        # name: task duration (sec) or empty for default
+                Coining Axis: 0.5
 
         
 # All devices defined by their serial numbers / IP addresses or PLC NAME/Device Name